@@ -0,0 +1,78 @@
+"""Escala e acerto da deduplicação (`src.dedup`) em dados sintéticos.
+
+Para cada tamanho, copia uma fração das músicas como variantes ("(feat. X)",
+"(Explicit Ver.)", artistas em outra ordem, espaços e caixa diferentes) e
+mede o tempo de `resolve_duplicates`, quantas variantes voltaram ao grupo
+da original (cobertura) e quantas músicas originais foram fundidas com
+outra original (falsas fusões; a precisão é 1 menos essa fração). O tempo
+deve crescer perto de linearmente com as linhas.
+Uso, a partir da raiz do projeto:
+
+    python benchmarks/bench_dedup.py --sizes 100000,1000000 --workers 4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.synthetic import make_spotify_frame  # noqa: E402
+from src.data_preprocessing import clean_spotify_data  # noqa: E402
+from src.dedup import resolve_duplicates  # noqa: E402
+
+ARTISTS = 'artist(s)_name'
+
+
+def with_variants(df: pd.DataFrame, fraction: float, seed: int) -> pd.DataFrame:
+    """`df` mais cópias alteradas de uma fração das linhas (coluna `source` aponta a original)."""
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(df), size=int(len(df) * fraction), replace=False)
+    variants = df.iloc[picked].copy()
+    kind = np.arange(len(variants)) % 4
+    titles = variants['track_name'].astype('str')
+    artists = variants[ARTISTS].astype('str')
+    # The last credited artist also shows up in the title, as in "Song (feat. B)" by "A, B"
+    featured = ' (feat. ' + artists.str.split(', ').str[-1] + ')'
+    variants['track_name'] = np.select(
+        [kind == 0, kind == 1, kind == 3],
+        [titles + featured, titles + ' (Explicit Ver.)', '  ' + titles.str.upper()],
+        titles)
+    reversed_artists = artists.str.split(', ').map(lambda names: ', '.join(reversed(names)))
+    variants[ARTISTS] = np.where(kind == 2, reversed_artists, artists)
+    frame = pd.concat([df.assign(source=np.arange(len(df))), variants.assign(source=picked)],
+                      ignore_index=True)
+    return frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100000,1000000', help='Linhas originais, separadas por vírgula')
+    parser.add_argument('--fraction', type=float, default=0.05, help='Fração das músicas com variante')
+    parser.add_argument('--workers', type=int, default=None, help='Processos (padrão: número de CPUs)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'linhas':>10}{'s':>8}{'linhas/s':>11}{'grupos':>10}{'variantes ok':>14}{'precisão':>10}"
+          f"{'fusões falsas':>15}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        df = clean_spotify_data(make_spotify_frame(size, seed=args.seed), inplace=True)
+        frame = with_variants(df.reset_index(drop=True), args.fraction, args.seed)
+        start = time.perf_counter()
+        groups = resolve_duplicates(frame, max_workers=args.workers)
+        seconds = time.perf_counter() - start
+        variants = np.arange(len(df), len(frame))
+        found = np.mean(groups[variants] == groups[frame['source'].to_numpy()[variants]])
+        # Originals are distinct songs: any group holding two of them is a false merge
+        originals = groups[:len(df)]
+        false_merges = int(np.count_nonzero(np.bincount(originals)[originals] > 1))
+        precision = 1 - false_merges / len(df)
+        print(f"{len(frame):>10}{seconds:>8.2f}{len(frame) / seconds:>11.0f}{groups.max() + 1:>10}{found:>14.3f}"
+              f"{precision:>10.4f}{false_merges:>15}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Escalabilidade do processamento paralelo (`src.parallel`) por número de processos.
+
+Gera um CSV sintético e mede load → clean → normalize em série e com
+1/2/4/8 processos. Uso, a partir da raiz do projeto:
+
+    python benchmarks/bench_parallel.py --rows 2000000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import write_spotify_csv  # noqa: E402
+from src.data_preprocessing import (SPOTIFY_SCHEMA, clean_spotify_data,  # noqa: E402
+                                    load_data, normalize_audio_features)
+from src.parallel import clean_file_parallel  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / 'spotify.csv'
+        write_spotify_csv(csv_path, args.rows)
+
+        start = time.perf_counter()
+        normalize_audio_features(clean_spotify_data(load_data(str(csv_path), dtype=SPOTIFY_SCHEMA)))
+        serial = time.perf_counter() - start
+        print(f"{'processos':<12}{'segundos':>10}{'speedup':>10}")
+        print(f"{'série':<12}{serial:>10.2f}{1.0:>10.2f}")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            clean_file_parallel(csv_path, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:<12}{elapsed:>10.2f}{serial / elapsed:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
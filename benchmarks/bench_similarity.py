@@ -0,0 +1,69 @@
+"""Latência e recall do índice de músicas parecidas (`src.similarity`).
+
+Gera dados sintéticos já limpos e, para cada método, mede o tempo de
+construção, o tamanho do arquivo gravado, a vazão de consultas em lote,
+a latência de consultas isoladas (p50/p95) e o recall@k em relação à busca
+exata ('brute'). Uso, a partir da raiz do projeto:
+
+    python benchmarks/bench_similarity.py --rows 1000000 --queries 1000 --k 10
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from benchmarks.synthetic import make_spotify_frame  # noqa: E402
+from src.data_preprocessing import clean_spotify_data  # noqa: E402
+from src.similarity import METHODS, SimilarityIndex, recall_at_k  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=1000, help='Consultas do lote (e do recall)')
+    parser.add_argument('--single', type=int, default=50, help='Consultas isoladas para a latência')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--methods', nargs='+', default=list(METHODS), choices=METHODS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = clean_spotify_data(make_spotify_frame(args.rows, seed=args.seed), inplace=True)
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(df), size=min(args.queries, len(df)), replace=False)
+
+    exact = None
+    print(f"{'método':<11}{'build s':>9}{'MB':>8}{'lote q/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'recall':>8}")
+    # Brute force first: it is the ground truth for recall
+    for method in sorted(args.methods, key=lambda name: name != 'brute'):
+        start = time.perf_counter()
+        index = SimilarityIndex.build(df, method)
+        build_seconds = time.perf_counter() - start
+        queries = index.encode(df.iloc[sample])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            size_mb = index.save(Path(tmp_dir) / 'index.npz').stat().st_size / 2 ** 20
+
+        start = time.perf_counter()
+        _, found = index.query(queries, args.k)
+        throughput = len(queries) / (time.perf_counter() - start)
+
+        latencies = []
+        for row in queries[:args.single]:
+            start = time.perf_counter()
+            index.query(row[None, :], args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        if method == 'brute':
+            exact = found
+        recall = recall_at_k(exact, found) if exact is not None else float('nan')
+        print(f"{method:<11}{build_seconds:>9.2f}{size_mb:>8.1f}{throughput:>11.0f}"
+              f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 95):>9.2f}{recall:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+"""Suíte de benchmarks: leitura, limpeza, análise e gráficos sem display.
+
+Cada tamanho de dados roda em um processo separado, que gera (uma vez) um
+CSV sintético com `benchmarks.synthetic`, prepara os dados brutos e limpos
+e mede cada caso:
+
+- tempo de parede (mínimo e mediana de `--repeat` execuções);
+- pico de RSS do processo durante o caso (e o acréscimo sobre o RSS de
+  antes do caso), zerando o pico entre casos via `/proc/self/clear_refs`;
+- pico de alocações Python/NumPy (tracemalloc), numa execução à parte.
+
+Os resultados vão para um JSON que pode virar a linha de base
+(`--save-baseline`) e ser comparado com execuções futuras (`--compare`).
+Uso, a partir da raiz do projeto:
+
+    python benchmarks/run_benchmarks.py --sizes 1k,100k --save-baseline
+    python benchmarks/run_benchmarks.py --sizes 1k,100k --compare
+    python benchmarks/run_benchmarks.py --sizes 10M --groups load,clean
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.synthetic import cached_spotify_csv  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+BASELINE_FILE = RESULTS_DIR / 'baseline.json'
+DEFAULT_SIZES = '1k,10k,100k,1M'
+# Compared metrics and the absolute change below which a difference is noise
+COMPARED_METRICS = {'seconds_min': 0.005, 'rss_delta_mb': 5.0, 'alloc_peak_mb': 1.0}
+
+
+class Case(NamedTuple):
+    group: str
+    # Receives the prepared data and returns the arguments of `run`, untimed
+    setup: Callable[[dict], tuple]
+    run: Callable
+
+
+def _analysis(func, *args, **kwargs) -> Case:
+    return Case('analysis', lambda data: (data['clean'],), lambda df: func(df, *args, **kwargs))
+
+
+def _blocks(df: pd.DataFrame, rows: int = 100_000):
+    return (df.iloc[start:start + rows] for start in range(0, len(df), rows))
+
+
+def _plot(module: str, function: str) -> Case:
+    def run(df):
+        import matplotlib.pyplot as plt
+        getattr(__import__(f'src.{module}', fromlist=[function]), function)(df)
+        # Agg only rasterizes on draw; force it so every figure is fully rendered
+        for number in plt.get_fignums():
+            plt.figure(number).canvas.draw()
+        plt.close('all')
+    return Case('plots', lambda data: (data['clean'],), run)
+
+
+def build_cases() -> Dict[str, Case]:
+    from src import data_analysis as analysis
+    from src.data_preprocessing import SPOTIFY_SCHEMA, clean_spotify_data, load_data, normalize_audio_features
+
+    cases = {
+        'load_data': Case('load', lambda data: (str(data['csv']),), load_data),
+        'load_data[schema]': Case('load', lambda data: (str(data['csv']),),
+                                  lambda path: load_data(path, dtype=SPOTIFY_SCHEMA)),
+        'clean_spotify_data': Case('clean', lambda data: (data['raw'],), clean_spotify_data),
+        # normalize works in place; the copy is made in setup, outside the timing
+        'normalize_audio_features': Case('clean', lambda data: (data['clean'].copy(),), normalize_audio_features),
+        'get_top_artists': _analysis(analysis.get_top_artists),
+        'calculate_audio_features_stats': _analysis(analysis.calculate_audio_features_stats),
+        'streaming_audio_features_stats': _analysis(lambda df: analysis.streaming_audio_features_stats(_blocks(df))),
+        'analyze_streams_by_year': _analysis(analysis.analyze_streams_by_year),
+        'calculate_correlation': _analysis(analysis.calculate_correlation,
+                                           ['streams', 'danceability_%', 'energy_%', 'valence_%', 'bpm']),
+        'get_basic_stats': _analysis(analysis.get_basic_stats),
+        'streaming_basic_stats': _analysis(lambda df: analysis.streaming_basic_stats(_blocks(df))),
+        'analyze_temporal_patterns': _analysis(analysis.analyze_temporal_patterns, 'released_year', 'streams'),
+        'calculate_collaboration_metrics': _analysis(analysis.calculate_collaboration_metrics),
+        'identify_viral_potential': _analysis(analysis.identify_viral_potential),
+        'get_monthly_performance_stats': _analysis(analysis.get_monthly_performance_stats),
+        'summarize_dataset': _analysis(analysis.summarize_dataset),
+    }
+    try:
+        import pyarrow  # noqa: F401
+        cases['load_data[pyarrow]'] = Case('load', lambda data: (str(data['csv']),),
+                                           lambda path: load_data(path, engine='pyarrow', dtype=SPOTIFY_SCHEMA))
+    except ImportError:
+        pass
+
+    from src.visualization import PLOT_STEPS
+    for name in PLOT_STEPS:
+        cases[f'visualization.plot_{name}'] = _plot('visualization', f'plot_{name}')
+    for function in ['plot_streaming_distribution', 'plot_feature_relationships', 'plot_yearly_streams',
+                     'plot_danceability_vs_energy', 'plot_top_songs_by_streams',
+                     'plot_correlation_matrix', 'plot_releases_per_month']:
+        cases[f'data_visualization.{function}'] = _plot('data_visualization', function)
+    return cases
+
+
+def parse_size(text: str) -> int:
+    """'1k' -> 1000, '10M' -> 10000000."""
+    text = text.strip()
+    scale = {'k': 10 ** 3, 'm': 10 ** 6}.get(text[-1:].lower(), 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def select_cases(cases: Dict[str, Case], patterns: Optional[str], groups: Optional[str]) -> List[str]:
+    names = list(cases)
+    if groups:
+        wanted = {group.strip() for group in groups.split(',')}
+        names = [name for name in names if cases[name].group in wanted]
+    if patterns:
+        patterns = [pattern.strip() for pattern in patterns.split(',')]
+        # Exact names first: names such as 'load_data[schema]' read as character classes in fnmatch
+        names = [name for name in names
+                 if name in patterns or any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+    return names
+
+
+# --- measurements (inside the worker process) ---
+
+def _reset_peak_rss() -> bool:
+    """Zera o pico de RSS do processo (Linux); False se não for possível."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as handle:
+            handle.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _rss_mb(field: str) -> Optional[float]:
+    try:
+        with open('/proc/self/status') as handle:
+            for line in handle:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb() -> float:
+    peak = _rss_mb('VmHWM')
+    if peak is not None:
+        return peak
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (2 ** 20 if sys.platform == 'darwin' else 1024)
+
+
+def measure_case(case: Case, data: dict, repeat: int, trace: bool) -> dict:
+    from src.frame_cache import invalidate
+
+    def prepared_args():
+        args = case.setup(data)
+        # Derived structures (indexes, accumulators) are rebuilt for every run
+        for value in args:
+            if isinstance(value, pd.DataFrame):
+                invalidate(value)
+        return args
+
+    times, peaks, deltas = [], [], []
+    for _ in range(repeat):
+        args = prepared_args()
+        # The peak is reset after setup, so it covers the timed call only
+        resettable = _reset_peak_rss()
+        rss_before = _rss_mb('VmRSS')
+        start = time.perf_counter()
+        case.run(*args)
+        times.append(time.perf_counter() - start)
+        peaks.append(_peak_rss_mb())
+        if resettable and rss_before is not None:
+            deltas.append(max(peaks[-1] - rss_before, 0.0))
+        del args
+        # Some analysis functions also draw (calculate_correlation)
+        if 'matplotlib.pyplot' in sys.modules:
+            sys.modules['matplotlib.pyplot'].close('all')
+
+    result = {
+        'seconds_min': min(times),
+        'seconds_median': statistics.median(times),
+        'repeat': repeat,
+        'peak_rss_mb': round(max(peaks), 1),
+        'rss_delta_mb': round(max(deltas), 1) if deltas else None,
+    }
+    if trace:
+        args = prepared_args()
+        tracemalloc.start()
+        case.run(*args)
+        result['alloc_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.stop()
+        if 'matplotlib.pyplot' in sys.modules:
+            sys.modules['matplotlib.pyplot'].close('all')
+    return result
+
+
+def run_worker(rows: int, names: List[str], repeat: int, trace: bool, seed: int) -> List[dict]:
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    warnings.filterwarnings('ignore')
+    from src.data_preprocessing import clean_spotify_data, load_data
+
+    cases = build_cases()
+    csv_path = cached_spotify_csv(rows, seed=seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw = load_data(str(csv_path))
+        clean = clean_spotify_data(raw)
+        data = {'csv': csv_path, 'raw': raw, 'clean': clean}
+
+    results = []
+    # Plots save PNGs into the working directory
+    with tempfile.TemporaryDirectory(prefix='spotify-bench-') as scratch:
+        os.chdir(scratch)
+        for name in names:
+            case = cases[name]
+            entry = {'case': name, 'group': case.group, 'rows': rows}
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    entry.update(measure_case(case, data, repeat, trace))
+            except Exception as e:
+                entry['error'] = f'{type(e).__name__}: {e}'
+            results.append(entry)
+            print(json.dumps(entry), flush=True)
+    return results
+
+
+# --- driver ---
+
+def _run_size(rows: int, names: List[str], args) -> List[dict]:
+    command = [sys.executable, str(Path(__file__).resolve()), '--worker', '--sizes', str(rows),
+               '--cases', ','.join(names), '--repeat', str(args.repeat), '--seed', str(args.seed)]
+    if args.no_tracemalloc:
+        command.append('--no-tracemalloc')
+    results = []
+    with subprocess.Popen(command, stdout=subprocess.PIPE, text=True) as process:
+        for line in process.stdout:
+            entry = json.loads(line)
+            results.append(entry)
+            _print_entry(entry)
+    if process.returncode:
+        print(f'  processo do tamanho {rows} terminou com código {process.returncode}', file=sys.stderr)
+    return results
+
+
+def _print_entry(entry: dict):
+    if 'error' in entry:
+        print(f"{entry['case']:<48}{entry['rows']:>10,}  ERRO {entry['error']}")
+        return
+    alloc = entry.get('alloc_peak_mb')
+    delta = entry.get('rss_delta_mb')
+    print(f"{entry['case']:<48}{entry['rows']:>10,}{entry['seconds_min']:>11.4f}"
+          f"{entry['peak_rss_mb']:>10.0f}{'-' if delta is None else f'{delta:.0f}':>9}"
+          f"{'-' if alloc is None else f'{alloc:.1f}':>11}")
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[dict]:
+    """Casos em que alguma métrica piorou mais que `threshold` (fração) em relação à base."""
+    reference = {(entry['case'], entry['rows']): entry for entry in baseline if 'error' not in entry}
+    regressions = []
+    for entry in results:
+        base = reference.get((entry['case'], entry['rows']))
+        if base is None or 'error' in entry:
+            continue
+        for metric, noise in COMPARED_METRICS.items():
+            old, new = base.get(metric), entry.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > noise:
+                regressions.append({'case': entry['case'], 'rows': entry['rows'], 'metric': metric,
+                                    'baseline': old, 'current': new,
+                                    'change': (new - old) / old if old else np.inf})
+    return regressions
+
+
+def _environment() -> dict:
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def _write_json(path: Path, payload: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(json.dumps(payload, indent=2))
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='Tamanhos, ex. 1k,100k,1M,10M')
+    parser.add_argument('--cases', help='Casos (padrões fnmatch separados por vírgula)')
+    parser.add_argument('--groups', help='Grupos: load, clean, analysis, plots')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-tracemalloc', action='store_true', help='Não mede alocações (mais rápido)')
+    parser.add_argument('--output', type=Path, default=RESULTS_DIR / 'latest.json')
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_FILE, type=Path,
+                        help='Grava os resultados como linha de base')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, type=Path,
+                        help='Compara com a linha de base e sai com código 1 se houver regressões')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Piora relativa considerada regressão (padrão: 0.2 = 20%%)')
+    parser.add_argument('--list', action='store_true', help='Lista os casos e sai')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    cases = build_cases()
+    names = select_cases(cases, args.cases, args.groups)
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    if args.worker:
+        run_worker(sizes[0], names, args.repeat, not args.no_tracemalloc, args.seed)
+        return 0
+    if args.list:
+        for name in names:
+            print(f'{cases[name].group:<10}{name}')
+        return 0
+
+    print(f"{'caso':<48}{'linhas':>10}{'seg (min)':>11}{'RSS MB':>10}{'+RSS MB':>9}{'aloc. MB':>11}")
+    results = []
+    for rows in sizes:
+        results.extend(_run_size(rows, names, args))
+
+    payload = {'environment': _environment(), 'results': results}
+    _write_json(args.output, payload)
+    if args.save_baseline:
+        _write_json(args.save_baseline, payload)
+        print(f'\nLinha de base gravada em {args.save_baseline}')
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regressões (limite {args.threshold:.0%}):')
+            for item in regressions:
+                print(f"  {item['case']} [{item['rows']:,}] {item['metric']}: "
+                      f"{item['baseline']:.4g} -> {item['current']:.4g} ({item['change']:+.0%})")
+            return 1
+        print(f'\nNenhuma regressão em relação a {args.compare}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Gerador de dados sintéticos no esquema de `Spotify Most Streamed Songs.csv`.
+
+Reproduz as particularidades do arquivo bruto: números com separador de
+milhar em `in_deezer_playlists`/`in_shazam_charts`, valores ausentes em
+`key` e `in_shazam_charts` e um ou outro valor malformado em `streams`.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent / '.data'
+
+KEYS = np.array(['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'], dtype=object)
+MODES = np.array(['Major', 'Minor'], dtype=object)
+
+
+def _with_thousands(values: np.ndarray) -> pd.Series:
+    """Formata inteiros (< 1 milhão) como texto com separador de milhar."""
+    values = pd.Series(values)
+    text = values.astype(str)
+    big = values >= 1000
+    text[big] = (values[big] // 1000).astype(str) + ',' + (values[big] % 1000).astype(str).str.zfill(3)
+    return text
+
+
+def make_spotify_frame(n_rows: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    """Gera um DataFrame bruto com `n_rows` linhas no esquema do Spotify.
+
+    Args:
+        n_rows: Número de linhas
+        seed: Semente do gerador aleatório
+        start: Número da primeira música (para gerar o arquivo em blocos)
+
+    Returns:
+        pd.DataFrame: Dados brutos, como lidos por `load_data`
+    """
+    rng = np.random.default_rng(seed)
+    n_artists = max(n_rows // 4, 1)
+    artist_ids = rng.integers(0, n_artists, n_rows)
+    artist_count = rng.choice([1, 1, 1, 2, 2, 3], n_rows)
+    artists = 'Artist ' + pd.Series(artist_ids).astype(str)
+    featured = 'Artist ' + pd.Series(rng.integers(0, n_artists, n_rows)).astype(str)
+    artists[artist_count > 1] = artists[artist_count > 1] + ', ' + featured[artist_count > 1]
+
+    streams = pd.Series(rng.lognormal(18, 1.5, n_rows).astype('int64')).astype(str)
+    streams[rng.random(n_rows) < 1e-5] = 'BPM110KeyAModeMajor'
+
+    shazam = _with_thousands(rng.integers(0, 5000, n_rows))
+    shazam[rng.random(n_rows) < 0.05] = np.nan
+    key = pd.Series(KEYS[rng.integers(0, len(KEYS), n_rows)])
+    key[rng.random(n_rows) < 0.1] = np.nan
+
+    frame = {
+        'track_name': ' Track ' + pd.Series(np.arange(start, start + n_rows)).astype(str) + ' ',
+        'artist(s)_name': artists,
+        'artist_count': artist_count,
+        'released_year': rng.integers(1990, 2024, n_rows),
+        'released_month': rng.integers(1, 13, n_rows),
+        'released_day': rng.integers(1, 29, n_rows),
+        'in_spotify_playlists': rng.integers(30, 55000, n_rows),
+        'in_spotify_charts': rng.integers(0, 150, n_rows),
+        'streams': streams,
+        'in_apple_playlists': rng.integers(0, 680, n_rows),
+        'in_apple_charts': rng.integers(0, 280, n_rows),
+        'in_deezer_playlists': _with_thousands(rng.integers(0, 13000, n_rows)),
+        'in_deezer_charts': rng.integers(0, 60, n_rows),
+        'in_shazam_charts': shazam,
+        'bpm': rng.integers(65, 207, n_rows),
+        'key': key,
+        'mode': MODES[rng.integers(0, 2, n_rows)],
+    }
+    for feature in ['danceability_%', 'valence_%', 'energy_%', 'acousticness_%',
+                    'instrumentalness_%', 'liveness_%', 'speechiness_%']:
+        frame[feature] = rng.integers(0, 98, n_rows)
+    frame['cover_url'] = 'Not Found'
+    return pd.DataFrame(frame)
+
+
+def write_spotify_csv(path, n_rows: int, seed: int = 0, block_rows: int = 1_000_000) -> None:
+    """Grava um CSV sintético no mesmo formato do arquivo bruto.
+
+    O arquivo é gerado em blocos de `block_rows` linhas, então a memória
+    não cresce com `n_rows` (10 milhões de linhas cabem em poucos GB).
+    """
+    with open(path, 'w', newline='') as handle:
+        for block, first in enumerate(range(0, max(n_rows, 1), block_rows)):
+            size = min(block_rows, n_rows - first)
+            frame = make_spotify_frame(size, seed=seed + block, start=first)
+            frame.to_csv(handle, index=False, header=block == 0)
+
+
+def cached_spotify_csv(n_rows: int, seed: int = 0, directory=None) -> Path:
+    """CSV sintético de `n_rows` linhas, gerado uma vez e reaproveitado.
+
+    Args:
+        n_rows: Número de linhas
+        seed: Semente do gerador aleatório
+        directory: Onde guardar os arquivos (padrão: `benchmarks/.data`)
+
+    Returns:
+        Path: Caminho do CSV
+    """
+    directory = Path(directory) if directory is not None else DATA_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'spotify_{n_rows}_{seed}.csv'
+    if not path.exists():
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        write_spotify_csv(tmp_path, n_rows, seed=seed)
+        tmp_path.replace(path)
+    return path
@@ -11,5 +11,18 @@ setup(
         'seaborn',
         'scikit-learn',
         'scipy',
+        'pyarrow',
     ],
+    extras_require={
+        'duckdb': ['duckdb'],
+        'polars': ['polars'],
+        'dashboard': ['plotly'],
+        'test': ['pytest', 'duckdb', 'polars'],
+    },
+    entry_points={
+        'console_scripts': [
+            'spotify-pipeline=src.pipeline:main',
+            'spotify-dashboard=src.dashboard:main',
+        ],
+    },
 )
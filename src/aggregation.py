@@ -0,0 +1,98 @@
+import warnings
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .instrumentation import instrumented
+
+GroupKey = Optional[Union[str, pd.Series]]
+
+# A metric is (column, statistic, group key); a group key of None means the whole frame.
+Metric = Tuple[str, str, GroupKey]
+
+GROUP_STATS = ('mean', 'median', 'std', 'count', 'sum', 'min', 'max')
+QUANTILE_STATS = {'25%': 0.25, '50%': 0.5, '75%': 0.75}
+GLOBAL_STATS = GROUP_STATS + tuple(QUANTILE_STATS)
+
+
+def _key_label(by: GroupKey) -> Hashable:
+    if by is None or isinstance(by, str):
+        return by
+    if isinstance(by, pd.Series):
+        return by.name
+    raise TypeError(f"Chave de agrupamento inválida: {by!r} (use o nome de uma coluna ou uma Series)")
+
+
+def _global_pass(df: pd.DataFrame, requests: Dict[str, List[str]]) -> pd.DataFrame:
+    """Calcula estatísticas globais de várias colunas em uma única passada NumPy."""
+    columns = list(requests)
+    stats = list(OrderedDict.fromkeys(stat for column in columns for stat in requests[column]))
+    values = df[columns].to_numpy(dtype='float64', na_value=np.nan)
+    present = ~np.isnan(values)
+
+    count = present.sum(axis=0)
+    total = np.where(present, values, 0.0).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        computed = {'count': count.astype('float64'), 'sum': total, 'mean': mean}
+        if 'std' in stats:
+            squares = np.where(present, values - mean, 0.0) ** 2
+            computed['std'] = np.sqrt(squares.sum(axis=0) / (count - 1))
+        if 'min' in stats or 'max' in stats:
+            computed['min'] = np.where(count > 0, np.where(present, values, np.inf).min(axis=0, initial=np.inf), np.nan)
+            computed['max'] = np.where(count > 0, np.where(present, values, -np.inf).max(axis=0, initial=-np.inf), np.nan)
+
+    quantiles = {stat: QUANTILE_STATS.get(stat, 0.5) for stat in stats if stat in QUANTILE_STATS or stat == 'median'}
+    if quantiles and len(values):
+        # All-NaN columns yield NaN, as in pandas; silence NumPy's warning about it
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            levels = np.nanquantile(values, list(quantiles.values()), axis=0)
+        for stat, level in zip(quantiles, levels):
+            computed[stat] = level
+    elif quantiles:
+        for stat in quantiles:
+            computed[stat] = np.full(len(columns), np.nan)
+
+    return pd.DataFrame({stat: computed[stat] for stat in stats}, index=columns).T
+
+
+@instrumented()
+def run_aggregations(df: pd.DataFrame, metrics: List[Metric]) -> Dict[Hashable, pd.DataFrame]:
+    """Executa um lote de métricas com uma única passada por chave de agrupamento.
+
+    Métricas sem chave são calculadas juntas em uma passada NumPy sobre as
+    colunas pedidas; métricas com a mesma chave viram um único `groupby().agg`.
+
+    Args:
+        df: DataFrame com os dados
+        metrics: Lista de (coluna, estatística, chave). Estatísticas aceitas:
+            mean, median, std, count, sum, min, max e, sem chave, 25%/50%/75%.
+            A chave é None, o nome de uma coluna ou uma Series alinhada a `df`.
+
+    Returns:
+        Dict[Hashable, pd.DataFrame]: Resultado por chave (o nome da coluna ou
+            da Series; None para as métricas globais). Sem chave, o DataFrame tem
+            as estatísticas nas linhas e as colunas nas colunas, como `describe()`;
+            com chave, uma linha por grupo e colunas (coluna, estatística).
+    """
+    plans = OrderedDict()
+    for column, stat, by in metrics:
+        allowed = GLOBAL_STATS if by is None else GROUP_STATS
+        if stat not in allowed:
+            raise ValueError(f"Estatística não suportada: {stat!r}")
+        label = _key_label(by)
+        _, requests = plans.setdefault(label, (by, OrderedDict()))
+        stats = requests.setdefault(column, [])
+        if stat not in stats:
+            stats.append(stat)
+
+    results = {}
+    for label, (by, requests) in plans.items():
+        if by is None:
+            results[label] = _global_pass(df, requests)
+        else:
+            results[label] = df.groupby(by)[list(requests)].agg(dict(requests))
+    return results
@@ -0,0 +1,170 @@
+"""Índice de artistas e ordens pré-computadas para consultas de top-N.
+
+O `ArtistIndex` separa as colaborações ("A, B") em artistas individuais,
+atribui um id inteiro a cada nome e guarda, por id, o número de músicas e
+o total de streams. As ordens decrescentes por contagem e por streams são
+calculadas uma vez, então um top-N é só um recorte de k posições. Linhas
+novas entram com `add_rows` sem reprocessar as antigas; a ordem é refeita
+sobre os artistas (não sobre as linhas) na consulta seguinte. O índice é
+gravado em `.npz` com `save`/`load` (`src.ingest` o mantém ao lado do
+armazenamento processado).
+
+Em colaborações, cada artista recebe a música e o total de streams dela.
+"""
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .frame_cache import cached, store
+
+ARTIST_COLUMN = 'artist(s)_name'
+
+
+def split_artists(artists: pd.Series) -> pd.Series:
+    """Um artista por linha, com o índice da linha de origem repetido."""
+    # Only credits with a comma go through the (slow, object-list) split
+    collab = artists.str.contains(',', regex=False, na=False).to_numpy()
+    parts = artists[collab].str.split(',').explode()
+    exploded = pd.concat([artists[~collab], parts]).sort_index(kind='stable').str.strip()
+    return exploded[exploded.notna() & (exploded != '')]
+
+
+class ArtistIndex:
+    """Contagem de músicas e total de streams por artista.
+
+    Args:
+        split_collaborations: Se True, "A, B" conta para A e para B; se False,
+            a string inteira é um artista (o comportamento de `value_counts`)
+    """
+
+    def __init__(self, split_collaborations: bool = True):
+        self.split_collaborations = split_collaborations
+        self.names = pd.Index([], dtype=object)
+        self.track_counts = np.zeros(0, dtype='int64')
+        self.stream_totals = np.zeros(0, dtype='float64')
+        self._orders: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, split_collaborations: bool = True) -> 'ArtistIndex':
+        return cls(split_collaborations).add_rows(df)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_rows(self, df: pd.DataFrame) -> 'ArtistIndex':
+        """Acrescenta linhas (ex.: as recém-ingeridas) ao índice."""
+        # Positional index, so exploded rows map back to their streams
+        artists = df[ARTIST_COLUMN].reset_index(drop=True)
+        if self.split_collaborations:
+            artists = split_artists(artists)
+        else:
+            artists = artists.dropna()
+        if artists.empty:
+            return self
+        streams = df['streams'].to_numpy(dtype='float64', na_value=np.nan)
+        row_streams = np.nan_to_num(streams[artists.index.to_numpy()])
+
+        # New names get ids in order of first appearance, like value_counts ties
+        codes, uniques = pd.factorize(artists)
+        uniques = np.asarray(uniques, dtype=object)
+        local_ids = self.names.get_indexer(uniques)
+        unseen = local_ids == -1
+        local_ids[unseen] = np.arange(len(self.names), len(self.names) + unseen.sum())
+        self.names = self.names.append(pd.Index(uniques[unseen], dtype=object))
+
+        size = len(self.names)
+        self.track_counts = np.pad(self.track_counts, (0, size - len(self.track_counts)))
+        self.stream_totals = np.pad(self.stream_totals, (0, size - len(self.stream_totals)))
+        artist_ids = local_ids[codes]
+        self.track_counts += np.bincount(artist_ids, minlength=size)
+        self.stream_totals += np.bincount(artist_ids, weights=row_streams, minlength=size)
+        self._orders.clear()
+        return self
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Grava o índice em `.npz` (comprimido, sem pickle)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp.npz')
+        np.savez_compressed(tmp_path, split_collaborations=np.array(self.split_collaborations),
+                            names=np.array(self.names, dtype=str), track_counts=self.track_counts,
+                            stream_totals=self.stream_totals)
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'ArtistIndex':
+        """Lê um índice gravado por `save`."""
+        with np.load(path, allow_pickle=False) as archive:
+            index = cls(bool(archive['split_collaborations']))
+            # Built like in `add_rows`, so the index has the same dtype
+            index.names = index.names.append(pd.Index(archive['names'].astype(object), dtype=object))
+            index.track_counts = archive['track_counts']
+            index.stream_totals = archive['stream_totals']
+        return index
+
+    def _order(self, by: str) -> np.ndarray:
+        order = self._orders.get(by)
+        if order is None:
+            if by == 'count':
+                values = self.track_counts
+            elif by == 'streams':
+                values = self.stream_totals
+            else:
+                raise ValueError(f"Critério desconhecido: {by!r} (use 'count' ou 'streams')")
+            order = self._orders[by] = np.argsort(-values, kind='stable')
+        return order
+
+    def top(self, n: int = 10, by: str = 'count') -> pd.Series:
+        """Os `n` artistas com mais músicas (`by='count'`) ou mais streams (`by='streams'`).
+
+        Returns:
+            pd.Series: Valores indexados pelo nome do artista, em ordem decrescente
+        """
+        ids = self._order(by)[:n]
+        values = self.track_counts if by == 'count' else self.stream_totals
+        index_name = 'artist' if self.split_collaborations else ARTIST_COLUMN
+        return pd.Series(values[ids], index=self.names[ids].rename(index_name),
+                         name='count' if by == 'count' else 'streams')
+
+    def lookup(self, name: str) -> Optional[dict]:
+        """Contagem e streams de um artista (None se ausente)."""
+        artist_id = self.names.get_indexer([name])[0]
+        if artist_id == -1:
+            return None
+        return {'id': int(artist_id), 'count': int(self.track_counts[artist_id]),
+                'streams': float(self.stream_totals[artist_id])}
+
+
+def get_artist_index(df: pd.DataFrame, split_collaborations: bool = True) -> ArtistIndex:
+    """Índice de artistas de `df`, construído uma vez e mantido em cache."""
+    return cached(df, ('artist_index', split_collaborations),
+                  lambda: ArtistIndex.from_frame(df, split_collaborations))
+
+
+def attach_artist_index(df: pd.DataFrame, index: ArtistIndex) -> None:
+    """Associa a `df` um índice já construído (ex.: lido com `load` e atualizado com `add_rows`)."""
+    store(df, ('artist_index', index.split_collaborations), index)
+
+
+def top_positions(df: pd.DataFrame, column: str, n: Optional[int] = None) -> np.ndarray:
+    """Posições das `n` linhas com maior `column` (todas, se `n` for None), sem NaN.
+
+    A ordem decrescente de `column` é calculada uma vez por DataFrame e
+    reaproveitada; cada consulta depois disso só recorta `n` posições.
+    """
+    def build() -> np.ndarray:
+        values = df[column].to_numpy(dtype='float64', na_value=np.nan)
+        # NaN rows are left out and ties keep row order, as in nlargest(keep='first')
+        present = np.flatnonzero(~np.isnan(values))
+        return present[np.argsort(-values[present], kind='stable')]
+
+    order = cached(df, ('top_order', column), build)
+    return order if n is None else order[:n]
+
+
+def top_rows(df: pd.DataFrame, column: str, n: int = 10) -> pd.DataFrame:
+    """As `n` linhas com maior `column`, como `df.nlargest(n, column)` (ver `top_positions`)."""
+    return df.iloc[top_positions(df, column, n)]
@@ -0,0 +1,333 @@
+"""Backends de execução para consultas de `data_analysis` sobre arquivos em disco.
+
+Com um caminho em vez de um DataFrame, as funções
+`analyze_streams_by_year`, `get_monthly_performance_stats`,
+`identify_viral_potential` e `calculate_collaboration_metrics` rodam em
+um dos backends abaixo:
+
+- 'pandas': lê só as colunas da consulta e usa o código de `data_analysis`;
+- 'duckdb': SQL sobre o arquivo (`read_parquet`/`read_csv`), multithread,
+  com projeção e filtros empurrados para a leitura;
+- 'polars': plano `LazyFrame` (`scan_parquet`/`scan_ipc`/`scan_csv`),
+  otimizado e executado em paralelo.
+
+O arquivo deve conter os dados já limpos (Parquet, Feather/Arrow IPC ou
+CSV), ex. o checkpoint `cleaned.feather` de `src.pipeline`. DuckDB e
+Polars são dependências opcionais, importadas só quando usadas.
+`check_parity` compara os resultados de cada backend com os do pandas.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+
+QUERIES = ('streams_by_year', 'monthly_performance', 'viral_potential', 'collaboration_metrics')
+
+VIRAL_COLUMNS = ['track_name', 'artist(s)_name', 'streams', 'energy_%', 'danceability_%', 'in_spotify_charts']
+
+# Columns each query reads, for the pandas backend's projection
+_QUERY_COLUMNS = {
+    'streams_by_year': ['released_date', 'streams'],
+    'monthly_performance': ['released_date', 'streams', 'in_spotify_charts'],
+    'viral_potential': VIRAL_COLUMNS,
+    'collaboration_metrics': ['artist(s)_name', 'released_year', 'streams'],
+}
+
+_MONTHLY_COLUMNS = ['avg_streams', 'median_streams', 'release_count', 'avg_chart_position']
+
+_FEATHER_SUFFIXES = ('.feather', '.arrow', '.ipc')
+
+SourcePath = Union[str, Path]
+
+
+def _source_format(source: SourcePath) -> str:
+    suffix = Path(source).suffix.lower()
+    if suffix == '.parquet':
+        return 'parquet'
+    if suffix in _FEATHER_SUFFIXES:
+        return 'feather'
+    if suffix == '.csv':
+        return 'csv'
+    raise ValueError(f"Formato não suportado: {suffix!r} (use .parquet, .feather ou .csv)")
+
+
+def _monthly_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    # Rounded here rather than in SQL so every backend rounds half to even like pandas
+    monthly = frame.set_index('mes')[_MONTHLY_COLUMNS].astype('float64').round(2)
+    monthly['release_count'] = monthly['release_count'].astype('int64')
+    return monthly
+
+
+class PandasBackend:
+    """Lê as colunas da consulta para a memória e usa `data_analysis`."""
+
+    name = 'pandas'
+
+    def read(self, source: SourcePath, columns: List[str]) -> pd.DataFrame:
+        from .data_cache import read_frame
+
+        if _source_format(source) == 'csv':
+            dates = ['released_date'] if 'released_date' in columns else None
+            return pd.read_csv(source, usecols=columns, parse_dates=dates)
+        return read_frame(source, columns=columns)
+
+    def run(self, query: str, source: SourcePath, **params):
+        from . import data_analysis
+
+        df = self.read(source, _QUERY_COLUMNS[query])
+        if query == 'streams_by_year':
+            return data_analysis.analyze_streams_by_year(df)
+        if query == 'monthly_performance':
+            return data_analysis.get_monthly_performance_stats(df)
+        if query == 'viral_potential':
+            return data_analysis.identify_viral_potential(df, **params)
+        return data_analysis.calculate_collaboration_metrics(df)
+
+
+class DuckDBBackend:
+    """Consultas SQL do DuckDB direto sobre o arquivo.
+
+    Args:
+        threads: Número de threads (padrão do DuckDB: todos os núcleos)
+        memory_limit: Limite de memória, ex. '4GB'; acima dele o DuckDB
+            usa o disco nas agregações
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, threads: Optional[int] = None, memory_limit: Optional[str] = None):
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("O backend 'duckdb' requer o pacote duckdb instalado")
+        self.connection = duckdb.connect()
+        if threads is not None:
+            self.connection.execute(f'SET threads = {int(threads)}')
+        if memory_limit is not None:
+            self.connection.execute('SET memory_limit = ?', [memory_limit])
+
+    def _relation(self, source: SourcePath, row_id: bool = False) -> str:
+        path = str(source).replace("'", "''")
+        fmt = _source_format(source)
+        if fmt == 'parquet':
+            if row_id:
+                return f"(SELECT *, file_row_number AS row_id FROM read_parquet('{path}', file_row_number = true))"
+            return f"read_parquet('{path}')"
+        if fmt == 'csv':
+            relation = f"read_csv('{path}', header = true)"
+        else:
+            # Arrow IPC goes through a pyarrow dataset, which DuckDB scans with pushdown
+            import pyarrow.dataset as ds
+
+            view = f'source_{abs(hash(path))}'
+            self.connection.register(view, ds.dataset(str(source), format='feather'))
+            relation = view
+        if row_id:
+            # Scans keep file order (preserve_insertion_order is on by default)
+            return f'(SELECT *, row_number() OVER () - 1 AS row_id FROM {relation})'
+        return relation
+
+    def run(self, query: str, source: SourcePath, **params):
+        if query == 'streams_by_year':
+            frame = self.connection.execute(f"""
+                SELECT year(released_date) AS released_date, avg(streams) AS streams
+                FROM {self._relation(source)}
+                WHERE released_date IS NOT NULL
+                GROUP BY 1 ORDER BY 1""").df()
+            return frame.set_index('released_date')['streams'].astype('float64')
+        if query == 'monthly_performance':
+            frame = self.connection.execute(f"""
+                SELECT mes, avg(streams) AS avg_streams, median(streams) AS median_streams,
+                       count(streams) AS release_count, avg(in_spotify_charts) AS avg_chart_position
+                FROM {self._relation(source)}
+                WHERE mes IS NOT NULL
+                GROUP BY mes ORDER BY mes""").df()
+            return _monthly_frame(frame)
+        if query == 'viral_potential':
+            columns = ', '.join(f'"{column}"' for column in VIRAL_COLUMNS)
+            frame = self.connection.execute(f"""
+                SELECT row_id, {columns}
+                FROM {self._relation(source, row_id=True)}
+                WHERE "energy_%" > ? AND "danceability_%" > ?
+                ORDER BY streams DESC NULLS LAST, row_id""",
+                [params.get('energy_threshold', 70), params.get('dance_threshold', 75)]).df()
+            return frame.set_index('row_id').rename_axis(None)
+        frame = self.connection.execute(f"""
+            SELECT released_year, avg(len(list_distinct(list_filter(
+                       list_transform(string_split(coalesce("artist(s)_name", ''), ','), x -> trim(x)),
+                       x -> x <> '')))) AS collab_count
+            FROM {self._relation(source)}
+            WHERE released_year IS NOT NULL
+            GROUP BY 1 ORDER BY 1""").df()
+        return frame.set_index('released_year')['collab_count'].astype('float64')
+
+
+class PolarsBackend:
+    """Planos `LazyFrame` do Polars sobre o arquivo.
+
+    Args:
+        streaming: Executa com o motor de streaming, em blocos, para dados
+            maiores que a memória
+    """
+
+    name = 'polars'
+
+    def __init__(self, streaming: bool = False):
+        try:
+            import polars
+        except ImportError:
+            raise ImportError("O backend 'polars' requer o pacote polars instalado")
+        self.pl = polars
+        self.streaming = streaming
+
+    def _scan(self, source: SourcePath):
+        fmt = _source_format(source)
+        if fmt == 'parquet':
+            return self.pl.scan_parquet(source)
+        if fmt == 'feather':
+            return self.pl.scan_ipc(source)
+        return self.pl.scan_csv(source, try_parse_dates=True)
+
+    def _collect(self, plan) -> pd.DataFrame:
+        if self.streaming:
+            return plan.collect(engine='streaming').to_pandas()
+        return plan.collect().to_pandas()
+
+    def run(self, query: str, source: SourcePath, **params):
+        pl = self.pl
+        plan = self._scan(source)
+        if query == 'streams_by_year':
+            year = pl.col('released_date').dt.year().alias('released_date')
+            frame = self._collect(plan.filter(pl.col('released_date').is_not_null())
+                                  .group_by(year).agg(pl.col('streams').mean())
+                                  .sort('released_date'))
+            return frame.set_index('released_date')['streams'].astype('float64')
+        if query == 'monthly_performance':
+            frame = self._collect(plan.filter(pl.col('mes').is_not_null())
+                                  .group_by('mes')
+                                  .agg(pl.col('streams').mean().alias('avg_streams'),
+                                       pl.col('streams').median().alias('median_streams'),
+                                       pl.col('streams').count().alias('release_count'),
+                                       pl.col('in_spotify_charts').mean().alias('avg_chart_position'))
+                                  .sort('mes'))
+            return _monthly_frame(frame)
+        if query == 'viral_potential':
+            energy = params.get('energy_threshold', 70)
+            dance = params.get('dance_threshold', 75)
+            frame = self._collect(plan.with_row_index('row_id')
+                                  .filter((pl.col('energy_%') > energy) & (pl.col('danceability_%') > dance))
+                                  .sort(['streams', 'row_id'], descending=[True, False], nulls_last=True)
+                                  .select(['row_id'] + VIRAL_COLUMNS))
+            return frame.set_index('row_id').rename_axis(None)
+        credits = (pl.col('artist(s)_name').fill_null('').str.split(',')
+                   .list.eval(pl.element().str.strip_chars())
+                   .list.eval(pl.element().filter(pl.element() != ''))
+                   .list.unique().list.len())
+        frame = self._collect(plan.filter(pl.col('released_year').is_not_null())
+                              .group_by('released_year')
+                              .agg(credits.mean().alias('collab_count'))
+                              .sort('released_year'))
+        return frame.set_index('released_year')['collab_count'].astype('float64')
+
+
+BACKENDS = {backend.name: backend for backend in (PandasBackend, DuckDBBackend, PolarsBackend)}
+
+
+def get_backend(name: str = 'pandas', **options):
+    """Instância do backend `name` ('pandas', 'duckdb' ou 'polars')."""
+    if name not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {name!r} (use {', '.join(map(repr, BACKENDS))})")
+    return BACKENDS[name](**options)
+
+
+def run_query(query: str, source: SourcePath, backend='pandas', **params):
+    """Executa uma consulta de `data_analysis` sobre o arquivo `source`.
+
+    Args:
+        query: Uma de `QUERIES`
+        source: Arquivo com os dados limpos (.parquet, .feather ou .csv)
+        backend: Nome do backend ou uma instância de `get_backend`
+        **params: Parâmetros da consulta (ex.: `energy_threshold`)
+
+    Returns:
+        O mesmo tipo de resultado da função de `data_analysis` correspondente
+    """
+    if query not in QUERIES:
+        raise ValueError(f"Consulta desconhecida: {query!r} (use {', '.join(QUERIES)})")
+    if not Path(source).exists():
+        raise FileNotFoundError(f"Arquivo não encontrado no caminho: {source}")
+    if isinstance(backend, str):
+        backend = get_backend(backend)
+    return backend.run(query, source, **params)
+
+
+def _compare(expected, actual, rtol: float):
+    if isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(actual, expected.astype('float64'), check_dtype=False,
+                                       check_index_type=False, check_names=False, rtol=rtol)
+    else:
+        expected = expected.copy()
+        actual = actual.copy()
+        for column in expected.columns:
+            if pd.api.types.is_numeric_dtype(expected[column]):
+                expected[column] = expected[column].astype('float64')
+                actual[column] = actual[column].astype('float64')
+            else:
+                expected[column] = expected[column].astype(object)
+                actual[column] = actual[column].astype(object)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_index_type=False,
+                                      check_names=False, rtol=rtol)
+
+
+def check_parity(source: SourcePath, backends: Sequence[str] = ('duckdb', 'polars'),
+                 rtol: float = 1e-9, params: Optional[Dict[str, dict]] = None) -> pd.DataFrame:
+    """Compara o resultado de cada consulta em cada backend com o do pandas.
+
+    Args:
+        source: Arquivo com os dados limpos
+        backends: Backends verificados
+        rtol: Tolerância relativa nos valores numéricos
+        params: Parâmetros por consulta, ex. {'viral_potential': {'energy_threshold': 60}}
+
+    Returns:
+        pd.DataFrame: Uma linha por (backend, consulta) com `status` ('ok',
+            'mismatch', 'error' ou 'unavailable' se o pacote não estiver
+            instalado) e `detail`
+    """
+    params = params or {}
+    reference = PandasBackend()
+    expected = {query: reference.run(query, source, **params.get(query, {})) for query in QUERIES}
+    rows = []
+    for name in backends:
+        try:
+            backend = get_backend(name)
+        except ImportError as e:
+            rows.extend({'backend': name, 'query': query, 'status': 'unavailable', 'detail': str(e)}
+                        for query in QUERIES)
+            continue
+        for query in QUERIES:
+            row = {'backend': name, 'query': query, 'status': 'ok', 'detail': ''}
+            try:
+                _compare(expected[query], backend.run(query, source, **params.get(query, {})), rtol)
+            except AssertionError as e:
+                row.update(status='mismatch', detail=str(e).strip().splitlines()[0])
+            except Exception as e:
+                row.update(status='error', detail=f'{type(e).__name__}: {e}')
+            rows.append(row)
+    return pd.DataFrame(rows, columns=['backend', 'query', 'status', 'detail'])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Verifica se os backends reproduzem os resultados do pandas.')
+    parser.add_argument('source', help='arquivo com os dados limpos (.parquet, .feather ou .csv)')
+    parser.add_argument('--backends', default='duckdb,polars', help='backends verificados (padrão: %(default)s)')
+    args = parser.parse_args(argv)
+    report = check_parity(args.source, [name.strip() for name in args.backends.split(',') if name.strip()])
+    print(report.to_string(index=False))
+    return 1 if report['status'].isin(['mismatch', 'error']).any() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Grafo bipartido artista–música e métricas de colaboração.
+
+As strings de `artist(s)_name` são separadas em artistas individuais e
+viram uma matriz esparsa CSR de incidência (músicas x artistas). Todas as
+métricas saem de operações esparsas sobre ela:
+
+- número de artistas por música: soma das linhas;
+- streams por artista: `Aᵀ · streams`;
+- coautoria: `Aᵀ · A` (artistas x artistas), cuja diagonal é o número de
+  músicas de cada artista e o restante, o número de músicas em comum.
+
+Uma colaboração conta inteira para cada artista creditado, então as
+participações nos streams (`streams_share`) somam mais de 1.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .artist_index import ARTIST_COLUMN, split_artists
+from .frame_cache import cached
+
+
+class CollaborationGraph:
+    """Incidência músicas x artistas com os streams de cada música.
+
+    Args:
+        incidence: Matriz CSR (n_músicas x n_artistas) com 1 onde o artista
+            participa da música
+        artists: Nome de cada coluna de `incidence`
+        streams: Streams de cada música (NaN vira 0)
+    """
+
+    def __init__(self, incidence: sparse.csr_matrix, artists: pd.Index, streams: np.ndarray):
+        self.incidence = incidence
+        self.artists = artists
+        self.streams = streams
+        self._coauthorship: Optional[sparse.csr_matrix] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'CollaborationGraph':
+        exploded = split_artists(df[ARTIST_COLUMN].reset_index(drop=True))
+        codes, artists = pd.factorize(exploded)
+        rows = exploded.index.to_numpy()
+        incidence = sparse.csr_matrix((np.ones(len(rows), dtype='float64'), (rows, codes)),
+                                      shape=(len(df), len(artists)))
+        # Duplicates were summed on construction; the same name twice in one credit counts once
+        incidence.data[:] = 1.0
+        streams = np.nan_to_num(df['streams'].to_numpy(dtype='float64', na_value=np.nan))
+        return cls(incidence, pd.Index(np.asarray(artists, dtype=object), name='artist'), streams)
+
+    @property
+    def artists_per_track(self) -> np.ndarray:
+        """Número de artistas distintos de cada música."""
+        return np.diff(self.incidence.indptr)
+
+    @property
+    def coauthorship(self) -> sparse.csr_matrix:
+        """Músicas em comum entre cada par de artistas (`Aᵀ · A`)."""
+        if self._coauthorship is None:
+            self._coauthorship = (self.incidence.T @ self.incidence).tocsr()
+        return self._coauthorship
+
+    def collaborator_degree(self) -> pd.Series:
+        """Número de colaboradores distintos de cada artista."""
+        coauthorship = self.coauthorship
+        has_self = coauthorship.diagonal() > 0
+        return pd.Series(np.diff(coauthorship.indptr) - has_self, index=self.artists, name='collaborators')
+
+    def artist_metrics(self) -> pd.DataFrame:
+        """Métricas por artista, ordenadas por streams.
+
+        Returns:
+            pd.DataFrame: Colunas `tracks`, `collaborators`, `streams`,
+                `streams_share` (fração do total de streams do conjunto),
+                `solo_streams` e `collab_streams`
+        """
+        incidence_t = self.incidence.T.tocsr()
+        solo = self.artists_per_track == 1
+        total = self.streams.sum()
+        solo_streams = incidence_t @ np.where(solo, self.streams, 0.0)
+        collab_streams = incidence_t @ np.where(solo, 0.0, self.streams)
+        streams = solo_streams + collab_streams
+        metrics = pd.DataFrame({
+            'tracks': np.diff(incidence_t.indptr),
+            'collaborators': self.collaborator_degree().to_numpy(),
+            'streams': streams,
+            'streams_share': streams / total if total > 0 else np.zeros(len(streams)),
+            'solo_streams': solo_streams,
+            'collab_streams': collab_streams,
+        }, index=self.artists)
+        return metrics.sort_values('streams', ascending=False, kind='stable')
+
+    def solo_vs_collab(self) -> pd.DataFrame:
+        """Músicas e streams de faixas solo e de colaborações."""
+        solo = self.artists_per_track == 1
+        credited = self.artists_per_track > 0
+        groups = {'solo': solo, 'collab': credited & ~solo}
+        return pd.DataFrame({
+            'tracks': [int(mask.sum()) for mask in groups.values()],
+            'streams': [self.streams[mask].sum() for mask in groups.values()],
+            'mean_streams': [self.streams[mask].mean() if mask.any() else np.nan for mask in groups.values()],
+        }, index=pd.Index(list(groups), name='type'))
+
+    def top_pairs(self, n: int = 10, by: str = 'tracks') -> pd.DataFrame:
+        """Pares de artistas que mais colaboram.
+
+        Args:
+            n: Número de pares
+            by: 'tracks' (músicas em comum) ou 'streams' (streams das músicas em comum)
+
+        Returns:
+            pd.DataFrame: Colunas `artist_a`, `artist_b`, `tracks` e `streams`
+        """
+        if by not in ('tracks', 'streams'):
+            raise ValueError(f"Critério desconhecido: {by!r} (use 'tracks' ou 'streams')")
+        pairs = sparse.triu(self.coauthorship, k=1).tocoo()
+        weighted = sparse.diags(self.streams) @ self.incidence
+        shared = (self.incidence.T @ weighted).tocsr()
+        shared_streams = np.asarray(shared[pairs.row, pairs.col]).ravel()
+        values = pairs.data if by == 'tracks' else shared_streams
+        if len(values) > n:
+            candidates = np.argpartition(-values, n - 1)[:n]
+        else:
+            candidates = np.arange(len(values))
+        top = candidates[np.lexsort((candidates, -values[candidates]))]
+        return pd.DataFrame({
+            'artist_a': self.artists[pairs.row[top]],
+            'artist_b': self.artists[pairs.col[top]],
+            'tracks': pairs.data[top].astype('int64'),
+            'streams': shared_streams[top],
+        })
+
+
+def get_collaboration_graph(df: pd.DataFrame) -> CollaborationGraph:
+    """Grafo de colaborações de `df`, construído uma vez e mantido em cache."""
+    return cached(df, 'collaboration_graph', lambda: CollaborationGraph.from_frame(df))
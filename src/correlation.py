@@ -0,0 +1,155 @@
+"""Matriz de correlação incremental, compartilhada pelos heatmaps.
+
+O `CorrelationAccumulator` guarda, para cada par de colunas, os co-momentos
+n, Σx, Σx² e Σxy sobre as linhas em que ambas estão presentes (a mesma
+exclusão par a par de `DataFrame.corr`). Os blocos são somados com
+produtos de matrizes e acumuladores de processos diferentes podem ser
+combinados com `merge`. Os valores são deslocados pela média do primeiro
+bloco antes de somar, o que evita perda de precisão em colunas grandes
+como `streams`.
+"""
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .frame_cache import cached
+from .sketches import KLLSketch
+
+
+class CorrelationAccumulator:
+    """Co-momentos par a par de um conjunto de colunas.
+
+    Args:
+        columns: Colunas acompanhadas
+        rank_sketches: Para o modo Spearman em streaming, um `KLLSketch` por
+            coluna; os valores são trocados pelo rank estimado antes de somar
+    """
+
+    def __init__(self, columns: Iterable[str], rank_sketches: Optional[Dict[str, KLLSketch]] = None):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.shift: Optional[np.ndarray] = None
+        self.n = np.zeros((size, size))
+        self.sx = np.zeros((size, size))
+        self.sxx = np.zeros((size, size))
+        self.sxy = np.zeros((size, size))
+        self.rank_sketches = rank_sketches
+
+    def update(self, chunk: pd.DataFrame) -> 'CorrelationAccumulator':
+        """Acrescenta um bloco de linhas."""
+        values = chunk[self.columns].to_numpy(dtype='float64', na_value=np.nan)
+        if self.rank_sketches is not None:
+            values = np.column_stack([self.rank_sketches[column].rank(values[:, position])
+                                      for position, column in enumerate(self.columns)])
+        present = ~np.isnan(values)
+        if self.shift is None:
+            counts = present.sum(axis=0)
+            self.shift = np.where(counts > 0, np.where(present, values, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+        mask = present.astype('float64')
+        centered = np.where(present, values - self.shift, 0.0)
+        self.n += mask.T @ mask
+        self.sx += centered.T @ mask
+        self.sxx += (centered ** 2).T @ mask
+        self.sxy += centered.T @ centered
+        return self
+
+    def merge(self, other: 'CorrelationAccumulator') -> 'CorrelationAccumulator':
+        """Incorpora o acumulador de outro bloco ou processo (mesmas colunas)."""
+        if other.columns != self.columns:
+            raise ValueError("Acumuladores com colunas diferentes não podem ser combinados")
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        # Re-express the other sums around this accumulator's shift
+        d = (other.shift - self.shift)[:, None]
+        self.sxy += other.sxy + d.T * other.sx + d * other.sx.T + d * d.T * other.n
+        self.sxx += other.sxx + 2 * d * other.sx + d ** 2 * other.n
+        self.sx += other.sx + d * other.n
+        self.n += other.n
+        return self
+
+    def corr(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Matriz de correlação de Pearson (de ranks, no modo Spearman).
+
+        Args:
+            columns: Subconjunto e ordem das colunas (padrão: todas)
+
+        Returns:
+            pd.DataFrame: Matriz no formato de `DataFrame.corr()`
+        """
+        columns = self.columns if columns is None else list(columns)
+        missing = [column for column in columns if column not in self.columns]
+        if missing:
+            raise KeyError(f"Colunas fora do acumulador: {missing}")
+        index = [self.columns.index(column) for column in columns]
+        grid = np.ix_(index, index)
+        n, sx, sxx, sxy = self.n[grid], self.sx[grid], self.sxx[grid], self.sxy[grid]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = n * sxy - sx * sx.T
+            spread = (n * sxx - sx ** 2) * (n * sxx.T - sx.T ** 2)
+            result = covariance / np.sqrt(spread)
+        result[(n < 2) | ~(spread > 0)] = np.nan
+        result = np.clip(result, -1.0, 1.0)
+        diagonal = np.diag(spread) > 0
+        result[np.diag_indices_from(result)] = np.where(diagonal, 1.0, np.nan)
+        return pd.DataFrame(result, index=columns, columns=columns)
+
+
+def build_rank_sketches(chunks: Iterable[pd.DataFrame], columns: List[str], k: int = 200) -> Dict[str, KLLSketch]:
+    """Primeira passada do modo Spearman em streaming: um sketch de ranks por coluna."""
+    sketches = {column: KLLSketch(k) for column in columns}
+    for chunk in chunks:
+        for column in columns:
+            sketches[column].update(chunk[column].to_numpy(dtype='float64', na_value=np.nan))
+    return sketches
+
+
+def _numeric_columns(df: pd.DataFrame) -> List[str]:
+    return list(df.select_dtypes(include=['number', 'bool']).columns)
+
+
+def get_accumulator(df: pd.DataFrame, method: str = 'pearson') -> CorrelationAccumulator:
+    """Acumulador de todas as colunas numéricas de `df`, construído uma vez e mantido em cache."""
+    if method not in ('pearson', 'spearman'):
+        raise ValueError(f"Método de correlação desconhecido: {method!r} (use 'pearson' ou 'spearman')")
+
+    def build() -> CorrelationAccumulator:
+        columns = _numeric_columns(df)
+        source = df[columns] if method == 'pearson' else df[columns].rank()
+        return CorrelationAccumulator(columns).update(source)
+
+    return cached(df, ('correlation', method), build)
+
+
+def correlation_matrix(df: pd.DataFrame, features: Optional[List[str]] = None,
+                       method: str = 'pearson') -> pd.DataFrame:
+    """Matriz de correlação de `features`, servida pelo acumulador em cache de `df`.
+
+    Qualquer subconjunto de colunas numéricas sai do mesmo acumulador, então
+    heatmaps diferentes sobre o mesmo DataFrame não recalculam nada.
+
+    No modo 'spearman' as colunas são ranqueadas inteiras (empates com rank
+    médio) antes da exclusão par a par de ausentes; com valores ausentes o
+    resultado pode diferir levemente de `DataFrame.corr(method='spearman')`,
+    que ranqueia cada par separadamente.
+
+    Args:
+        df: DataFrame com os dados
+        features: Colunas da matriz (padrão: todas as numéricas)
+        method: 'pearson' ou 'spearman'
+
+    Returns:
+        pd.DataFrame: Matriz de correlação
+    """
+    accumulator = get_accumulator(df, method)
+    if features is None:
+        return accumulator.corr()
+    features = list(features)
+    if all(feature in accumulator.columns for feature in features):
+        return accumulator.corr(features)
+    # Columns outside the cached set (e.g. non-numeric) get a one-off accumulator
+    source = df[features] if method == 'pearson' else df[features].rank()
+    return CorrelationAccumulator(features).update(source).corr()
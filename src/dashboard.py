@@ -0,0 +1,468 @@
+"""Painel interativo local com os gráficos de `visualization` em plotly.
+
+Os dados de cada gráfico saem das funções `prepare_*` de `visualization`,
+que já reduzem a tabela a poucas linhas (histogramas, rollup temporal,
+top-N, matriz de correlação, dispersão agregada em grade acima de
+`MAX_POINTS` pontos), então o tamanho das respostas não cresce com o
+número de músicas. Cada figura vira JSON do plotly, comprimido com gzip e
+gravado em `DASHBOARD_DIR/<hash dos dados>/`: enquanto o arquivo de dados
+não muda, o servidor só devolve bytes prontos (com ETag, para respostas
+304). Uma tarefa de fundo confere o hash do arquivo a cada
+`poll_interval` segundos e, se mudou, recalcula as figuras fora do laço
+de eventos e troca o conjunto servido de uma vez.
+
+O servidor usa só `asyncio` da biblioteca padrão (HTTP/1.1 com
+keep-alive, GET/HEAD) e o plotly.js distribuído com o pacote plotly, sem
+CDN nem serviços externos. Uso:
+
+    spotify-pipeline --stages dedup        # gera o arquivo de dados padrão
+    spotify-dashboard --port 8050          # abra http://127.0.0.1:8050/
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional, Sequence, Tuple, Union
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .data_cache import PROCESSED_DIR, file_fingerprint, read_frame
+from .pipeline import PIPELINE_DIR
+
+DEFAULT_DATA = PIPELINE_DIR / 'deduplicated.feather'
+DASHBOARD_DIR = PROCESSED_DIR / 'dashboard'
+MAX_POINTS = 5_000
+COMPRESS_LEVEL = 6
+MANIFEST_FILE = 'manifest.json'
+
+_MAX_HEADER_BYTES = 16_384
+_KEEP_ALIVE_SECONDS = 15
+_STATUS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+def _require_plotly():
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        raise ImportError("O painel requer o pacote plotly instalado (pip install plotly)")
+    return go
+
+
+def _centers(hist: pd.DataFrame) -> np.ndarray:
+    return np.sqrt(hist['bin_left'] * hist['bin_right']).to_numpy()
+
+
+def _histogram_figure(hist: pd.DataFrame, title: str, kde: bool = False):
+    go = _require_plotly()
+    figure = go.Figure(go.Bar(
+        x=_centers(hist), y=hist['count'], name='Músicas', marker_color='#1f77b4',
+        customdata=hist[['bin_left', 'bin_right']].to_numpy(),
+        hovertemplate='%{customdata[0]:,.0f} – %{customdata[1]:,.0f}<br>%{y} músicas<extra></extra>'))
+    if kde and 'kde' in hist:
+        figure.add_trace(go.Scatter(x=_centers(hist), y=hist['kde'], name='KDE', mode='lines',
+                                    line=dict(color='#e74c3c', width=3)))
+    figure.update_xaxes(type='log', title='Streams')
+    figure.update_yaxes(title='Número de músicas')
+    return figure.update_layout(title=title, bargap=0)
+
+
+def _heatmap_figure(matrix: pd.DataFrame, title: str):
+    go = _require_plotly()
+    figure = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(), x=list(matrix.columns), y=list(matrix.index), zmin=-1, zmax=1,
+        colorscale='RdBu', reversescale=True, texttemplate='%{z:.2f}'))
+    return figure.update_layout(title=title, yaxis=dict(autorange='reversed'))
+
+
+def _top_artists_figure(top: pd.DataFrame):
+    go = _require_plotly()
+    figure = go.Figure(go.Bar(x=top['count'], y=top['artist'], orientation='h', marker_color='#1f77b4'))
+    figure.update_yaxes(autorange='reversed')
+    return figure.update_layout(title=f'Top {len(top)} artistas por número de músicas', xaxis_title='Músicas')
+
+
+def _streams_by_year_figure(yearly: pd.DataFrame):
+    go = _require_plotly()
+    figure = go.Figure(go.Scatter(x=yearly['year'], y=yearly['sum'] / 1e9, fill='tozeroy', mode='lines+markers',
+                                  name='Streams totais (bilhões)', line=dict(color='#1f77b4', width=3)))
+    return figure.update_layout(title='Streams por ano de lançamento', yaxis_title='Bilhões de streams')
+
+
+def _scatter_figure(prepared: pd.DataFrame):
+    go = _require_plotly()
+    x, y = 'danceability_%', 'energy_%'
+    if prepared.attrs.get('density') == 'binned':
+        magnitude, colors, hover = prepared['size_sum'], prepared['hue_mean'], 'músicas: %{customdata}'
+        customdata = prepared['count']
+        name = 'Células (tamanho = streams, cor = posição média nos charts)'
+    else:
+        magnitude, colors, hover = prepared['streams'], prepared['in_spotify_charts'], 'streams: %{customdata:,.0f}'
+        customdata = prepared['streams']
+        name = 'Músicas (tamanho = streams, cor = posição nos charts)'
+    magnitude = magnitude.to_numpy(dtype='float64', na_value=np.nan)
+    span = np.nanmax(magnitude) - np.nanmin(magnitude) if len(magnitude) else 0
+    sizes = 6 + 24 * (magnitude - np.nanmin(magnitude)) / span if span > 0 else np.full(len(magnitude), 10.0)
+    figure = go.Figure(go.Scattergl(
+        x=prepared[x], y=prepared[y], mode='markers', name=name, customdata=customdata,
+        marker=dict(size=np.nan_to_num(sizes, nan=6), color=colors, colorscale='Viridis', showscale=True,
+                    opacity=0.7, line=dict(width=0.5, color='black')),
+        hovertemplate=f'{x}: %{{x:.1f}}<br>{y}: %{{y:.1f}}<br>{hover}<extra></extra>'))
+    return figure.update_layout(title='Dançabilidade vs energia', xaxis_title=x, yaxis_title=y)
+
+
+def _releases_by_month_figure(months: pd.DataFrame):
+    go = _require_plotly()
+    figure = go.Figure(go.Bar(x=months['month_name'].astype(str), y=months['count'],
+                              text=[f'{value:.1f}%' for value in months['percentage']],
+                              textposition='outside', marker_color='#8e44ad'))
+    return figure.update_layout(title='Distribuição mensal de lançamentos', yaxis_title='Lançamentos')
+
+
+def _streams_evolution_figure(yearly: pd.DataFrame):
+    go = _require_plotly()
+    figure = go.Figure()
+    figure.add_trace(go.Bar(x=yearly['year'], y=yearly['total_billions'], name='Streams totais (bilhões)',
+                            marker_color='#1f77b4'))
+    figure.add_trace(go.Scatter(x=yearly['year'], y=yearly['avg_millions'], name='Média por música (milhões)',
+                                mode='lines+markers', yaxis='y2', line=dict(color='#e74c3c', width=3)))
+    return figure.update_layout(title='Crescimento de streams: total vs média por música',
+                                yaxis=dict(title='Bilhões'), legend=dict(orientation='h'),
+                                yaxis2=dict(title='Milhões', overlaying='y', side='right'))
+
+
+class Chart(NamedTuple):
+    """Um gráfico do painel: `prepare(df)` reduz os dados, `figure(prepared)` monta a figura plotly."""
+    title: str
+    prepare: Callable[[pd.DataFrame], object]
+    figure: Callable[[object], object]
+
+
+def _charts() -> Dict[str, Chart]:
+    from . import visualization as vz
+
+    return {
+        'streams_distribution': Chart('Distribuição de streams', vz.prepare_streams_distribution,
+                                      lambda hist: _histogram_figure(hist, 'Distribuição de streams')),
+        'log_streams_distribution': Chart(
+            'Popularidade (escala log)', vz.prepare_log_streams_distribution,
+            lambda hist: _histogram_figure(hist, 'Distribuição de popularidade (escala log)', kde=True)),
+        'streams_by_year': Chart('Streams por ano', vz.prepare_streams_by_year, _streams_by_year_figure),
+        'streams_evolution': Chart('Evolução de streams', vz.prepare_streams_evolution, _streams_evolution_figure),
+        'releases_by_month': Chart('Lançamentos por mês', vz.prepare_releases_by_month, _releases_by_month_figure),
+        'top_artists': Chart('Top artistas', vz.prepare_top_artists, _top_artists_figure),
+        'danceability_vs_energy': Chart(
+            'Dançabilidade vs energia',
+            lambda df: vz.prepare_danceability_vs_energy(df, max_points=MAX_POINTS), _scatter_figure),
+        'feature_correlation_matrix': Chart(
+            'Correlação das features', vz.prepare_feature_correlation_matrix,
+            lambda matrix: _heatmap_figure(matrix, 'Correlação entre features de áudio e streams')),
+        'correlation_matrix': Chart('Correlação geral', vz.prepare_correlation_matrix,
+                                    lambda matrix: _heatmap_figure(matrix, 'Matriz de correlação')),
+    }
+
+
+def build_payloads(df: pd.DataFrame, names: Optional[Sequence[str]] = None) -> Dict[str, bytes]:
+    """JSON plotly de cada gráfico, comprimido com gzip.
+
+    Args:
+        df: Dados limpos
+        names: Gráficos a gerar (padrão: todos)
+
+    Returns:
+        Dict[str, bytes]: Corpo gzip de cada gráfico, pelo nome
+    """
+    import plotly.io as pio
+
+    charts = _charts()
+    names = list(charts) if names is None else list(names)
+    unknown = [name for name in names if name not in charts]
+    if unknown:
+        raise ValueError(f"Gráficos desconhecidos: {unknown} (opções: {', '.join(charts)})")
+    payloads = {}
+    for name in names:
+        chart = charts[name]
+        figure = chart.figure(chart.prepare(df))
+        payloads[name] = gzip.compress(pio.to_json(figure, validate=False).encode('utf-8'),
+                                       compresslevel=COMPRESS_LEVEL, mtime=0)
+    return payloads
+
+
+class PayloadSet(NamedTuple):
+    """Figuras prontas para um estado do arquivo de dados."""
+    fingerprint: str
+    charts: Dict[str, bytes]
+    titles: Dict[str, str]
+
+
+def load_or_build(data_path: Union[str, Path], cache_dir: Union[str, Path] = DASHBOARD_DIR,
+                  fingerprint: Optional[str] = None) -> PayloadSet:
+    """Figuras do arquivo de dados, lidas do cache em disco ou geradas e gravadas nele.
+
+    O cache fica em `cache_dir/<hash do arquivo>/`; ao gerar um conjunto
+    novo, os de versões anteriores dos dados são apagados.
+    """
+    data_path, cache_dir = Path(data_path), Path(cache_dir)
+    fingerprint = fingerprint or file_fingerprint(data_path)
+    titles = {name: chart.title for name, chart in _charts().items()}
+    target = cache_dir / fingerprint
+    manifest_path = target / MANIFEST_FILE
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        if set(manifest['charts']) == set(titles):
+            charts = {name: (target / f'{name}.json.gz').read_bytes() for name in manifest['charts']}
+            return PayloadSet(fingerprint, charts, titles)
+
+    charts = build_payloads(read_frame(data_path))
+    # Written to a temporary directory and renamed, so a crash never leaves half a set
+    tmp_dir = cache_dir / f'.{fingerprint}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name, body in charts.items():
+        (tmp_dir / f'{name}.json.gz').write_bytes(body)
+    (tmp_dir / MANIFEST_FILE).write_text(json.dumps(
+        {'data': str(data_path), 'fingerprint': fingerprint, 'charts': list(charts)}, indent=2))
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_dir, target)
+    for stale in cache_dir.iterdir():
+        if stale.is_dir() and stale.name != fingerprint:
+            shutil.rmtree(stale, ignore_errors=True)
+    return PayloadSet(fingerprint, charts, titles)
+
+
+_INDEX_HTML = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Spotify — painel</title>
+<script src="/static/plotly.min.js"></script>
+<style>
+  body { font-family: sans-serif; margin: 0 1.5rem; background: #f5f6fa; }
+  #charts { display: grid; grid-template-columns: repeat(auto-fill, minmax(560px, 1fr)); gap: 1rem; }
+  .chart { background: white; border-radius: 6px; height: 460px; }
+  #status { color: #666; }
+</style>
+</head>
+<body>
+<h1>Músicas mais tocadas no Spotify</h1>
+<p id="status">Carregando…</p>
+<div id="charts"></div>
+<script>
+let version = null;
+async function refresh() {
+  const index = await (await fetch('/api/charts')).json();
+  if (index.fingerprint === version) return;
+  version = index.fingerprint;
+  const container = document.getElementById('charts');
+  await Promise.all(index.charts.map(async (chart) => {
+    let div = document.getElementById(chart.name);
+    if (!div) {
+      div = document.createElement('div');
+      div.id = chart.name;
+      div.className = 'chart';
+      container.appendChild(div);
+    }
+    const figure = await (await fetch(chart.url)).json();
+    Plotly.react(div, figure.data, figure.layout, {responsive: true});
+  }));
+  document.getElementById('status').textContent = 'Dados: ' + version.slice(0, 12);
+}
+refresh();
+setInterval(refresh, 30000);
+</script>
+</body>
+</html>
+"""
+
+
+class DashboardServer:
+    """Servidor HTTP assíncrono do painel.
+
+    Args:
+        data_path: Arquivo com os dados limpos (`.feather` ou `.parquet`)
+        host: Endereço de escuta
+        port: Porta (0 escolhe uma livre; ver `port` depois de `start`)
+        poll_interval: Segundos entre as verificações de mudança nos dados
+        cache_dir: Diretório do cache de figuras
+    """
+
+    def __init__(self, data_path: Union[str, Path] = DEFAULT_DATA, host: str = '127.0.0.1', port: int = 8050,
+                 poll_interval: float = 5.0, cache_dir: Union[str, Path] = DASHBOARD_DIR):
+        self.data_path = Path(data_path)
+        self.host = host
+        self.port = port
+        self.poll_interval = poll_interval
+        self.cache_dir = Path(cache_dir)
+        self.payloads: Optional[PayloadSet] = None
+        self._static: Dict[str, Tuple[str, bytes]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._watcher: Optional[asyncio.Task] = None
+
+    def _load_static(self) -> None:
+        import plotly
+
+        script = Path(plotly.__file__).parent / 'package_data' / 'plotly.min.js'
+        self._static = {
+            '/': ('text/html; charset=utf-8', gzip.compress(_INDEX_HTML.encode('utf-8'), mtime=0)),
+            '/static/plotly.min.js': ('application/javascript',
+                                      gzip.compress(script.read_bytes(), compresslevel=COMPRESS_LEVEL, mtime=0)),
+        }
+
+    async def _refresh(self) -> bool:
+        """Recarrega as figuras se o arquivo de dados mudou; True se trocou o conjunto."""
+        loop = asyncio.get_running_loop()
+        # Hashing and rebuilding run in a worker thread, off the event loop
+        fingerprint = await loop.run_in_executor(None, file_fingerprint, self.data_path)
+        if self.payloads is not None and fingerprint == self.payloads.fingerprint:
+            return False
+        self.payloads = await loop.run_in_executor(None, load_or_build, self.data_path,
+                                                   self.cache_dir, fingerprint)
+        return True
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if await self._refresh():
+                    print(f"Dados alterados; figuras recalculadas ({self.payloads.fingerprint[:12]})")
+            except Exception as e:
+                # Keep serving the previous figures until the data is readable again
+                print(f"Falha ao atualizar as figuras: {type(e).__name__}: {e}", file=sys.stderr)
+
+    async def start(self) -> None:
+        _require_plotly()
+        self._load_static()
+        await self._refresh()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"Painel em http://{self.host}:{self.port}/ (dados: {self.data_path})")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def _route(self, path: str, headers: Dict[str, str]) -> Tuple[int, str, bytes, Dict[str, str]]:
+        """(status, content-type, corpo gzip, cabeçalhos extras) da rota `path`."""
+        if path in self._static:
+            content_type, body = self._static[path]
+            return 200, content_type, body, {'Cache-Control': 'public, max-age=3600'}
+        payloads = self.payloads
+        if payloads is None:
+            return 503, 'text/plain; charset=utf-8', gzip.compress(b'Figuras em preparo'), {}
+        if path == '/api/charts':
+            index = {'fingerprint': payloads.fingerprint,
+                     'charts': [{'name': name, 'title': payloads.titles.get(name, name),
+                                 'url': f'/api/charts/{name}'} for name in payloads.charts]}
+            return 200, 'application/json', gzip.compress(json.dumps(index).encode('utf-8')), \
+                {'Cache-Control': 'no-cache'}
+        if path.startswith('/api/charts/'):
+            name = path[len('/api/charts/'):]
+            if name in payloads.charts:
+                etag = f'"{payloads.fingerprint[:16]}-{name}"'
+                extra = {'ETag': etag, 'Cache-Control': 'no-cache'}
+                if headers.get('if-none-match') == etag:
+                    return 304, 'application/json', b'', extra
+                return 200, 'application/json', payloads.charts[name], extra
+        return 404, 'text/plain; charset=utf-8', gzip.compress(b'Nao encontrado'), {}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), _KEEP_ALIVE_SECONDS)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                if len(head) > _MAX_HEADER_BYTES:
+                    await self._respond(writer, 400, 'text/plain', b'', {}, False, True)
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    await self._respond(writer, 400, 'text/plain', b'', {}, False, True)
+                    break
+                method, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        headers[key.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                if method not in ('GET', 'HEAD'):
+                    await self._respond(writer, 405, 'text/plain', b'', {'Allow': 'GET, HEAD'}, False, False)
+                    break
+                status, content_type, body, extra = self._route(unquote(urlsplit(target).path), headers)
+                await self._respond(writer, status, content_type, body, extra,
+                                    'gzip' in headers.get('accept-encoding', ''), keep_alive,
+                                    head_only=method == 'HEAD')
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, content_type: str, body: bytes,
+                       extra: Dict[str, str], accepts_gzip: bool, keep_alive: bool,
+                       head_only: bool = False) -> None:
+        headers = {'Content-Type': content_type, 'Vary': 'Accept-Encoding', **extra}
+        if body and accepts_gzip:
+            headers['Content-Encoding'] = 'gzip'
+        elif body:
+            # Bodies are stored compressed; rare clients without gzip get them inflated
+            body = gzip.decompress(body)
+        headers['Content-Length'] = str(len(body))
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        lines = [f'HTTP/1.1 {status} {_STATUS.get(status, "")}'] + [f'{key}: {value}' for key, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if not head_only and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Painel interativo (plotly) com os gráficos do projeto.')
+    parser.add_argument('--data', default=str(DEFAULT_DATA),
+                        help='arquivo com os dados limpos (.feather/.parquet; padrão: checkpoint do pipeline)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--poll', type=float, default=5.0, help='segundos entre verificações de mudança nos dados')
+    parser.add_argument('--cache-dir', default=str(DASHBOARD_DIR), help='diretório do cache de figuras')
+    args = parser.parse_args(argv)
+
+    if not Path(args.data).exists():
+        print(f"Arquivo de dados não encontrado: {args.data} (rode `spotify-pipeline --stages dedup`)",
+              file=sys.stderr)
+        return 2
+    server = DashboardServer(args.data, args.host, args.port, args.poll, args.cache_dir)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,27 +1,95 @@
 import pandas as pd
-import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
-from typing import Dict, List, Tuple
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
 
-def get_top_artists(data: pd.DataFrame, n: int = 10) -> pd.Series:
-    return data['artist(s)_name'].value_counts().head(n)
+from .aggregation import run_aggregations
+from .artist_index import get_artist_index
+from .collaboration import get_collaboration_graph
+from .feature_index import get_feature_index
+from .instrumentation import instrumented
+from .correlation import correlation_matrix
+from .rollups import get_rollup, streams_median
+from .sketches import StreamingStats
 
+AUDIO_FEATURES = ['danceability', 'energy', 'valence', 'bpm']
+DESCRIBE_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+@instrumented()
+def get_top_artists(data: pd.DataFrame, n: int = 10, split_collaborations: bool = False) -> pd.Series:
+    return get_artist_index(data, split_collaborations).top(n)
+
+def _audio_features_metrics(data: pd.DataFrame) -> list:
+    return [(feature, stat, None) for feature in AUDIO_FEATURES if feature in data.columns
+            for stat in ('mean', 'median', 'std')]
+
+def _audio_features_view(results: dict) -> Dict[str, float]:
+    if None not in results:
+        return {}
+    table = results[None]
+    return {feature: {stat: table.at[stat, feature] for stat in ('mean', 'median', 'std')}
+            for feature in AUDIO_FEATURES if feature in table.columns}
+
+@instrumented()
 def calculate_audio_features_stats(data: pd.DataFrame) -> Dict[str, float]:
-    features = ['danceability', 'energy', 'valence', 'bpm']
-    stats = {}
-    for feature in features:
-        if feature in data.columns:
-            stats[feature] = {
-                'mean': data[feature].mean(),
-                'median': data[feature].median(),
-                'std': data[feature].std()
-            }
-    return stats
-
-def analyze_streams_by_year(data: pd.DataFrame) -> pd.Series:
-    return data.groupby(data['released_date'].dt.year)['streams'].mean()
+    return _audio_features_view(run_aggregations(data, _audio_features_metrics(data)))
+
+@instrumented()
+def streaming_audio_features_stats(chunks: Iterable[pd.DataFrame], k: int = 200) -> Dict[str, float]:
+    """
+    Versão em streaming de `calculate_audio_features_stats`.
+    
+    Média e desvio padrão são exatos; a mediana é aproximada por um sketch
+    KLL (erro de rank ~1,65% para k=200, ver `src.sketches`).
+    
+    Args:
+        chunks: Blocos de dados, ex. `iter_clean_chunks(caminho)`
+        k: Precisão do sketch de quantis
+    
+    Returns:
+        Dict no mesmo formato de `calculate_audio_features_stats`
+    """
+    stats = None
+    for chunk in chunks:
+        if stats is None:
+            stats = StreamingStats([feature for feature in AUDIO_FEATURES if feature in chunk.columns], k=k)
+        stats.update(chunk)
+    if stats is None or not stats.columns:
+        return {}
+    table = stats.describe()
+    return {feature: {'mean': table.at['mean', feature],
+                      'median': table.at['50%', feature],
+                      'std': table.at['std', feature]}
+            for feature in stats.columns}
 
+# Date columns and the rollup level that answers queries grouped by them; the
+# raw year/month columns also keep songs whose day is invalid (partial dates)
+_TEMPORAL_GRAINS = {'released_date': ('day', False), 'ano': ('year', False), 'released_year': ('year', True),
+                    'mes': ('month_of_year', False), 'released_month': ('month_of_year', True)}
+
+def _on_disk(data) -> bool:
+    return isinstance(data, (str, Path))
+
+@instrumented()
+def analyze_streams_by_year(data: Union[pd.DataFrame, str, Path], backend: str = 'pandas') -> pd.Series:
+    """Média de streams por ano de lançamento.
+
+    Lê o rollup temporal em cache (`src.rollups`), não as linhas. Com um
+    caminho de arquivo em `data`, a consulta roda em `backend` ('pandas',
+    'duckdb' ou 'polars') direto sobre o arquivo; ver `src.backends`.
+    """
+    if _on_disk(data):
+        from .backends import run_query
+        return run_query('streams_by_year', data, backend)
+    return _streams_by_year_view(get_rollup(data))
+
+def _streams_by_year_view(rollup) -> pd.Series:
+    streams = rollup.stats('streams', 'year')['mean'].rename('streams')
+    streams.index.name = 'released_date'
+    return streams
+
+@instrumented()
 def calculate_correlation(df, features):
     """
     Calcula e visualiza a matriz de correlação para as características especificadas.
@@ -30,59 +98,183 @@ def calculate_correlation(df, features):
         df: DataFrame com os dados
         features: Lista de características para análise de correlação
     """
-    correlation = df[features].corr()
+    correlation = correlation_matrix(df, features)
     plt.figure(figsize=(10, 8))
     sns.heatmap(correlation, annot=True, cmap='coolwarm', center=0)
     plt.title('Matriz de Correlação')
     plt.tight_layout()
     plt.show()
 
+def _basic_stats_columns(df, columns=None):
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    return list(columns)
+
+@instrumented()
 def get_basic_stats(df, columns=None):
     """Obtém estatísticas básicas para colunas especificadas."""
-    if columns is None:
-        columns = df.select_dtypes(include=['float64', 'int64']).columns
-    return df[columns].describe()
+    columns = _basic_stats_columns(df, columns)
+    if not all(pd.api.types.is_numeric_dtype(df[column]) for column in columns):
+        return df[columns].describe()
+    metrics = [(column, stat, None) for column in columns for stat in DESCRIBE_STATS]
+    return run_aggregations(df, metrics)[None].loc[DESCRIBE_STATS, columns]
 
+@instrumented()
+def streaming_basic_stats(chunks: Iterable[pd.DataFrame], columns: Optional[List[str]] = None,
+                          k: int = 200) -> pd.DataFrame:
+    """
+    Versão em streaming de `get_basic_stats`, para dados que não cabem na memória.
+    
+    Os acumuladores de cada bloco são combinados com `StreamingStats.merge`,
+    o que também permite distribuir os blocos entre processos.
+    
+    Args:
+        chunks: Blocos de dados, ex. `iter_clean_chunks(caminho)`
+        columns: Colunas analisadas (padrão: colunas numéricas do primeiro bloco)
+        k: Precisão dos sketches de quantis
+    
+    Returns:
+        DataFrame no formato de `describe()`; quartis aproximados
+    """
+    stats = None
+    for chunk in chunks:
+        if stats is None:
+            if columns is None:
+                columns = chunk.select_dtypes(include='number').columns
+            stats = StreamingStats(columns, k=k)
+        stats.update(chunk)
+    if stats is None:
+        raise ValueError("Nenhum bloco de dados recebido")
+    return stats.describe()
+
+@instrumented()
 def analyze_temporal_patterns(df, date_column, value_column):
-    """Analisa padrões ao longo do tempo."""
-    return df.groupby(date_column)[value_column].agg(['mean', 'count', 'sum'])
+    """Analisa padrões ao longo do tempo.
 
-def calculate_collaboration_metrics(df):
-    """Calcula métricas sobre colaborações de artistas."""
-    df['collab_count'] = df['artist(s)_name'].str.count(',') + 1
-    return df.groupby('released_year')['collab_count'].mean()
+    Agrupamentos por data, ano ou mês de lançamento de streams e contadores
+    de playlists/charts saem do rollup temporal (`src.rollups`); outras
+    combinações agregam as linhas.
+    """
+    grain, partial = _TEMPORAL_GRAINS.get(date_column, (None, False))
+    rollup = get_rollup(df) if grain is not None else None
+    if rollup is not None and value_column in rollup.columns:
+        table = rollup.stats(value_column, grain, partial)[['mean', 'count', 'sum']]
+        table.index.name = date_column
+        return table
+    metrics = [(value_column, stat, date_column) for stat in ('mean', 'count', 'sum')]
+    return run_aggregations(df, metrics)[date_column][value_column]
+
+def _collab_count(df: pd.DataFrame) -> pd.Series:
+    """Número de artistas distintos creditados em cada música."""
+    return pd.Series(get_collaboration_graph(df).artists_per_track, index=df.index, name='collab_count')
+
+@instrumented()
+def calculate_collaboration_metrics(df, backend: str = 'pandas'):
+    """Calcula métricas sobre colaborações de artistas (média de artistas por música, por ano).
+    
+    O DataFrame recebido não é alterado. Métricas por artista, pares de
+    colaboradores e streams de faixas solo vs. colaborações estão em
+    `src.collaboration.get_collaboration_graph(df)`. Com um caminho de
+    arquivo, a consulta roda em `backend` (ver `src.backends`).
+    """
+    if _on_disk(df):
+        from .backends import run_query
+        return run_query('collaboration_metrics', df, backend)
+    frame = df.assign(collab_count=_collab_count(df))
+    return run_aggregations(frame, [('collab_count', 'mean', 'released_year')])['released_year'][('collab_count', 'mean')].rename('collab_count')
 
-def identify_viral_potential(df: pd.DataFrame, 
+@instrumented()
+def identify_viral_potential(df: Union[pd.DataFrame, str, Path],
                            energy_threshold: float = 70,
-                           dance_threshold: float = 75) -> pd.DataFrame:
+                           dance_threshold: float = 75,
+                           backend: str = 'pandas') -> pd.DataFrame:
     """
     Identifica músicas com alto potencial viral baseado nos critérios descobertos.
     
+    Usa o índice de features em cache (`src.feature_index`), então variar os
+    limites repetidamente não percorre nem reordena o DataFrame inteiro.
+    
     Args:
         df: DataFrame com dados do Spotify
         energy_threshold: Limite mínimo de energia (%)
         dance_threshold: Limite mínimo de dançabilidade (%)
+        backend: Backend usado quando `df` é um caminho de arquivo
+            ('pandas', 'duckdb' ou 'polars', ver `src.backends`)
     
     Returns:
         DataFrame com músicas de alto potencial viral
     """
-    viral_songs = df[
-        (df['energy_%'] > energy_threshold) & 
-        (df['danceability_%'] > dance_threshold)
-    ].sort_values('streams', ascending=False)
-    
-    return viral_songs[['track_name', 'artist(s)_name', 'streams', 
-                       'energy_%', 'danceability_%', 'in_spotify_charts']]
+    if _on_disk(df):
+        from .backends import run_query
+        return run_query('viral_potential', df, backend,
+                         energy_threshold=energy_threshold, dance_threshold=dance_threshold)
+    rows = get_feature_index(df).select(lower={'energy_%': energy_threshold,
+                                               'danceability_%': dance_threshold})
+    viral_columns = ['track_name', 'artist(s)_name', 'streams', 
+                     'energy_%', 'danceability_%', 'in_spotify_charts']
+    # Picking the columns first keeps the row gather to what is returned
+    return df[viral_columns].iloc[rows]
+
+def _monthly_performance_view(df: pd.DataFrame, rollup, approximate: bool = False) -> pd.DataFrame:
+    streams = rollup.stats('streams', 'month_of_year')
+    monthly_stats = pd.DataFrame({
+        'avg_streams': streams['mean'],
+        'median_streams': streams_median(df, 'month_of_year', approximate=approximate),
+        'release_count': streams['count'],
+        'avg_chart_position': rollup.stats('in_spotify_charts', 'month_of_year')['mean'],
+    })
+    # An approximate median is not rounded as if its cents were known
+    rounded = monthly_stats.columns.drop('median_streams') if approximate else monthly_stats.columns
+    monthly_stats[rounded] = monthly_stats[rounded].round(2)
+    monthly_stats.index.name = 'mes'
+    return monthly_stats
 
-def get_monthly_performance_stats(df: pd.DataFrame) -> pd.DataFrame:
+@instrumented()
+def get_monthly_performance_stats(df: Union[pd.DataFrame, str, Path], backend: str = 'pandas',
+                                  approximate: bool = False) -> pd.DataFrame:
     """
     Calcula estatísticas de performance por mês de lançamento.
+    
+    Médias e contagens saem do rollup temporal em cache (`src.rollups`); a
+    mediana é exata, calculada sobre as linhas e mantida em cache. Com
+    `approximate=True` ela sai do histograma do rollup (erro relativo
+    abaixo de 1%) e não é arredondada. Com um caminho de arquivo em `df`,
+    a consulta roda em `backend` ('pandas', 'duckdb' ou 'polars') direto
+    sobre o arquivo, sempre com a mediana exata; ver `src.backends`.
+    """
+    if _on_disk(df):
+        from .backends import run_query
+        return run_query('monthly_performance', df, backend)
+    return _monthly_performance_view(df, get_rollup(df), approximate)
+
+@instrumented()
+def summarize_dataset(df: pd.DataFrame) -> Dict[str, object]:
     """
-    monthly_stats = df.groupby('mes').agg({
-        'streams': ['mean', 'median', 'count'],
-        'in_spotify_charts': 'mean'
-    }).round(2)
+    Calcula de uma vez as estatísticas de todas as funções de análise.
     
-    monthly_stats.columns = ['avg_streams', 'median_streams', 
-                           'release_count', 'avg_chart_position']
-    return monthly_stats
\ No newline at end of file
+    As métricas não temporais vão em um único lote para `run_aggregations`,
+    então cada chave de agrupamento é percorrida uma só vez e as estatísticas
+    globais saem de uma única passada NumPy; as por ano e por mês saem do
+    rollup temporal (`src.rollups`), com a mediana mensal exata.
+    
+    Args:
+        df: DataFrame com dados do Spotify (limpo)
+    
+    Returns:
+        Dict com 'audio_features_stats', 'basic_stats', 'streams_by_year',
+        'monthly_performance' e 'collaboration'
+    """
+    rollup = get_rollup(df)
+    frame = df.assign(collab_count=_collab_count(df))
+    columns = _basic_stats_columns(df)
+    metrics = (_audio_features_metrics(df)
+               + [(column, stat, None) for column in columns for stat in DESCRIBE_STATS]
+               + [('collab_count', 'mean', 'released_year')])
+    results = run_aggregations(frame, metrics)
+    return {
+        'audio_features_stats': _audio_features_view(results),
+        'basic_stats': results[None].loc[DESCRIBE_STATS, columns] if columns else pd.DataFrame(),
+        'streams_by_year': _streams_by_year_view(rollup),
+        'monthly_performance': _monthly_performance_view(df, rollup),
+        'collaboration': results['released_year'][('collab_count', 'mean')].rename('collab_count'),
+    }
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+from . import data_preprocessing
+from .data_preprocessing import load_data, clean_spotify_data, normalize_audio_features
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RAW_FILE = PROJECT_ROOT / 'data' / 'raw' / 'Spotify Most Streamed Songs.csv'
+PROCESSED_DIR = PROJECT_ROOT / 'data' / 'processed'
+
+# Remembers the fingerprint of each raw file by (size, mtime) so unchanged
+# multi-GB dumps are not re-hashed on every run.
+_FINGERPRINT_INDEX = '.fingerprints.json'
+
+_FORMATS = {'feather': '.feather', 'parquet': '.parquet'}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("O cache de dados processados requer o pacote pyarrow instalado")
+
+
+def _hash_file(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: Union[str, Path], cache_dir: Union[str, Path] = PROCESSED_DIR) -> str:
+    """Calcula o hash do conteúdo de um arquivo.
+
+    O resultado é memorizado por (tamanho, data de modificação) em
+    `cache_dir`, então o arquivo só é lido de novo quando muda.
+
+    Args:
+        path: Caminho do arquivo
+        cache_dir: Diretório onde o índice de hashes é mantido
+
+    Returns:
+        str: Hash hexadecimal do conteúdo
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Arquivo não encontrado no caminho: {path}")
+    index_path = Path(cache_dir) / _FINGERPRINT_INDEX
+    try:
+        index = json.loads(index_path.read_text())
+    except (FileNotFoundError, ValueError):
+        index = {}
+
+    entry = index.get(str(path.resolve()))
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['hash']
+
+    fingerprint = _hash_file(path)
+    index[str(path.resolve())] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': fingerprint}
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    tmp_path.write_text(json.dumps(index, indent=2))
+    os.replace(tmp_path, index_path)
+    return fingerprint
+
+
+def cleaning_code_version() -> str:
+    """Hash do código de limpeza (`data_preprocessing.py`).
+
+    Qualquer mudança no módulo invalida os caches gerados com a versão anterior.
+    """
+    return _hash_file(Path(data_preprocessing.__file__))
+
+
+def cache_key(raw_path: Union[str, Path], normalize: bool = True,
+              cache_dir: Union[str, Path] = PROCESSED_DIR) -> str:
+    """Chave do cache: hash do arquivo bruto + versão do código de limpeza."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(file_fingerprint(raw_path, cache_dir).encode())
+    digest.update(cleaning_code_version().encode())
+    digest.update(b'normalized' if normalize else b'cleaned')
+    return digest.hexdigest()
+
+
+def save_frame(df: pd.DataFrame, path: Union[str, Path]) -> Path:
+    """Grava um DataFrame em formato colunar tipado, de forma atômica.
+
+    O formato vem da extensão: `.feather` (Arrow IPC sem compressão, que
+    pode ser lido via memory-map) ou `.parquet`.
+
+    Args:
+        df: DataFrame a ser gravado
+        path: Caminho de destino
+
+    Returns:
+        Path: Caminho gravado
+    """
+    _require_pyarrow()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    if path.suffix == '.parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_frame(path: Union[str, Path], columns: Optional[list] = None) -> pd.DataFrame:
+    """Lê um arquivo gravado por `save_frame`.
+
+    Arquivos Feather são lidos via memory-map, sem passar pelo parser de CSV.
+
+    Args:
+        path: Caminho do arquivo
+        columns: Colunas a carregar (padrão: todas)
+
+    Returns:
+        pd.DataFrame: DataFrame com os tipos originais
+    """
+    _require_pyarrow()
+    path = Path(path)
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path, columns=columns)
+    from pyarrow import feather
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def _cache_prefix(raw_path: Union[str, Path], normalize: bool) -> str:
+    return f"{Path(raw_path).stem}.{'normalized' if normalize else 'cleaned'}"
+
+
+def cache_path(raw_path: Union[str, Path], normalize: bool = True,
+               cache_dir: Union[str, Path] = PROCESSED_DIR, fmt: str = 'feather') -> Path:
+    """Caminho do arquivo de cache correspondente ao arquivo bruto e ao código atual."""
+    if fmt not in _FORMATS:
+        raise ValueError(f"Formato de cache desconhecido: {fmt!r} (use 'feather' ou 'parquet')")
+    key = cache_key(raw_path, normalize, cache_dir)
+    return Path(cache_dir) / f"{_cache_prefix(raw_path, normalize)}.{key}{_FORMATS[fmt]}"
+
+
+def load_processed(raw_path: Union[str, Path] = RAW_FILE, normalize: bool = True,
+                   cache_dir: Union[str, Path] = PROCESSED_DIR, fmt: str = 'feather',
+                   refresh: bool = False) -> pd.DataFrame:
+    """Carrega os dados processados, usando o cache colunar quando válido.
+
+    Na primeira chamada (ou quando o arquivo bruto ou o código de limpeza
+    mudam) o CSV é lido e passa por `clean_spotify_data` e, opcionalmente,
+    `normalize_audio_features`; o resultado é gravado em `cache_dir` e os
+    caches antigos do mesmo arquivo são removidos.
+
+    Args:
+        raw_path: Caminho do CSV bruto
+        normalize: Aplica `normalize_audio_features` após a limpeza
+        cache_dir: Diretório do cache
+        fmt: 'feather' (leitura via memory-map) ou 'parquet'
+        refresh: Ignora o cache existente e reprocessa
+
+    Returns:
+        pd.DataFrame: Dados limpos com os tipos preservados
+    """
+    path = cache_path(raw_path, normalize, cache_dir, fmt)
+    if path.exists() and not refresh:
+        return read_frame(path)
+
+    df = clean_spotify_data(load_data(str(raw_path)))
+    if normalize:
+        df = normalize_audio_features(df)
+
+    for stale in Path(cache_dir).glob(f"{_cache_prefix(raw_path, normalize)}.*{_FORMATS[fmt]}"):
+        if stale != path:
+            stale.unlink()
+    save_frame(df, path)
+    return df
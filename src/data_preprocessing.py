@@ -1,21 +1,199 @@
+import tracemalloc
+import warnings
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import Dict, Iterator, Optional
 
-def load_data(file_path: str) -> pd.DataFrame:
+from .artist_index import get_artist_index
+from .instrumentation import instrumented, stage
+
+# Declared schema for chart dumps with the layout of `Spotify Most Streamed Songs.csv`.
+# `streams`, `in_deezer_playlists` and `in_shazam_charts` carry thousands separators
+# (and a few malformed values), so they stay as text until `clean_spotify_data`.
+KEY_CATEGORIES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B', 'Unknown']
+MODE_CATEGORIES = ['Major', 'Minor']
+
+SPOTIFY_SCHEMA = {
+    'track_name': str,
+    'artist(s)_name': str,
+    'artist_count': 'uint8',
+    'released_year': 'int16',
+    'released_month': 'uint8',
+    'released_day': 'uint8',
+    'in_spotify_playlists': 'int32',
+    'in_spotify_charts': 'int32',
+    'streams': str,
+    'in_apple_playlists': 'int32',
+    'in_apple_charts': 'int32',
+    'in_deezer_playlists': str,
+    'in_deezer_charts': 'int32',
+    'in_shazam_charts': str,
+    'bpm': 'uint16',
+    'key': pd.CategoricalDtype(KEY_CATEGORIES),
+    'mode': pd.CategoricalDtype(MODE_CATEGORIES),
+    'danceability_%': 'uint8',
+    'valence_%': 'uint8',
+    'energy_%': 'uint8',
+    'acousticness_%': 'uint8',
+    'instrumentalness_%': 'uint8',
+    'liveness_%': 'uint8',
+    'speechiness_%': 'uint8',
+    'cover_url': str,
+}
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# The pyarrow streaming reader splits the file by bytes, not rows.
+_PYARROW_BYTES_PER_ROW = 256
+
+def load_data(file_path: str, engine: str = 'c', dtype: Optional[dict] = None) -> pd.DataFrame:
     """Carrega dados de um arquivo CSV.
     
     Args:
         file_path (str): Caminho do arquivo CSV
+        engine (str): Motor de leitura do pandas ('c' ou 'pyarrow')
+        dtype (dict, optional): Esquema de tipos por coluna, ex. `SPOTIFY_SCHEMA`.
+            Por padrão o pandas infere os tipos.
         
     Returns:
         pd.DataFrame: DataFrame com os dados carregados
     """
     try:
-        return pd.read_csv(file_path)
+        with stage('data_preprocessing.load_data', path=str(file_path), engine=engine) as record:
+            df = pd.read_csv(file_path, engine=engine, dtype=dtype)
+            record.output(df)
+        return df
     except FileNotFoundError:
         raise FileNotFoundError(f"Arquivo não encontrado no caminho: {file_path}")
 
+def _iter_raw_chunks(file_path: str, chunksize: int, engine: str,
+                     dtype: dict) -> Iterator[pd.DataFrame]:
+    """Lê o CSV em blocos já com o esquema declarado aplicado."""
+    if engine == 'c':
+        try:
+            reader = pd.read_csv(file_path, engine='c', dtype=dtype, chunksize=chunksize)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Arquivo não encontrado no caminho: {file_path}")
+        with reader:
+            yield from reader
+    elif engine == 'pyarrow':
+        try:
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            raise ImportError("O motor 'pyarrow' requer o pacote pyarrow instalado")
+
+        # Numeric columns are typed by the parser itself; categoricals are
+        # applied per chunk so every chunk shares the same categories.
+        column_types = {}
+        categorical = {}
+        for column, column_dtype in dtype.items():
+            if isinstance(column_dtype, pd.CategoricalDtype):
+                column_types[column] = pa.string()
+                categorical[column] = column_dtype
+            elif column_dtype is str:
+                column_types[column] = pa.string()
+            else:
+                column_types[column] = pa.from_numpy_dtype(np.dtype(column_dtype))
+
+        try:
+            reader = pa_csv.open_csv(
+                file_path,
+                read_options=pa_csv.ReadOptions(block_size=chunksize * _PYARROW_BYTES_PER_ROW),
+                # Empty cells are missing values, as in the 'c' engine.
+                convert_options=pa_csv.ConvertOptions(column_types=column_types,
+                                                      strings_can_be_null=True),
+            )
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Arquivo não encontrado no caminho: {file_path}")
+        for batch in reader:
+            chunk = batch.to_pandas()
+            for column, column_dtype in categorical.items():
+                chunk[column] = chunk[column].astype(column_dtype)
+            yield chunk
+    else:
+        raise ValueError(f"Motor de leitura desconhecido: {engine!r} (use 'c' ou 'pyarrow')")
+
+def iter_clean_chunks(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                      engine: str = 'c',
+                      dtype: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+    """Lê e limpa o CSV em blocos, sem carregar o arquivo inteiro na memória.
+    
+    Cada bloco passa por `clean_spotify_data` e sai ordenado por streams
+    dentro do próprio bloco; a ordenação global fica a cargo de quem consome.
+    
+    Args:
+        file_path (str): Caminho do arquivo CSV
+        chunksize (int): Linhas por bloco (aproximado no motor 'pyarrow',
+            que divide o arquivo por bytes)
+        engine (str): Motor de leitura ('c' ou 'pyarrow')
+        dtype (dict, optional): Esquema de tipos; padrão `SPOTIFY_SCHEMA`
+        
+    Yields:
+        pd.DataFrame: Blocos limpos
+    """
+    if dtype is None:
+        dtype = SPOTIFY_SCHEMA
+    for chunk in _iter_raw_chunks(file_path, chunksize, engine, dtype):
+        if len(chunk):
+            yield clean_spotify_data(chunk)
+
+@instrumented()
+def load_data_streaming(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                        engine: str = 'c',
+                        dtype: Optional[dict] = None) -> pd.DataFrame:
+    """Carrega e limpa o CSV bloco a bloco, concatenando apenas os blocos limpos.
+    
+    O pico de memória fica limitado ao resultado tipado mais um bloco bruto,
+    em vez do arquivo inteiro com tipos inferidos pelo pandas.
+    
+    Args:
+        file_path (str): Caminho do arquivo CSV
+        chunksize (int): Linhas por bloco
+        engine (str): Motor de leitura ('c' ou 'pyarrow')
+        dtype (dict, optional): Esquema de tipos; padrão `SPOTIFY_SCHEMA`
+        
+    Returns:
+        pd.DataFrame: DataFrame limpo, ordenado por streams (decrescente)
+    """
+    chunks = list(iter_clean_chunks(file_path, chunksize=chunksize, engine=engine, dtype=dtype))
+    if not chunks:
+        raise ValueError(f"Nenhuma linha válida encontrada em: {file_path}")
+    df = pd.concat(chunks, ignore_index=True)
+    del chunks
+    return df.sort_values('streams', ascending=False, kind='stable', ignore_index=True)
+
+def compare_load_memory(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                        engine: str = 'c') -> Dict[str, float]:
+    """Compara o pico de memória da leitura atual com a leitura em blocos.
+    
+    Os picos são medidos com `tracemalloc`, que enxerga as alocações do
+    NumPy/pandas mas não o pool de memória interno do pyarrow.
+    
+    Args:
+        file_path (str): Caminho do arquivo CSV
+        chunksize (int): Linhas por bloco no modo streaming
+        engine (str): Motor de leitura do modo streaming
+        
+    Returns:
+        Dict[str, float]: Picos em bytes de cada caminho e a razão entre eles
+    """
+    def _peak(func) -> int:
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    baseline_peak = _peak(lambda: clean_spotify_data(load_data(file_path)))
+    streaming_peak = _peak(lambda: load_data_streaming(file_path, chunksize=chunksize, engine=engine))
+    return {
+        'baseline_peak_bytes': baseline_peak,
+        'streaming_peak_bytes': streaming_peak,
+        'ratio': streaming_peak / baseline_peak if baseline_peak else float('nan'),
+    }
+
 def check_missing_values(df: pd.DataFrame) -> pd.Series:
     """Verifica valores ausentes no DataFrame.
     
@@ -31,9 +209,9 @@ def get_basic_statistics(df: pd.DataFrame) -> pd.DataFrame:
     """Get basic statistics of the DataFrame."""
     return df.describe()
 
-def get_top_artists(df: pd.DataFrame, top_n: int = 10) -> pd.Series:
-    """Get the top N artists by count."""
-    return df['artist(s)_name'].value_counts().head(top_n)
+def get_top_artists(df: pd.DataFrame, top_n: int = 10, split_collaborations: bool = False) -> pd.Series:
+    """Get the top N artists by count (each collaborator separately if `split_collaborations`)."""
+    return get_artist_index(df, split_collaborations).top(top_n)
 
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     """Remove missing values and reset index."""
@@ -47,92 +225,343 @@ def transform_data(df: pd.DataFrame) -> pd.DataFrame:
         df['date_column'] = pd.to_datetime(df['date_column'])
     return df
 
-def clean_spotify_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Clean and prepare Spotify dataset."""
+# Counter columns that arrive with thousands separators (e.g. "3,421").
+_THOUSANDS_COLUMNS = ['in_deezer_playlists', 'in_shazam_charts']
+
+# Rows per block when parsing text counters, bounding the byte matrix size.
+_PARSE_BLOCK_ROWS = 1 << 20
+
+def _parse_digit_block(values: np.ndarray):
+    """Parse a block of digit/comma strings as a uint8 byte matrix.
+
+    Returns the parsed int64 values and a mask of the rows that held only
+    digits and separators.
+    """
+    try:
+        raw = np.asarray(values, dtype='S')
+    except UnicodeEncodeError:
+        # Non-ASCII characters become '?', so those rows fail the check below
+        # and go through the `to_numeric` fallback
+        raw = np.char.encode(values.astype(str), 'ascii', errors='replace')
+    codes = raw.view(np.uint8).reshape(len(raw), raw.dtype.itemsize)
+    digits = codes - np.uint8(48)
+    is_digit = digits <= 9
+    ok = (is_digit | (codes == 44) | (codes == 0)).all(axis=1) & is_digit.any(axis=1)
+    ok &= is_digit.sum(axis=1) <= 18
+
+    parsed = np.zeros(len(raw), dtype='int64')
+    for position in range(codes.shape[1]):
+        column = is_digit[:, position]
+        parsed = np.where(column, parsed * 10 + digits[:, position], parsed)
+    return parsed, ok
+
+def _parse_thousands(series: pd.Series) -> pd.Series:
+    """Convert a counter column that may carry thousands separators to numbers.
+
+    Numeric columns pass through untouched. Text is parsed as a byte matrix
+    with NumPy (digits accumulated column by column, commas skipped), so no
+    per-value Python string operation runs; only the rare malformed values
+    fall back to `pd.to_numeric(errors='coerce')`.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    values = series.to_numpy(dtype=object, na_value='')
+    parsed = np.empty(len(values), dtype='int64')
+    ok = np.empty(len(values), dtype=bool)
+    for start in range(0, len(values), _PARSE_BLOCK_ROWS):
+        block = slice(start, start + _PARSE_BLOCK_ROWS)
+        parsed[block], ok[block] = _parse_digit_block(values[block])
+    if ok.all():
+        return pd.Series(parsed, index=series.index, name=series.name)
+
+    result = parsed.astype('float64')
+    result[~ok] = np.nan
+    retry = ~ok & series.notna().to_numpy()
+    if retry.any():
+        text = series[retry].astype(str).str.strip().str.replace(',', '', regex=False)
+        result[retry] = pd.to_numeric(text, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    return pd.Series(result, index=series.index, name=series.name)
+
+def _dates_from_parts(year, month, day) -> np.ndarray:
+    """Build datetime64 values from integer year/month/day arrays arithmetically.
+
+    Invalid combinations (month 13, February 30, missing parts) become NaT,
+    matching `pd.to_datetime(..., errors='coerce')`.
+    """
+    y = np.asarray(year, dtype='float64')
+    m = np.asarray(month, dtype='float64')
+    d = np.asarray(day, dtype='float64')
+    valid = np.isfinite(y) & np.isfinite(m) & np.isfinite(d)
+    y = np.where(valid, y, 1970).astype('int64')
+    m = np.where(valid, m, 1).astype('int64')
+    d = np.where(valid, d, 1).astype('int64')
+
+    month_start = ((y - 1970) * 12 + (m - 1)).astype('datetime64[M]')
+    days_in_month = ((month_start + 1).astype('datetime64[D]')
+                     - month_start.astype('datetime64[D]')).astype('int64')
+    valid &= (m >= 1) & (m <= 12) & (d >= 1) & (d <= days_in_month)
+
+    dates = (month_start.astype('datetime64[D]') + (d - 1)).astype('datetime64[ns]')
+    dates[~valid] = np.datetime64('NaT')
+    return dates
+
+@instrumented()
+def clean_spotify_data(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Clean and prepare Spotify dataset.
+
+    Runs as one ordered pass: `streams` is parsed once, the rows to keep and
+    their final order (descending streams) are resolved together, and the
+    frame is materialized with a single `take`. Every later step assigns
+    whole columns on that new frame, so there are no intermediate copies or
+    chained assignments on slices.
+
+    Args:
+        df (pd.DataFrame): Raw Spotify data
+        inplace (bool): Clean the given frame itself instead of a new one
+
+    Returns:
+        pd.DataFrame: Cleaned frame sorted by streams (the same object when
+            `inplace=True`)
+    """
     try:
+        # Parse streams once; it drives both the row order and the column itself
+        with stage('clean.parse_streams', df['streams']) as record:
+            streams = _parse_thousands(df['streams'])
+            record.output(streams)
+
         # Handle missing values in critical columns
-        df = df.dropna(subset=['artist(s)_name', 'track_name'])
-        
-        # Convert streams to numeric and handle missing values
-        df['streams'] = pd.to_numeric(df['streams'].str.replace(',', ''), errors='coerce')
-        
+        keep = (df['artist(s)_name'].notna() & df['track_name'].notna()).to_numpy()
+
+        with stage('clean.filter_sort', df) as record:
+            if inplace:
+                df['streams'] = streams
+                if not keep.all():
+                    # Drop by position: duplicate index labels would take valid rows along
+                    df.reset_index(drop=True, inplace=True)
+                    df.drop(index=np.flatnonzero(~keep), inplace=True)
+                df.sort_values('streams', ascending=False, kind='stable',
+                               inplace=True, ignore_index=True)
+            else:
+                order = np.flatnonzero(keep)
+                sort_keys = streams.to_numpy(dtype='float64', na_value=np.nan)[order]
+                # Negated keys give a descending order with NaN kept last
+                order = order[np.argsort(-sort_keys, kind='stable')]
+                cleaned = df.take(order)
+                cleaned.reset_index(drop=True, inplace=True)
+                cleaned['streams'] = streams.array.take(order)
+                df = cleaned
+            record.output(df)
+
         # Clean text columns
         text_columns = ['track_name', 'artist(s)_name']
         if 'album_type' in df.columns:
             text_columns.append('album_type')
-        df[text_columns] = df[text_columns].apply(lambda x: x.str.strip())
-        
-        # Handle missing values and commas in 'in_shazam_charts'
-        if 'in_shazam_charts' in df.columns:
-            df['in_shazam_charts'] = (
-                pd.to_numeric(df['in_shazam_charts'].str.replace(',', ''), errors='coerce')
-                .fillna(0)
-                .astype(int)
-            )
-        
+        # Column subsets are built only when instrumentation is on (they copy on pandas < 3)
+        with stage('clean.strip_text', lambda: df[text_columns]) as record:
+            for column in text_columns:
+                df[column] = df[column].str.strip()
+            record.output(lambda: df[text_columns])
+
+        # Handle missing values and thousands separators in the counters
+        counters = [column for column in _THOUSANDS_COLUMNS if column in df.columns]
+        with stage('clean.counters', lambda: df[counters]) as record:
+            for column in counters:
+                df[column] = _parse_thousands(df[column]).fillna(0).astype(int)
+            record.output(lambda: df[counters])
+
+        if isinstance(df['key'].dtype, pd.CategoricalDtype) and 'Unknown' not in df['key'].cat.categories:
+            df['key'] = df['key'].cat.add_categories('Unknown')
         df['key'] = df['key'].fillna('Unknown')
-        
-        # Process release date
-        df = _process_release_date(df)
-        
-        # Sort and add time features
-        df = df.sort_values('streams', ascending=False).reset_index(drop=True)
-        df['ano'] = df['released_date'].dt.year
-        df['mes'] = df['released_date'].dt.month
-        
+
+        # Process release date and add time features
+        with stage('clean.release_date', df) as record:
+            _process_release_date(df)
+            record.output(df)
+
         return df
-        
+
     except Exception as e:
         print(f"Error during data cleaning: {str(e)}")
         raise
 
 def _process_release_date(df: pd.DataFrame) -> pd.DataFrame:
-    """Helper function to process release date information."""
+    """Helper function to process release date information.
+
+    Adds `released_date` plus the `ano`/`mes` time features. When the date is
+    built from `released_year`/`released_month`/`released_day`, the time
+    features come straight from those integer columns.
+    """
+    date_parts = ['released_year', 'released_month', 'released_day']
     if 'released_date' not in df.columns:
-        if all(col in df.columns for col in ['released_year', 'released_month', 'released_day']):
-            df['released_date'] = pd.to_datetime(
-                {
-                    'year': df['released_year'],
-                    'month': df['released_month'],
-                    'day': df['released_day']
-                },
-                errors='coerce'
-            )
+        if all(col in df.columns for col in date_parts):
+            dates = _dates_from_parts(*(df[col].to_numpy(dtype='float64', na_value=np.nan)
+                                        for col in date_parts))
+            df['released_date'] = dates
+            valid = ~np.isnat(dates)
+            if valid.all():
+                df['ano'] = df['released_year'].to_numpy().astype('int32')
+                df['mes'] = df['released_month'].to_numpy().astype('int32')
+            else:
+                df['ano'] = df['released_year'].where(valid)
+                df['mes'] = df['released_month'].where(valid)
         else:
             raise KeyError("Required date columns not found")
     else:
         df['released_date'] = pd.to_datetime(df['released_date'], errors='coerce')
+        df['ano'] = df['released_date'].dt.year
+        df['mes'] = df['released_date'].dt.month
     
     if df['released_date'].isna().any():
         print("Warning: NaT values detected in 'released_date'")
     
     return df
 
+# Fixed bounds used by `normalize_audio_features`, so shards and chunks
+# normalized separately stay on the same scale. Spotify tempos lie in 0-250.
+FEATURE_BOUNDS = {'bpm': (0.0, 250.0)}
+
+
+@instrumented()
 def normalize_audio_features(df: pd.DataFrame, features: Optional[list] = None) -> pd.DataFrame:
-    """Normalize audio features to range [0,1]."""
+    """Normalize audio features, nominally to the range [0,1].
+
+    Percentage features (`*_%`) are divided by 100 and features listed in
+    `FEATURE_BOUNDS` (`bpm`) are scaled with those fixed bounds; any other
+    feature is min-max scaled with the bounds of `df`. Values are not
+    clipped, so a tempo above 250 bpm maps above 1 (and a percentage
+    outside 0-100 outside [0,1]). All selected columns are
+    scaled in one vectorized operation. For a reusable float32 matrix with
+    fitted, persisted parameters, see `src.features.FeatureMatrixBuilder`.
+    """
     if features is None:
         features = ['danceability_%', 'energy_%', 'valence_%', 'bpm']
-    
-    for feature in features:
-        if feature in df.columns and df[feature].dtype in ['int64', 'float64']:
-            df[feature] = df[feature] / 100
-    
+    features = [feature for feature in features if feature in df.columns
+                and pd.api.types.is_numeric_dtype(df[feature]) and not pd.api.types.is_bool_dtype(df[feature])]
+    if not features:
+        return df
+
+    values = np.column_stack([df[feature].to_numpy(dtype='float64', na_value=np.nan) for feature in features])
+    bounds = [(0.0, 100.0) if feature.endswith('_%') else FEATURE_BOUNDS.get(feature, (np.nan, np.nan))
+              for feature in features]
+    low, high = np.array(bounds).T
+    unbounded = np.isnan(low)
+    if unbounded.any():
+        with warnings.catch_warnings():
+            # All-NaN columns give NaN bounds and stay NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low[unbounded] = np.nanmin(values[:, unbounded], axis=0)
+            high[unbounded] = np.nanmax(values[:, unbounded], axis=0)
+    spread = high - low
+    spread[spread == 0] = 1.0
+    df[features] = (values - low) / spread
     return df
 
+
+# Text columns with at most this share of distinct values become categoricals.
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def _smallest_int_dtype(low, high, nullable: bool) -> str:
+    """Smallest (unsigned when possible) integer dtype holding [low, high]."""
+    candidates = ('uint8', 'uint16', 'uint32', 'uint64') if low >= 0 else ('int8', 'int16', 'int32', 'int64')
+    for name in candidates:
+        info = np.iinfo(name)
+        if info.min <= low and high <= info.max:
+            break
+    return name.capitalize().replace('Uint', 'UInt') if nullable else name
+
+
+def _compact_column(series: pd.Series, float32: bool, category_ratio: float):
+    """Target dtype for one column, or None to keep it as is."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype) \
+            or pd.api.types.is_datetime64_any_dtype(dtype):
+        return None
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        missing = np.isnan(values)
+        if missing.all():
+            return None
+        nullable = bool(missing.any()) or isinstance(dtype, pd.api.extensions.ExtensionDtype)
+        if pd.api.types.is_integer_dtype(dtype):
+            return _smallest_int_dtype(series.min(), series.max(), nullable)
+        present = values[~missing]
+        # Whole-number floats (e.g. streams parsed next to NaN) are counts; beyond 2**53 they are not exact
+        if np.array_equal(present, np.trunc(present)) and np.abs(present).max() <= 2 ** 53:
+            return _smallest_int_dtype(present.min(), present.max(), nullable)
+        if float32 and dtype != 'float32' and dtype != 'Float32':
+            return 'Float32' if isinstance(dtype, pd.api.extensions.ExtensionDtype) else 'float32'
+        return None
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        if len(series) and series.nunique(dropna=True) <= category_ratio * len(series):
+            return 'category'
+        return None if isinstance(dtype, pd.StringDtype) else pd.StringDtype('pyarrow')
+    return None
+
+
+@instrumented()
+def optimize_dtypes(df: pd.DataFrame, float32: bool = True,
+                    category_ratio: float = CATEGORY_MAX_UNIQUE_RATIO) -> pd.DataFrame:
+    """Downcast every column to its smallest dtype without changing its values.
+
+    - integer columns, and float columns holding only whole numbers (such as
+      `streams`, which `to_numeric` parses as float64 because of NaN), become
+      the smallest unsigned/signed integer type; nullable (`UInt32`, ...)
+      when the column has missing values
+    - other float columns (e.g. normalized features) become float32 unless
+      `float32=False`; this is the only lossy conversion
+    - text columns become categoricals when at most `category_ratio` of the
+      values are distinct (`key`, `mode`, `artist(s)_name`), and Arrow
+      strings otherwise (`track_name`, `cover_url`)
+
+    Dates, booleans and categoricals are kept. Use `dtype_memory_report` to
+    compare the result with the input.
+
+    Args:
+        df: Cleaned (optionally normalized) data
+        float32: Store non-integral floats as float32
+        category_ratio: Maximum distinct/total ratio for categorical text
+
+    Returns:
+        pd.DataFrame: A new frame with compact dtypes
+    """
+    targets = {}
+    for column in df.columns:
+        target = _compact_column(df[column], float32, category_ratio)
+        if target is not None and target != df[column].dtype:
+            targets[column] = target
+    if not targets:
+        return df.copy()
+    return df.astype(targets)
+
+
+def dtype_memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Per-column dtypes and `memory_usage(deep=True)` before and after `optimize_dtypes`.
+
+    Returns:
+        pd.DataFrame: Columns `dtype_before`, `dtype_after`, `bytes_before`,
+            `bytes_after` and `ratio` (after / before), plus a 'total' row
+    """
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.reindex(before.columns).astype(str),
+        'bytes_before': before.memory_usage(index=False, deep=True),
+        'bytes_after': after.memory_usage(index=False, deep=True).reindex(before.columns),
+    })
+    report.loc['total'] = ['', '', report['bytes_before'].sum(), report['bytes_after'].sum()]
+    report['ratio'] = (report['bytes_after'] / report['bytes_before']).round(3)
+    return report
+
+
 # Example usage
 if __name__ == "__main__":
-    # Load the data
-    file_path = 'spotify_songs.csv'  # Replace with your actual file path
-    df = load_data(file_path)
-    
-    # Clean the data
-    df = clean_spotify_data(df)
-    
-    # Normalize audio features
-    df = normalize_audio_features(df)
+    from .data_cache import RAW_FILE, load_processed
+
+    # Load, clean and normalize the data (served from the processed cache when valid)
+    df = load_processed(RAW_FILE)
     
     # Verify the data
     print("\nMissing values after preprocessing:")
     print(df.isnull().sum())
     print("\nFirst few rows of the dataset:")
-    print(df.head())
\ No newline at end of file
+    print(df.head())
@@ -1,6 +1,12 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from .artist_index import top_rows
+from .correlation import correlation_matrix
+from .instrumentation import instrumented
+from .scatter_density import DENSITY_THRESHOLD, density_scatter
+
+@instrumented()
 def plot_streaming_distribution(df):
     """Plot the distribution of streams."""
     plt.figure(figsize=(12, 6))
@@ -12,7 +18,8 @@ def plot_streaming_distribution(df):
     plt.tight_layout()
     plt.show()
 
-def plot_feature_relationships(df):
+@instrumented()
+def plot_feature_relationships(df, density='auto', max_points=DENSITY_THRESHOLD):
     """Plot relationships between audio features."""
     # Create a correlation plot between audio features
     plt.figure(figsize=(12, 6))
@@ -22,8 +29,7 @@ def plot_feature_relationships(df):
                      'acousticness_%', 'instrumentalness_%', 
                      'liveness_%', 'speechiness_%']
     
-    correlation_matrix = df[audio_features].corr()
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0)
+    sns.heatmap(correlation_matrix(df, audio_features), annot=True, cmap='coolwarm', center=0)
     plt.title('Correlação entre Features de Áudio')
     plt.xticks(rotation=45)
     plt.yticks(rotation=45)
@@ -32,17 +38,20 @@ def plot_feature_relationships(df):
     
     # Scatter plot with the correct column names
     plt.figure(figsize=(12, 6))
-    sns.scatterplot(
-        data=df,
-        x='danceability_%',
-        y='energy_%',
+    density_scatter(
+        df,
+        'danceability_%',
+        'energy_%',
         size='streams',
         sizes=(20, 200),
+        density=density,
+        max_points=max_points,
         alpha=0.6
     )
     plt.title('Danceability vs Energy')
     plt.show()
 
+@instrumented()
 def plot_yearly_streams(df):
     """Plot distribution of streams by year."""
     plt.figure(figsize=(12, 6))
@@ -55,33 +64,38 @@ def plot_yearly_streams(df):
     plt.tight_layout()
     plt.show()
 
-def plot_danceability_vs_energy(df):
+@instrumented()
+def plot_danceability_vs_energy(df, density='auto', max_points=DENSITY_THRESHOLD):
     plt.figure(figsize=(12, 6))
-    sns.scatterplot(data=df, x='danceability_%', y='energy_%', hue='in_spotify_charts', size='streams', palette='viridis', sizes=(20, 200), alpha=0.7)
+    mode = density_scatter(df, 'danceability_%', 'energy_%', hue='in_spotify_charts', size='streams', density=density, max_points=max_points, palette='viridis', sizes=(20, 200), alpha=0.7)
     plt.title('Danceability vs Energy', fontsize=16, pad=20)
     plt.xlabel('Danceability (%)', fontsize=14)
     plt.ylabel('Energy (%)', fontsize=14)
-    plt.legend(title='In Spotify Charts', fontsize=12)
+    if mode in ('exact', 'sample'):
+        plt.legend(title='In Spotify Charts', fontsize=12)
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.show()
 
+@instrumented()
 def plot_top_songs_by_streams(df):
-    top_songs = df.sort_values('streams', ascending=False).head(10)
+    top_songs = top_rows(df, 'streams', 10)
     plt.figure(figsize=(12, 6))
     sns.barplot(x='streams', y='track_name', data=top_songs)
     plt.title('Top 10 Músicas por Streams')
     plt.show()
 
+@instrumented()
 def plot_correlation_matrix(df):
     features_numericas = ['streams', 'danceability_%', 'energy_%', 'valence_%', 'in_spotify_charts']
-    correlation = df[features_numericas].corr()
+    correlation = correlation_matrix(df, features_numericas)
     plt.figure(figsize=(10, 8))
     sns.heatmap(correlation, annot=True, cmap='coolwarm', center=0)
     plt.title('Matriz de Correlação', fontsize=16, pad=20)
     plt.tight_layout()
     plt.show()
 
+@instrumented()
 def plot_releases_per_month(df):
     plt.figure(figsize=(12, 6))
     sns.countplot(data=df, x='mes', palette='viridis')
@@ -92,9 +106,19 @@ def plot_releases_per_month(df):
     plt.tight_layout()
     plt.show()
 
-def create_visualizations(df):
-    """Create all visualizations."""
-    plt.style.use('seaborn')
+def create_visualizations(df, output_dir=None, formats=('png',), max_workers=None):
+    """Create all visualizations.
+    
+    With `output_dir`, the figures are rendered headless in parallel and
+    written to that directory (see `src.report.render_report`) instead of
+    being shown one after another.
+    """
+    if output_dir is not None:
+        from .report import OVERVIEW_FIGURES, render_report
+        return render_report(df, output_dir, formats=formats, figures=OVERVIEW_FIGURES,
+                             max_workers=max_workers)
+    
+    plt.style.use('seaborn-v0_8')
     
     plot_streaming_distribution(df)
     plot_feature_relationships(df)
@@ -105,12 +129,10 @@ def create_visualizations(df):
     plot_releases_per_month(df)
 
 if __name__ == "__main__":
-    from data_preprocessing import load_data, clean_spotify_data, normalize_audio_features
+    from .data_cache import RAW_FILE, load_processed
     
-    # Load and preprocess data
-    df = load_data('spotify_songs.csv')
-    df = clean_spotify_data(df)
-    df = normalize_audio_features(df)
+    # Load and preprocess data (served from the processed cache when valid)
+    df = load_processed(RAW_FILE)
     
     # Create visualizations
     create_visualizations(df)
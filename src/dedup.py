@@ -0,0 +1,237 @@
+"""Deduplicação de músicas: normalização, blocagem e comparação aproximada.
+
+Três passos, todos lineares no número de linhas exceto o último, que é
+quadrático só dentro de cada bloco:
+
+1. Normalização vetorizada: o título perde créditos ("(feat. X)",
+   "(with X)", "- ft. X"), marcas de versão explícita/limpa
+   ("(Explicit Ver.)"), acentos, pontuação e espaços repetidos; os
+   artistas creditados no título entram no conjunto de artistas, que vira
+   um hash independente da ordem ("A, B" = "B, A").
+2. Duplicatas exatas: mesmo título normalizado e mesmo conjunto de artistas.
+3. Duplicatas aproximadas: títulos distintos do mesmo bloco (mesmo
+   conjunto de artistas, mesmo começo de título e os mesmos números) são
+   comparados com `difflib` em um pool de processos; pares acima do
+   limiar são unidos. Títulos que só diferem nos números ("Part 1" e
+   "Part 2") nunca caem no mesmo bloco.
+
+`deduplicate` funde cada grupo em uma linha: streams e playlists são
+somados, posições em charts ficam com o máximo e o texto vem da linha com
+mais streams. Remixes e outras versões ("Remastered", "Twin Ver.") não são
+removidos do título e continuam sendo músicas distintas.
+"""
+import difflib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from .artist_index import ARTIST_COLUMN, split_artists
+
+SIMILARITY_THRESHOLD = 0.9
+BLOCK_PREFIX = 2
+# Titles per task sent to the pool; bounds the memory of each task
+BATCH_TITLES = 20_000
+# Blocks bigger than this are compared in a sliding window over sorted titles
+MAX_BLOCK = 2_000
+
+SUM_COLUMNS = ['streams', 'in_spotify_playlists', 'in_apple_playlists', 'in_deezer_playlists']
+MAX_COLUMNS = ['in_spotify_charts', 'in_apple_charts', 'in_deezer_charts', 'in_shazam_charts']
+
+_CREDIT = r'(?:feat\.?|ft\.?|featuring|with)\s'
+# "(feat. X)" / "[with X]" anywhere, or "- feat. X" at the end
+_CREDIT_PATTERN = rf'\s*[\(\[]\s*{_CREDIT}([^\)\]]*)[\)\]]|\s+-\s+{_CREDIT}(.*)$'
+_EDITION_PATTERN = r'\s*[\(\[]\s*(?:explicit|clean)(?:\s+(?:ver\.?|version))?\s*[\)\]]|\s+-\s+(?:explicit|clean)\s*$'
+
+
+def normalize_titles(titles: pd.Series) -> pd.Series:
+    """Título em minúsculas, sem créditos, marcas explicit/clean, acentos e pontuação."""
+    text = titles.astype('str').str.lower()
+    text = text.str.replace(_CREDIT_PATTERN, '', regex=True)
+    text = text.str.replace(_EDITION_PATTERN, '', regex=True)
+    text = text.str.normalize('NFKD').str.replace(r'[̀-ͯ]', '', regex=True)
+    text = text.str.replace(r'[^\w\s]', ' ', regex=True)
+    return text.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def title_credits(titles: pd.Series) -> pd.Series:
+    """Artistas creditados no título ("Song (feat. A & B)" -> "A, B"); NaN se não houver."""
+    found = titles.astype('str').str.extract(_CREDIT_PATTERN, flags=2)  # re.IGNORECASE
+    credits = found[0].fillna(found[1])
+    return credits.str.replace(r'\s*(?:&|\band\b)\s*', ', ', regex=True)
+
+
+def artist_set_hash(artists: pd.Series, extra: Optional[pd.Series] = None) -> np.ndarray:
+    """Hash (uint64) do conjunto de artistas de cada linha, independente da ordem.
+
+    Args:
+        artists: Créditos como em `artist(s)_name` ("A, B")
+        extra: Mais créditos por linha no mesmo formato (ex.: `title_credits`)
+
+    Returns:
+        np.ndarray: Um hash por linha; 0 para linhas sem artista
+    """
+    artists = artists.reset_index(drop=True)
+    names = split_artists(artists)
+    if extra is not None:
+        names = pd.concat([names, split_artists(extra.reset_index(drop=True))])
+    names = names.str.lower().str.replace(r'\s+', ' ', regex=True)
+    pairs = pd.DataFrame({'row': names.index.to_numpy(), 'name': names.to_numpy()}).drop_duplicates()
+    # Summing per-name hashes (mod 2**64) is order-independent
+    name_hashes = pd.util.hash_array(pairs['name'].to_numpy(dtype=object))
+    hashes = np.zeros(len(artists), dtype='uint64')
+    np.add.at(hashes, pairs['row'].to_numpy(), name_hashes)
+    return hashes
+
+
+def _similar_pairs(batch: List[Tuple[np.ndarray, List[str]]], threshold: float) -> np.ndarray:
+    """Pares (id, id) de títulos parecidos dentro de cada bloco (já ordenado) do lote."""
+    found = []
+    for ids, titles in batch:
+        # Large blocks only compare titles that are close in sort order
+        window = len(titles) if len(titles) <= MAX_BLOCK else 50
+        lengths = [len(title) for title in titles]
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        for i in range(len(titles)):
+            indexed = False
+            for j in range(i + 1, min(i + 1 + window, len(titles))):
+                # Length bound first (same as real_quick_ratio), before any indexing
+                total = lengths[i] + lengths[j]
+                if 2 * min(lengths[i], lengths[j]) < threshold * total:
+                    continue
+                if not indexed:
+                    matcher.set_seq2(titles[i])
+                    indexed = True
+                matcher.set_seq1(titles[j])
+                if matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold:
+                    found.append((ids[i], ids[j]))
+    return np.array(found, dtype='int64').reshape(-1, 2)
+
+
+def _batches(candidates: pd.DataFrame) -> List[List[Tuple[np.ndarray, List[str]]]]:
+    """Blocos em lotes de ~`BATCH_TITLES` títulos, cada bloco ordenado por título."""
+    candidates = candidates.sort_values(['block', 'title'], kind='stable')
+    blocks = candidates['block'].to_numpy()
+    ids = candidates['group'].to_numpy()
+    titles = candidates['title'].tolist()
+    starts = np.flatnonzero(np.r_[True, blocks[1:] != blocks[:-1]])
+    ends = np.r_[starts[1:], len(blocks)]
+
+    batches, current, size = [], [], 0
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        current.append((ids[start:end], titles[start:end]))
+        size += end - start
+        if size >= BATCH_TITLES:
+            batches.append(current)
+            current, size = [], 0
+    if current:
+        batches.append(current)
+    return batches
+
+
+def resolve_duplicates(df: pd.DataFrame, threshold: float = SIMILARITY_THRESHOLD,
+                       prefix: int = BLOCK_PREFIX, max_workers: Optional[int] = None) -> np.ndarray:
+    """Identificador de grupo de cada linha; linhas com o mesmo id são a mesma música.
+
+    Args:
+        df: Dados limpos
+        threshold: Similaridade mínima (`difflib`, 0 a 1) entre títulos;
+            1.0 desliga a comparação aproximada
+        prefix: Caracteres iniciais do título normalizado usados na blocagem
+            (junto com os artistas e os números do título)
+        max_workers: Processos da comparação aproximada (padrão: número de
+            CPUs; 1 roda no processo atual)
+
+    Returns:
+        np.ndarray: Um id por linha (0..n_grupos-1), na ordem das linhas
+    """
+    titles = normalize_titles(df['track_name']).reset_index(drop=True)
+    artists = artist_set_hash(df[ARTIST_COLUMN], title_credits(df['track_name']))
+    exact = pd.DataFrame({'title': titles.fillna(''), 'artists': artists})
+    # Exact duplicates collapse with one hash join
+    groups = exact.groupby(['title', 'artists'], sort=False).ngroup().to_numpy()
+    # Same order as the group ids (first appearance)
+    distinct = exact.drop_duplicates().reset_index(drop=True)
+    if threshold >= 1.0 or len(distinct) < 2:
+        return groups
+
+    distinct['group'] = np.arange(len(distinct))
+    # Numbers in the title ("Part 2", "Track 7299") must match exactly, in any order
+    numbers = distinct['title'].str.findall(r'\d+').map(sorted).str.join(' ')
+    distinct['block'] = pd.util.hash_pandas_object(
+        pd.DataFrame({'artists': distinct['artists'], 'prefix': distinct['title'].str.slice(0, prefix),
+                      'numbers': numbers}),
+        index=False).to_numpy()
+    sizes = distinct['block'].map(distinct['block'].value_counts())
+    candidates = distinct[sizes.to_numpy() > 1]
+    if candidates.empty:
+        return groups
+
+    batches = _batches(candidates)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(batches)))
+    if max_workers == 1:
+        results = [_similar_pairs(batch, threshold) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_similar_pairs, batches, [threshold] * len(batches)))
+    pairs = np.concatenate(results) if results else np.zeros((0, 2), dtype='int64')
+    if not len(pairs):
+        return groups
+
+    graph = sparse.coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+                              shape=(len(distinct), len(distinct)))
+    _, labels = connected_components(graph, directed=False)
+    return pd.factorize(labels[groups])[0]
+
+
+def deduplicate(df: pd.DataFrame, threshold: float = SIMILARITY_THRESHOLD,
+                prefix: int = BLOCK_PREFIX, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """Funde as duplicatas de `df` (ver `resolve_duplicates`).
+
+    De cada grupo fica a linha com mais streams; nela, streams e contagens
+    de playlists viram a soma do grupo, posições em charts o máximo, e
+    `duplicates` registra quantas linhas foram fundidas. Linhas do grupo
+    com o mesmo número de streams são a mesma música listada de novo (o
+    total de streams é um só): contam uma vez na soma, e cada contagem de
+    playlists fica com o maior valor entre elas. O resultado segue
+    em ordem decrescente de streams, como a saída de `clean_spotify_data`.
+
+    Returns:
+        pd.DataFrame: Uma linha por música
+    """
+    groups = resolve_duplicates(df, threshold, prefix, max_workers)
+    frame = df.reset_index(drop=True)
+    streams = frame['streams'].to_numpy(dtype='float64', na_value=np.nan)
+    # Representative: the row with most streams (NaN last), first one on ties
+    order = np.lexsort((np.arange(len(frame)), -np.nan_to_num(streams, nan=-np.inf), groups))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = groups[order][1:] != groups[order][:-1]
+    representatives = order[first]
+
+    merged = frame.take(representatives).reset_index(drop=True)
+    keys = groups[representatives]
+    sums = [column for column in SUM_COLUMNS if column in frame.columns]
+    maxima = [column for column in MAX_COLUMNS if column in frame.columns]
+    # Repeated listings (same group, same streams) become one row holding the
+    # largest count of each column, then those rows are summed per group
+    listings = pd.DataFrame({'group': groups, 'streams': streams}).groupby(
+        ['group', 'streams'], sort=False, dropna=False).ngroup().to_numpy()
+    listing_groups = np.empty(listings.max() + 1, dtype=groups.dtype)
+    listing_groups[listings] = groups
+    per_listing = frame[sums].groupby(listings, sort=False).max()
+    totals = per_listing.groupby(listing_groups[per_listing.index.to_numpy()], sort=False)
+    for column in sums:
+        merged[column] = totals[column].sum(min_count=1).reindex(keys).to_numpy()
+    grouped = frame.groupby(groups, sort=False)
+    for column in maxima:
+        merged[column] = grouped[column].max().reindex(keys).to_numpy()
+    merged['duplicates'] = np.bincount(groups)[keys]
+
+    sort_keys = -merged['streams'].to_numpy(dtype='float64', na_value=np.nan)
+    return merged.take(np.argsort(sort_keys, kind='stable')).reset_index(drop=True)
@@ -0,0 +1,128 @@
+"""Índice das features de áudio (`*_%`) para consultas por limiar.
+
+As linhas são numeradas pela sua posição na ordem decrescente de streams
+(o "rank"). Para cada feature o índice guarda os valores ordenados junto
+com o rank de cada um, então `feature > limiar` é uma busca binária que
+devolve um trecho contíguo de ranks. Numa consulta com várias condições,
+só o trecho mais seletivo é percorrido; as demais condições são testadas
+nos valores dessas linhas, e ordenar os ranks que sobram já devolve o
+resultado na ordem de streams. Os resultados recentes ficam em cache.
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .frame_cache import cached
+
+RESULT_CACHE_SIZE = 64
+
+
+def feature_columns(df: pd.DataFrame) -> List[str]:
+    """Colunas numéricas de features percentuais (`*_%`)."""
+    return [column for column in df.columns
+            if column.endswith('_%') and pd.api.types.is_numeric_dtype(df[column])]
+
+
+class FeatureIndex:
+    """Valores ordenados de cada feature, com as linhas na ordem de streams.
+
+    Args:
+        df: Dados (precisa da coluna `streams`)
+        columns: Features indexadas (padrão: todas as `*_%`)
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[List[str]] = None):
+        self.columns = feature_columns(df) if columns is None else list(columns)
+        streams = df['streams'].to_numpy(dtype='float64', na_value=np.nan)
+        # Descending streams, NaN last, ties in row order
+        self.stream_order = np.argsort(np.where(np.isnan(streams), np.inf, -streams), kind='stable')
+        self.stream_order.flags.writeable = False
+        rank_dtype = 'int32' if len(df) < 2 ** 31 else 'int64'
+
+        self.values: Dict[str, np.ndarray] = {}
+        self.sorted_values: Dict[str, np.ndarray] = {}
+        self.sorted_ranks: Dict[str, np.ndarray] = {}
+        for column in self.columns:
+            by_rank = df[column].to_numpy(dtype='float64', na_value=np.nan)[self.stream_order]
+            order = np.argsort(by_rank, kind='stable')
+            order = order[~np.isnan(by_rank[order])]
+            self.values[column] = by_rank
+            self.sorted_values[column] = by_rank[order]
+            self.sorted_ranks[column] = order.astype(rank_dtype)
+        self._results: OrderedDict = OrderedDict()
+
+    def _span(self, column: str, lower, upper, strict: bool):
+        sorted_values = self.sorted_values[column]
+        start, end = 0, len(sorted_values)
+        if lower is not None:
+            start = np.searchsorted(sorted_values, lower, side='right' if strict else 'left')
+        if upper is not None:
+            end = np.searchsorted(sorted_values, upper, side='left' if strict else 'right')
+        return start, max(start, end)
+
+    def select(self, lower: Optional[Dict[str, float]] = None,
+               upper: Optional[Dict[str, float]] = None, strict: bool = True) -> np.ndarray:
+        """Posições das linhas que atendem a todas as condições, em ordem decrescente de streams.
+
+        Args:
+            lower: Limite inferior por coluna (`coluna > limite`)
+            upper: Limite superior por coluna (`coluna < limite`)
+            strict: Se False, os limites entram no intervalo (`>=` e `<=`)
+
+        Returns:
+            np.ndarray: Posições (para `df.iloc`) ordenadas por streams
+        """
+        lower, upper = dict(lower or {}), dict(upper or {})
+        key = (tuple(sorted(lower.items())), tuple(sorted(upper.items())), strict)
+        hit = self._results.get(key)
+        if hit is not None:
+            self._results.move_to_end(key)
+            return hit
+
+        columns = list(dict.fromkeys([*lower, *upper]))
+        missing = [column for column in columns if column not in self.values]
+        if missing:
+            raise KeyError(f"Colunas fora do índice: {missing}")
+        if not columns:
+            return self.stream_order
+
+        spans = {column: self._span(column, lower.get(column), upper.get(column), strict)
+                 for column in columns}
+        driver = min(columns, key=lambda column: spans[column][1] - spans[column][0])
+        start, end = spans[driver]
+        ranks = self.sorted_ranks[driver][start:end]
+        for column in columns:
+            if column == driver:
+                continue
+            values = self.values[column][ranks]
+            keep = ~np.isnan(values)
+            if column in lower:
+                keep &= values > lower[column] if strict else values >= lower[column]
+            if column in upper:
+                keep &= values < upper[column] if strict else values <= upper[column]
+            ranks = ranks[keep]
+
+        result = self.stream_order[np.sort(ranks)]
+        # Shared by every caller that repeats the query
+        result.flags.writeable = False
+        self._results[key] = result
+        if len(self._results) > RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return result
+
+
+def get_feature_index(df: pd.DataFrame) -> FeatureIndex:
+    """Índice das features `*_%` de `df`, construído uma vez e mantido em cache."""
+    return cached(df, 'feature_index', lambda: FeatureIndex(df))
+
+
+def query_features(df: pd.DataFrame, lower: Optional[Dict[str, float]] = None,
+                   upper: Optional[Dict[str, float]] = None, strict: bool = True) -> pd.DataFrame:
+    """Linhas de `df` que atendem aos limites, em ordem decrescente de streams.
+
+    Ex.: `query_features(df, lower={'energy_%': 70, 'danceability_%': 75})`.
+    Ver `FeatureIndex.select`.
+    """
+    return df.iloc[get_feature_index(df).select(lower, upper, strict)]
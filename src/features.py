@@ -0,0 +1,199 @@
+"""Matriz de features (float32) para modelagem.
+
+O `FeatureMatrixBuilder` junta as features de áudio, os contadores de
+playlists/charts e as partes da data de lançamento em uma única matriz
+NumPy contígua em float32 e escala cada coluna com uma estratégia:
+
+- 'minmax': `(x - min) / (max - min)`, com os limites do ajuste;
+- 'zscore': `(x - média) / desvio`;
+- 'log1p': `log(1 + x)`, para caudas longas (streams, playlists);
+- 'none': sem escala.
+
+Todas as estratégias viram um deslocamento e um fator por coluna, então a
+transformação é uma única operação vetorizada sobre a matriz inteira (mais
+um `log1p` nas colunas que o pedem). Os parâmetros ajustados são gravados
+em JSON (`save`/`load`) para transformar lotes novos sem reajustar.
+"""
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+STRATEGIES = ('minmax', 'zscore', 'log1p', 'none')
+
+DEFAULT_STRATEGIES = {
+    'danceability_%': 'minmax',
+    'valence_%': 'minmax',
+    'energy_%': 'minmax',
+    'acousticness_%': 'minmax',
+    'instrumentalness_%': 'minmax',
+    'liveness_%': 'minmax',
+    'speechiness_%': 'minmax',
+    'bpm': 'minmax',
+    'artist_count': 'minmax',
+    'streams': 'log1p',
+    'in_spotify_playlists': 'log1p',
+    'in_apple_playlists': 'log1p',
+    'in_deezer_playlists': 'log1p',
+    'in_spotify_charts': 'minmax',
+    'in_apple_charts': 'minmax',
+    'in_deezer_charts': 'minmax',
+    'in_shazam_charts': 'minmax',
+    'released_year': 'zscore',
+    'released_month': 'minmax',
+    'released_day': 'minmax',
+}
+
+_FORMAT_VERSION = 1
+
+
+class FeatureMatrixBuilder:
+    """Ajusta e aplica a escala das features, produzindo uma matriz float32.
+
+    Args:
+        strategies: Estratégia por coluna (padrão: `DEFAULT_STRATEGIES`);
+            colunas ausentes do DataFrame no ajuste são ignoradas
+        fill_missing: Substitui valores ausentes pela média da coluna já
+            escalada (calculada no ajuste); se False, ficam como NaN
+    """
+
+    def __init__(self, strategies: Optional[Dict[str, str]] = None, fill_missing: bool = True):
+        strategies = dict(DEFAULT_STRATEGIES if strategies is None else strategies)
+        unknown = {column: strategy for column, strategy in strategies.items() if strategy not in STRATEGIES}
+        if unknown:
+            raise ValueError(f"Estratégias desconhecidas: {unknown} (use {', '.join(STRATEGIES)})")
+        self.strategies = strategies
+        self.fill_missing = fill_missing
+        self.columns: List[str] = []
+        self.offset: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+        self.fill: Optional[np.ndarray] = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.offset is not None
+
+    def get_feature_names_out(self) -> List[str]:
+        """Nome de cada coluna da matriz, na ordem."""
+        return list(self.columns)
+
+    def _raw_matrix(self, df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise KeyError(f"Colunas ausentes no DataFrame: {missing}")
+        matrix = np.empty((len(df), len(columns)), dtype='float32')
+        for position, column in enumerate(columns):
+            matrix[:, position] = df[column].to_numpy(dtype='float32', na_value=np.nan)
+        log_columns = [position for position, column in enumerate(columns)
+                       if self.strategies[column] == 'log1p']
+        if log_columns:
+            # Negative counts are not expected; clip so log1p stays defined
+            logged = np.log1p(np.maximum(matrix[:, log_columns], 0))
+            matrix[:, log_columns] = logged
+        return matrix
+
+    def fit(self, df: pd.DataFrame) -> 'FeatureMatrixBuilder':
+        """Calcula limites, médias e desvios das colunas em `df`."""
+        columns = [column for column in self.strategies if column in df.columns]
+        if not columns:
+            raise ValueError("Nenhuma das colunas de features está no DataFrame")
+        matrix = self._raw_matrix(df, columns)
+        strategies = np.array([self.strategies[column] for column in columns])
+
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            # All-NaN columns warn in nanmin/nanmean; they are handled below
+            warnings.simplefilter('ignore', RuntimeWarning)
+            # Statistics in float64 so large counters do not lose precision
+            low = np.nanmin(matrix, axis=0).astype('float64')
+            high = np.nanmax(matrix, axis=0).astype('float64')
+            mean = np.nanmean(matrix, axis=0, dtype='float64')
+            std = np.nanstd(matrix, axis=0, dtype='float64')
+
+        offset = np.zeros(len(columns))
+        spread = np.ones(len(columns))
+        is_minmax = strategies == 'minmax'
+        is_zscore = strategies == 'zscore'
+        offset[is_minmax] = low[is_minmax]
+        spread[is_minmax] = (high - low)[is_minmax]
+        offset[is_zscore] = mean[is_zscore]
+        spread[is_zscore] = std[is_zscore]
+        # Constant or empty columns map to 0 instead of dividing by zero
+        offset = np.nan_to_num(offset)
+        spread[~np.isfinite(spread) | (spread == 0)] = 1.0
+
+        self.columns = columns
+        self.offset = offset
+        self.scale = 1.0 / spread
+        self.fill = np.nan_to_num((mean - offset) * self.scale)
+        return self
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """Matriz (linhas x `get_feature_names_out()`) float32 contígua, com os parâmetros ajustados."""
+        if not self.is_fitted:
+            raise RuntimeError("FeatureMatrixBuilder ainda não foi ajustado (chame fit ou load)")
+        matrix = self._raw_matrix(df, self.columns)
+        matrix -= self.offset.astype('float32')
+        matrix *= self.scale.astype('float32')
+        if self.fill_missing:
+            np.copyto(matrix, np.broadcast_to(self.fill.astype('float32'), matrix.shape),
+                      where=np.isnan(matrix))
+        return matrix
+
+    def fit_transform(self, df: pd.DataFrame) -> np.ndarray:
+        return self.fit(df).transform(df)
+
+    def to_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """`transform(df)` como DataFrame, com o índice de `df`."""
+        return pd.DataFrame(self.transform(df), index=df.index, columns=self.columns)
+
+    def to_dict(self) -> dict:
+        """Parâmetros ajustados, serializáveis em JSON."""
+        if not self.is_fitted:
+            raise RuntimeError("FeatureMatrixBuilder ainda não foi ajustado (chame fit ou load)")
+        return {
+            'version': _FORMAT_VERSION,
+            'fill_missing': self.fill_missing,
+            'columns': [
+                {'name': column, 'strategy': self.strategies[column], 'offset': float(offset),
+                 'scale': float(scale), 'fill': float(fill)}
+                for column, offset, scale, fill in zip(self.columns, self.offset, self.scale, self.fill)
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> 'FeatureMatrixBuilder':
+        """Recria um builder ajustado a partir de `to_dict()`."""
+        if payload.get('version') != _FORMAT_VERSION:
+            raise ValueError(f"Versão de parâmetros não suportada: {payload.get('version')!r}")
+        entries = payload['columns']
+        builder = cls({entry['name']: entry['strategy'] for entry in entries}, payload['fill_missing'])
+        builder.columns = [entry['name'] for entry in entries]
+        builder.offset = np.array([entry['offset'] for entry in entries])
+        builder.scale = np.array([entry['scale'] for entry in entries])
+        builder.fill = np.array([entry['fill'] for entry in entries])
+        return builder
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Grava os parâmetros ajustados em JSON (de forma atômica)."""
+        payload = self.to_dict()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        tmp_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'FeatureMatrixBuilder':
+        """Recria um builder ajustado a partir de um arquivo de `save`."""
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+def build_feature_matrix(df: pd.DataFrame, strategies: Optional[Dict[str, str]] = None):
+    """Ajusta um `FeatureMatrixBuilder` em `df` e devolve (matriz, builder)."""
+    builder = FeatureMatrixBuilder(strategies)
+    return builder.fit_transform(df), builder
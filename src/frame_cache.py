@@ -0,0 +1,139 @@
+"""Cache de estruturas derivadas (índices, acumuladores) por DataFrame.
+
+Cada DataFrame tem suas entradas, liberadas quando ele é coletado. Uma
+entrada é refeita quando o número de linhas, as colunas ou o array de
+qualquer coluna mudam: atribuições de colunas (`df['x'] = ...`) e funções
+que reescrevem colunas no lugar (ex.: `normalize_audio_features`) trocam o
+array e são detectadas. Só a escrita de valores avulsos dentro de um array
+NumPy existente (`df.loc[i, 'x'] = v` numa coluna numérica) mantém o mesmo
+buffer; depois dela, chame `invalidate(df)`. O estado de cada coluna é lido
+só por APIs públicas (`Series.array`, `__array_interface__`, `__arrow_array__`);
+colunas sem esse acesso (ex.: `Int64`) deixam o DataFrame sem cache.
+"""
+import weakref
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+import numpy as np
+import pandas as pd
+
+T = TypeVar('T')
+
+_ENTRIES: Dict[int, tuple] = {}
+
+
+def _root(array: np.ndarray):
+    """O objeto que é dono da memória de um array NumPy (fim da cadeia de `base`)."""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array if array.base is None else array.base
+
+
+def _column_state(series: pd.Series) -> Optional[tuple]:
+    """Buffers (endereço, forma, passos) e donos da memória de uma coluna, via APIs públicas.
+
+    Devolve None para arrays cujos buffers não são acessíveis sem cópia
+    (ex.: inteiros anuláveis do pandas, datas com fuso horário).
+    """
+    values = series.array
+    if isinstance(series.dtype, np.dtype):
+        # NumPy-backed columns (numbers, naive datetimes) convert without a copy
+        array = np.asarray(values)
+        return (array.__array_interface__['data'][0], array.shape, array.strides), (_root(array),)
+    if isinstance(values, pd.Categorical):
+        codes = values.codes
+        return (codes.__array_interface__['data'][0], codes.shape, codes.strides), (_root(codes), values.dtype)
+    if isinstance(series.dtype, getattr(pd, 'ArrowDtype', ())) or getattr(series.dtype, 'storage', None) == 'pyarrow':
+        chunked = values.__arrow_array__()
+        return tuple((chunk.offset, len(chunk), tuple(0 if buffer is None else buffer.address
+                                                      for buffer in chunk.buffers()))
+                     for chunk in chunked.chunks), (chunked,)
+    return None
+
+
+def _ref(value):
+    try:
+        return weakref.ref(value)
+    except TypeError:
+        return lambda: value
+
+
+class _Token:
+    """Estado de um DataFrame: forma, colunas e buffers e dono da memória de cada coluna.
+
+    Os donos são comparados por identidade (via weakref) além do endereço,
+    então um buffer liberado e realocado no mesmo endereço não passa por
+    igual. Um token de um DataFrame com alguma coluna sem acesso público
+    aos buffers (`_column_state` devolve None) nunca é igual a outro: as
+    estruturas desse DataFrame são refeitas a cada consulta.
+    """
+    __slots__ = ('layout', 'buffers', 'refs')
+
+    def __init__(self, df: pd.DataFrame):
+        self.layout = (len(df), tuple(df.columns), tuple(df.dtypes))
+        states = [_column_state(series) for _, series in df.items()]
+        if any(state is None for state in states):
+            self.buffers = self.refs = None
+            return
+        self.buffers = tuple(buffers for buffers, _ in states)
+        self.refs = tuple(_ref(owner) for _, owners in states for owner in owners)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, _Token) and self.refs is not None and other.refs is not None
+                and self.layout == other.layout and self.buffers == other.buffers
+                and all(mine() is not None and mine() is theirs() for mine, theirs in zip(self.refs, other.refs)))
+
+
+def _frame_token(df: pd.DataFrame) -> _Token:
+    return _Token(df)
+
+
+def _entries_for(df: pd.DataFrame) -> dict:
+    key = id(df)
+    entry = _ENTRIES.get(key)
+    if entry is None or entry[0]() is not df:
+        ref = weakref.ref(df, lambda _, key=key: _ENTRIES.pop(key, None))
+        entry = (ref, {})
+        _ENTRIES[key] = entry
+    return entry[1]
+
+
+def cached(df: pd.DataFrame, name: Hashable, builder: Callable[[], T]) -> T:
+    """Devolve a estrutura `name` de `df`, construindo-a com `builder()` se preciso.
+
+    Args:
+        df: DataFrame de origem
+        name: Identificador da estrutura (ex.: ('correlation', 'pearson'))
+        builder: Função sem argumentos que constrói a estrutura
+
+    Returns:
+        A estrutura em cache ou recém-construída
+    """
+    values = _entries_for(df)
+    token = _frame_token(df)
+    hit = values.get(name)
+    if hit is not None and hit[0] == token:
+        return hit[1]
+    value = builder()
+    values[name] = (token, value)
+    return value
+
+
+def peek(df: pd.DataFrame, name: Hashable):
+    """Devolve a estrutura em cache (ou None) sem construí-la."""
+    entry = _ENTRIES.get(id(df))
+    if entry is None or entry[0]() is not df:
+        return None
+    hit = entry[1].get(name)
+    if hit is None or hit[0] != _frame_token(df):
+        return None
+    return hit[1]
+
+
+def store(df: pd.DataFrame, name: Hashable, value) -> None:
+    """Registra uma estrutura já construída para `df`."""
+    _entries_for(df)[name] = (_frame_token(df), value)
+
+
+def invalidate(df: pd.DataFrame) -> None:
+    """Descarta todas as estruturas em cache de `df`."""
+    _ENTRIES.pop(id(df), None)
@@ -0,0 +1,170 @@
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .artist_index import ArtistIndex, attach_artist_index
+from .collaboration import get_collaboration_graph
+from .data_cache import PROCESSED_DIR, RAW_FILE, read_frame, save_frame
+from .data_preprocessing import _dates_from_parts, clean_spotify_data, load_data
+from .rollups import StreamsRollup, attach_rollup
+
+STORE_FILE = PROCESSED_DIR / 'spotify_store.feather'
+
+# Structures kept next to the store and updated with each batch of new rows
+_SIDECARS = {
+    'rollup': ('.rollups.npz', StreamsRollup.load, StreamsRollup.from_frame),
+    'artists': ('.artists.npz', ArtistIndex.load, lambda df: ArtistIndex.from_frame(df, True)),
+    'credits': ('.credits.npz', ArtistIndex.load, lambda df: ArtistIndex.from_frame(df, False)),
+}
+
+# A row is identified by track, artist(s) and release date.
+KEY_COLUMNS = ['track_name', 'artist(s)_name', 'released_date']
+
+
+def _hash_keys(track: pd.Series, artists: pd.Series, released: np.ndarray) -> np.ndarray:
+    keys = pd.DataFrame({
+        'track_name': track.to_numpy(dtype=object),
+        'artist(s)_name': artists.to_numpy(dtype=object),
+        'released_date': released,
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def store_keys(store: pd.DataFrame) -> np.ndarray:
+    """Chaves (hash de 64 bits) das linhas já processadas."""
+    return _hash_keys(store['track_name'], store['artist(s)_name'],
+                      store['released_date'].to_numpy(dtype='datetime64[ns]'))
+
+
+def raw_keys(raw: pd.DataFrame) -> np.ndarray:
+    """Chaves das linhas brutas, calculadas como seriam após a limpeza.
+
+    Os nomes passam pelo mesmo `strip` de `clean_spotify_data` e a data é
+    montada a partir de `released_year`/`released_month`/`released_day`.
+    """
+    released = _dates_from_parts(*(raw[col].to_numpy(dtype='float64', na_value=np.nan)
+                                   for col in ['released_year', 'released_month', 'released_day']))
+    return _hash_keys(raw['track_name'].str.strip(), raw['artist(s)_name'].str.strip(), released)
+
+
+def add_collab_count(df: pd.DataFrame) -> pd.DataFrame:
+    """Adiciona `collab_count` (número de artistas distintos creditados) às linhas dadas.
+
+    Mesma contagem de `data_analysis.calculate_collaboration_metrics`.
+    """
+    df['collab_count'] = get_collaboration_graph(df).artists_per_track
+    return df
+
+
+def sidecar_paths(store_path: Union[str, Path]) -> Dict[str, Path]:
+    """Arquivos do rollup temporal e dos índices de artistas de um armazenamento."""
+    store_path = Path(store_path)
+    return {name: store_path.with_name(store_path.stem + suffix)
+            for name, (suffix, _, _) in _SIDECARS.items()}
+
+
+def _load_sidecars(store: pd.DataFrame, store_path: Path) -> dict:
+    """Estruturas gravadas ao lado do armazenamento; refeitas se faltarem ou forem mais antigas."""
+    store_mtime = store_path.stat().st_mtime_ns
+    sidecars = {}
+    for name, path in sidecar_paths(store_path).items():
+        _, load, build = _SIDECARS[name]
+        # Sidecars are written after the store, so an older one missed a batch
+        if path.exists() and path.stat().st_mtime_ns >= store_mtime:
+            sidecars[name] = load(path)
+        else:
+            sidecars[name] = build(store)
+            sidecars[name].save(path)
+    return sidecars
+
+
+def _save_sidecars(sidecars: dict, store_path: Path) -> None:
+    for name, path in sidecar_paths(store_path).items():
+        sidecars[name].save(path)
+
+
+def _attach_sidecars(sidecars: dict, store: pd.DataFrame) -> pd.DataFrame:
+    attach_rollup(store, sidecars['rollup'])
+    attach_artist_index(store, sidecars['artists'])
+    attach_artist_index(store, sidecars['credits'])
+    return store
+
+
+def merge_by_streams(store: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Intercala linhas novas (ordenadas por streams) no armazenamento ordenado.
+
+    As posições de inserção saem de uma busca binária sobre os streams do
+    armazenamento, então nada é reordenado do zero. Em empates as linhas
+    existentes vêm antes; streams ausentes continuam no final.
+
+    Args:
+        store: Dados processados, ordenados por streams (decrescente)
+        new: Linhas novas já limpas, ordenadas da mesma forma
+
+    Returns:
+        pd.DataFrame: Dados combinados, ordenados por streams
+    """
+    old_keys = -store['streams'].to_numpy(dtype='float64', na_value=np.nan)
+    new_keys = -new['streams'].to_numpy(dtype='float64', na_value=np.nan)
+    n_old, n_new = len(old_keys), len(new_keys)
+
+    positions = np.searchsorted(old_keys, new_keys, side='right') + np.arange(n_new)
+    order = np.empty(n_old + n_new, dtype='int64')
+    is_new = np.zeros(n_old + n_new, dtype=bool)
+    is_new[positions] = True
+    order[is_new] = n_old + np.arange(n_new)
+    order[~is_new] = np.arange(n_old)
+
+    merged = pd.concat([store, new], ignore_index=True)
+    return merged.take(order).reset_index(drop=True)
+
+
+def ingest_new_rows(raw_path: Union[str, Path] = RAW_FILE,
+                    store_path: Union[str, Path] = STORE_FILE) -> Tuple[pd.DataFrame, int]:
+    """Incorpora ao armazenamento processado apenas as linhas novas do CSV bruto.
+
+    Linhas cuja chave (track_name + artist(s)_name + data de lançamento) já
+    existe no armazenamento são ignoradas; só as novas passam por
+    `clean_spotify_data` e são intercaladas na ordem por streams. As colunas
+    derivadas (`ano`, `mes`, `collab_count`) são calculadas apenas para elas,
+    e o rollup temporal e os índices de artistas gravados ao lado do
+    armazenamento (`sidecar_paths`) recebem só essas linhas (`add_rows`).
+    O DataFrame devolvido já vem com essas estruturas no cache, então
+    `get_rollup`/`get_artist_index` não percorrem a tabela.
+    Sem armazenamento prévio, o arquivo inteiro é processado. Uma linha nova
+    com a mesma chave de uma já armazenada (o arquivo atual tem alguns
+    desses casos, como "SNAP" de Rosa Linn) é tratada como já processada.
+
+    Args:
+        raw_path: Caminho do CSV bruto
+        store_path: Arquivo do armazenamento processado (`.feather` ou `.parquet`)
+
+    Returns:
+        Tuple[pd.DataFrame, int]: Dados processados atualizados e número de linhas novas
+    """
+    store_path = Path(store_path)
+    raw = load_data(str(raw_path))
+
+    if not store_path.exists():
+        store = add_collab_count(clean_spotify_data(raw, inplace=True))
+        save_frame(store, store_path)
+        sidecars = {name: build(store) for name, (_, _, build) in _SIDECARS.items()}
+        _save_sidecars(sidecars, store_path)
+        return _attach_sidecars(sidecars, store), len(store)
+
+    store = read_frame(store_path)
+    sidecars = _load_sidecars(store, store_path)
+    is_new = ~np.isin(raw_keys(raw), store_keys(store))
+    new = clean_spotify_data(raw.loc[is_new]) if is_new.any() else None
+    if new is None or new.empty:
+        return _attach_sidecars(sidecars, store), 0
+    add_collab_count(new)
+
+    merged = merge_by_streams(store, new[store.columns])
+    save_frame(merged, store_path)
+    # Only the new rows go into the persisted structures
+    sidecars = {name: sidecar.add_rows(new) for name, sidecar in sidecars.items()}
+    _save_sidecars(sidecars, store_path)
+    return _attach_sidecars(sidecars, merged), len(new)
@@ -0,0 +1,335 @@
+"""Instrumentação por etapa do pipeline (leitura, limpeza, análises, gráficos).
+
+Desligada por padrão e com custo desprezível nesse estado. Ligada com
+`enable()` (ou `SPOTIFY_INSTRUMENT=1` no ambiente), cada etapa marcada com
+`stage(...)` ou `@instrumented(...)` registra um evento com:
+
+- tempo de parede;
+- linhas e bytes de entrada e de saída;
+- `copied_bytes`: bytes das colunas de saída que não compartilham memória
+  com as colunas de entrada (uma estimativa das cópias do DataFrame) e
+  `copies`, a mesma medida em múltiplos do tamanho da entrada;
+- com `trace_memory=True`, o pico e o saldo de alocações (tracemalloc);
+- com `profile=True`, as funções mais caras da etapa (cProfile).
+
+Etapas podem ser aninhadas; cada evento guarda a etapa que o contém. Os
+eventos ficam em memória (`events()`), podem ser resumidos (`summary()`),
+exportados em JSON (`export_json`) e entregues a ouvintes registrados com
+`add_listener`, ex. para enviar a um sistema de métricas.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+PROFILE_TOP = 15
+
+_enabled = os.environ.get('SPOTIFY_INSTRUMENT', '') not in ('', '0')
+_options = {'profile': False, 'trace_memory': False}
+_events: List[dict] = []
+_listeners: List[Callable[[dict], None]] = []
+# Nesting is tracked per thread; pipeline stages may run concurrently
+_local = threading.local()
+_started_tracemalloc = False
+
+
+def enable(profile: bool = False, trace_memory: bool = False) -> None:
+    """Liga a instrumentação.
+
+    Args:
+        profile: Captura um perfil cProfile de cada etapa de nível superior
+        trace_memory: Mede alocações com tracemalloc (deixa o código mais lento)
+    """
+    global _enabled, _started_tracemalloc
+    _enabled = True
+    _options.update(profile=profile, trace_memory=trace_memory)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+
+def disable() -> None:
+    """Desliga a instrumentação (os eventos já registrados são mantidos)."""
+    global _enabled, _started_tracemalloc
+    _enabled = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Descarta os eventos registrados."""
+    _events.clear()
+
+
+def events() -> List[dict]:
+    """Eventos registrados, na ordem em que as etapas terminaram."""
+    return list(_events)
+
+
+def add_listener(listener: Callable[[dict], None]) -> None:
+    """Chama `listener(evento)` ao fim de cada etapa."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[dict], None]) -> None:
+    _listeners.remove(listener)
+
+
+def _rows(data) -> Optional[int]:
+    return len(data) if isinstance(data, (pd.DataFrame, pd.Series)) else None
+
+
+def _nbytes(data) -> Optional[int]:
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=False).sum())
+    if isinstance(data, pd.Series):
+        return int(data.memory_usage(index=False))
+    return None
+
+
+def _column_spans(series: pd.Series) -> List[tuple]:
+    """Endereços (início, fim) dos buffers de uma coluna; vazio se desconhecidos."""
+    values = series.array
+    if isinstance(series.dtype, np.dtype):
+        arrays = [series.to_numpy(copy=False)]
+    elif isinstance(series.dtype, pd.CategoricalDtype):
+        arrays = [values.codes]
+    elif hasattr(values, '__arrow_array__'):
+        chunked = values.__arrow_array__()
+        chunks = getattr(chunked, 'chunks', [chunked])
+        return [(buffer.address, buffer.address + buffer.size)
+                for chunk in chunks for buffer in chunk.buffers() if buffer is not None and buffer.size]
+    else:
+        return []
+    spans = []
+    for array in arrays:
+        if array.nbytes:
+            start = array.__array_interface__['data'][0]
+            spans.append((start, start + array.nbytes))
+    return spans
+
+
+def _frame_spans(data) -> Dict[str, List[tuple]]:
+    if isinstance(data, pd.Series):
+        return {data.name: _column_spans(data)}
+    if isinstance(data, pd.DataFrame):
+        return {column: _column_spans(data[column]) for column in data.columns.unique()
+                if isinstance(data[column], pd.Series)}
+    return {}
+
+
+def _copied_bytes(inputs: Dict[str, List[tuple]], output) -> Optional[int]:
+    if not inputs or not isinstance(output, (pd.DataFrame, pd.Series)):
+        return None
+    known = [span for spans in inputs.values() for span in spans]
+    copied = 0
+    for column, spans in _frame_spans(output).items():
+        for start, end in spans:
+            if not any(start < other_end and other_start < end for other_start, other_end in known):
+                copied += end - start
+    return copied
+
+
+class StageRecord:
+    """Medições de uma etapa em andamento; `output(df)` informa o resultado."""
+
+    def __init__(self, name: str, data=None, meta: Optional[dict] = None):
+        if callable(data):
+            data = data()
+        self.name = name
+        self.meta = dict(meta or {})
+        self.rows_in = _rows(data)
+        self.bytes_in = _nbytes(data)
+        self._input_spans = _frame_spans(data)
+        self._output = None
+        self._has_output = False
+        self.peak_seen = 0
+
+    def output(self, data) -> None:
+        """Registra o resultado da etapa (linhas, bytes e cópias); aceita uma função, como `stage`."""
+        self._output = data() if callable(data) else data
+        self._has_output = True
+
+
+class _NullRecord:
+    """Registro entregue por `stage` com a instrumentação desligada."""
+
+    def output(self, data) -> None:
+        pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+def _current_stack() -> List[StageRecord]:
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def _top_functions(profiler: cProfile.Profile) -> List[dict]:
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({'function': f'{Path(filename).name}:{line}({function})', 'ncalls': ncalls,
+                     'tottime': round(tottime, 6), 'cumtime': round(cumtime, 6)})
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:PROFILE_TOP]
+
+
+@contextmanager
+def stage(name: str, data=None, **meta):
+    """Marca uma etapa do pipeline.
+
+    Args:
+        name: Nome da etapa (ex.: 'clean.release_date')
+        data: Entrada da etapa (DataFrame ou Series), para linhas/bytes/cópias,
+            ou uma função que a devolve, chamada só com a instrumentação
+            ligada (ex.: `lambda: df[colunas]`, que copia em pandas < 3)
+        **meta: Informações extras guardadas no evento
+
+    Yields:
+        StageRecord: Use `record.output(resultado)` para registrar a saída
+            (sem efeito com a instrumentação desligada)
+    """
+    if not _enabled:
+        yield _NULL_RECORD
+        return
+
+    record = StageRecord(name, data, meta)
+    stack = _current_stack()
+    parent = stack[-1] if stack else None
+    tracing = _options['trace_memory'] and tracemalloc.is_tracing()
+    if tracing:
+        if parent is not None:
+            parent.peak_seen = max(parent.peak_seen, tracemalloc.get_traced_memory()[1])
+        alloc_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    # cProfile allows one active profiler, so only outermost stages are profiled
+    profiler = cProfile.Profile() if _options['profile'] and not stack else None
+
+    stack.append(record)
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    error = None
+    try:
+        yield record
+    except BaseException as e:
+        error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+        stack.pop()
+        event = {
+            'name': name,
+            'parent': parent.name if parent is not None else None,
+            'depth': len(stack),
+            'timestamp': time.time() - seconds,
+            'seconds': round(seconds, 6),
+            'rows_in': record.rows_in,
+            'rows_out': _rows(record._output) if record._has_output else None,
+            'bytes_in': record.bytes_in,
+            'bytes_out': _nbytes(record._output) if record._has_output else None,
+            'copied_bytes': _copied_bytes(record._input_spans, record._output) if record._has_output else None,
+        }
+        event['copies'] = (round(event['copied_bytes'] / event['bytes_in'], 3)
+                           if event['copied_bytes'] is not None and event['bytes_in'] else None)
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, record.peak_seen)
+            event['alloc_peak_bytes'] = max(peak - alloc_start, 0)
+            event['alloc_net_bytes'] = current - alloc_start
+            if parent is not None:
+                parent.peak_seen = max(parent.peak_seen, peak)
+        if profiler is not None:
+            event['profile'] = _top_functions(profiler)
+        if error is not None:
+            event['error'] = error
+        event.update(record.meta)
+        record._output = None
+        _events.append(event)
+        for listener in _listeners:
+            listener(event)
+
+
+def instrumented(name: Optional[str] = None):
+    """Decorador: registra a função como etapa.
+
+    A entrada é o primeiro argumento DataFrame/Series e a saída é o valor
+    devolvido. O nome padrão é `módulo.função`.
+    """
+    def decorator(func):
+        stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            data = next((value for value in (*args, *kwargs.values())
+                         if isinstance(value, (pd.DataFrame, pd.Series))), None)
+            with stage(stage_name, data) as record:
+                result = func(*args, **kwargs)
+                record.output(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def summary(event_list: Optional[List[dict]] = None) -> pd.DataFrame:
+    """Resumo por etapa: chamadas, tempo total/médio/máximo, linhas, cópias e alocações.
+
+    Returns:
+        pd.DataFrame: Uma linha por etapa, da mais demorada para a menos
+    """
+    frame = pd.DataFrame(_events if event_list is None else event_list)
+    if frame.empty:
+        return frame
+    aggregations = {'calls': ('seconds', 'size'), 'total_seconds': ('seconds', 'sum'),
+                    'mean_seconds': ('seconds', 'mean'), 'max_seconds': ('seconds', 'max'),
+                    'rows_in': ('rows_in', 'sum'), 'rows_out': ('rows_out', 'sum'),
+                    'copied_bytes': ('copied_bytes', 'sum')}
+    if 'alloc_peak_bytes' in frame.columns:
+        aggregations['alloc_peak_bytes'] = ('alloc_peak_bytes', 'max')
+    result = frame.groupby('name', sort=False).agg(**aggregations)
+    return result.sort_values('total_seconds', ascending=False)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def export_json(path: Optional[Union[str, Path]] = None) -> str:
+    """Exporta eventos e resumo em JSON (e grava em `path`, se dado)."""
+    table = summary()
+    payload = {
+        'events': _events,
+        'summary': table.reset_index().to_dict(orient='records') if not table.empty else [],
+    }
+    text = json.dumps(payload, indent=2, default=_json_default, ensure_ascii=False)
+    if path is not None:
+        path = Path(path)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        tmp_path.write_text(text)
+        os.replace(tmp_path, path)
+    return text
@@ -0,0 +1,159 @@
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .data_cache import read_frame, save_frame
+from .data_preprocessing import SPOTIFY_SCHEMA, clean_spotify_data, load_data, normalize_audio_features
+
+# (source, byte range or None, normalize, output file)
+_Task = Tuple[str, Optional[Tuple[int, int]], bool, str]
+
+
+def _read_byte_range(file_path: str, start: int, end: int) -> pd.DataFrame:
+    """Lê as linhas completas entre os offsets `start` e `end` do CSV."""
+    with open(file_path, 'rb') as handle:
+        header = handle.readline()
+        handle.seek(start)
+        block = handle.read(end - start)
+    return pd.read_csv(io.BytesIO(header + block), dtype=SPOTIFY_SCHEMA)
+
+
+def _clean_task(task: _Task) -> Tuple[str, int]:
+    """Executa load → clean → normalize em um shard e grava o resultado em Arrow IPC."""
+    source, byte_range, normalize, output = task
+    if byte_range is None:
+        df = load_data(source, dtype=SPOTIFY_SCHEMA)
+    else:
+        df = _read_byte_range(source, *byte_range)
+    df = clean_spotify_data(df, inplace=True)
+    if normalize:
+        df = normalize_audio_features(df)
+    save_frame(df, output)
+    return output, len(df)
+
+
+def split_byte_ranges(file_path: Union[str, Path], n_parts: int) -> List[Tuple[int, int]]:
+    """Divide o corpo de um CSV em `n_parts` faixas de bytes alinhadas a quebras de linha.
+
+    Supõe que nenhum campo entre aspas contém quebra de linha, como no
+    arquivo do Spotify.
+    """
+    with open(file_path, 'rb') as handle:
+        handle.readline()
+        body_start = handle.tell()
+        size = os.fstat(handle.fileno()).st_size
+        bounds = [body_start]
+        for i in range(1, n_parts):
+            handle.seek(max(body_start + (size - body_start) * i // n_parts, bounds[-1]))
+            if handle.tell() > body_start:
+                handle.readline()
+            bounds.append(min(handle.tell(), size))
+        bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _merge_runs(first: Tuple[np.ndarray, np.ndarray],
+                second: Tuple[np.ndarray, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Intercala duas sequências (chaves, posições) ordenadas; em empates a primeira vem antes."""
+    first_keys, first_ids = first
+    second_keys, second_ids = second
+    # Insertion points by binary search, as in `ingest.merge_by_streams`; NaN keys sort last
+    positions = np.searchsorted(first_keys, second_keys, side='right') + np.arange(len(second_keys))
+    from_second = np.zeros(len(first_keys) + len(second_keys), dtype=bool)
+    from_second[positions] = True
+    keys = np.empty(len(from_second), dtype=first_keys.dtype)
+    ids = np.empty(len(from_second), dtype=first_ids.dtype)
+    keys[from_second], keys[~from_second] = second_keys, first_keys
+    ids[from_second], ids[~from_second] = second_ids, first_ids
+    return keys, ids
+
+
+def merge_sorted_shards(shards: List[pd.DataFrame]) -> pd.DataFrame:
+    """Combina shards já ordenados por streams em uma única ordem global.
+
+    Os shards são intercalados dois a dois, vizinho com vizinho, por busca
+    binária sobre os streams (k-way merge em O(n log k), sem reordenar as
+    linhas); só as chaves se movem, e as linhas são reunidas com um único
+    `take` no final. Em empates, as linhas do shard anterior vêm antes,
+    como numa ordenação estável do conjunto.
+    """
+    shards = [shard for shard in shards if len(shard)]
+    if not shards:
+        raise ValueError("Nenhuma linha válida encontrada nos shards")
+    starts = np.cumsum([0] + [len(shard) for shard in shards])
+    runs = [(-shard['streams'].to_numpy(dtype='float64', na_value=np.nan), np.arange(start, start + len(shard)))
+            for shard, start in zip(shards, starts)]
+    while len(runs) > 1:
+        paired = [_merge_runs(runs[i], runs[i + 1]) for i in range(0, len(runs) - 1, 2)]
+        runs = paired + runs[len(paired) * 2:]
+    merged = pd.concat(shards, ignore_index=True)
+    return merged.take(runs[0][1]).reset_index(drop=True)
+
+
+def _run_tasks(tasks: List[Tuple[str, Optional[Tuple[int, int]]]], normalize: bool,
+               max_workers: Optional[int]) -> pd.DataFrame:
+    if not tasks:
+        raise ValueError("Nenhum arquivo CSV para processar")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(tasks)))
+
+    with tempfile.TemporaryDirectory(prefix='spotify-shards-') as tmp_dir:
+        jobs = [(source, byte_range, normalize, os.path.join(tmp_dir, f'shard-{i:05d}.feather'))
+                for i, (source, byte_range) in enumerate(tasks)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            outputs = [output for output, _ in executor.map(_clean_task, jobs)]
+        # Results come back as Arrow IPC files, memory-mapped instead of pickled
+        return merge_sorted_shards([read_frame(output) for output in outputs])
+
+
+def clean_shards(sources: Union[str, Path, Iterable[Union[str, Path]]],
+                 max_workers: Optional[int] = None, normalize: bool = True) -> pd.DataFrame:
+    """Processa vários CSVs (ex.: um por mercado) em paralelo, um processo por arquivo.
+
+    Cada arquivo passa por `load_data` → `clean_spotify_data` →
+    `normalize_audio_features` em um `ProcessPoolExecutor`; os resultados
+    voltam como arquivos Arrow IPC e são intercalados por streams.
+
+    Args:
+        sources: Diretório com arquivos `.csv` ou lista de caminhos
+        max_workers: Número máximo de processos (padrão: número de CPUs)
+        normalize: Aplica `normalize_audio_features` em cada shard
+
+    Returns:
+        pd.DataFrame: Dados combinados, ordenados por streams (decrescente)
+    """
+    if isinstance(sources, (str, Path)) and Path(sources).is_dir():
+        paths = sorted(Path(sources).glob('*.csv'))
+    elif isinstance(sources, (str, Path)):
+        paths = [Path(sources)]
+    else:
+        paths = [Path(source) for source in sources]
+    return _run_tasks([(str(path), None) for path in paths], normalize, max_workers)
+
+
+def clean_file_parallel(file_path: Union[str, Path], n_parts: Optional[int] = None,
+                        max_workers: Optional[int] = None, normalize: bool = True) -> pd.DataFrame:
+    """Processa um único CSV grande em paralelo, dividido em faixas de linhas.
+
+    Args:
+        file_path: Caminho do CSV
+        n_parts: Número de faixas (padrão: `max_workers`)
+        max_workers: Número máximo de processos (padrão: número de CPUs)
+        normalize: Aplica `normalize_audio_features` em cada faixa
+
+    Returns:
+        pd.DataFrame: Dados limpos, ordenados por streams (decrescente)
+    """
+    if not Path(file_path).exists():
+        raise FileNotFoundError(f"Arquivo não encontrado no caminho: {file_path}")
+    if n_parts is None:
+        n_parts = max_workers or os.cpu_count() or 1
+    ranges = split_byte_ranges(file_path, n_parts)
+    return _run_tasks([(str(file_path), byte_range) for byte_range in ranges], normalize, max_workers)
@@ -0,0 +1,349 @@
+"""Pipeline em lote: ingest → clean → dedup → (optimize →) aggregate, normalize → render, rollup.
+
+As etapas formam um grafo de dependências (`STAGES`). Cada uma grava sua
+saída em `workdir` (o checkpoint) e registra em `workdir/state.json` uma
+chave calculada a partir do código das funções que ela usa, dos seus
+parâmetros e das chaves das etapas de que depende (para `ingest`, o hash
+do CSV bruto). Numa nova execução, uma etapa cuja chave não mudou e cujos
+arquivos existem é pulada; por isso, depois de uma falha basta rodar de
+novo para continuar de onde parou. Uma falha bloqueia só as etapas que
+dependem dela; as demais seguem. Etapas independentes (ex.: `normalize`
+e `optimize`, que dependem só de `dedup`) rodam ao mesmo tempo.
+
+Uso:
+    spotify-pipeline --raw "data/raw/Spotify Most Streamed Songs.csv"
+    python -m src.pipeline --stages aggregate --force clean
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .data_cache import PROCESSED_DIR, RAW_FILE, _hash_file, file_fingerprint, read_frame, save_frame
+
+PIPELINE_DIR = PROCESSED_DIR / 'pipeline'
+STATE_FILE = 'state.json'
+
+_SOURCE_DIR = Path(__file__).resolve().parent
+
+
+class Stage(NamedTuple):
+    """Uma etapa do pipeline.
+
+    `run(inputs, workdir, options)` recebe os caminhos gravados por cada
+    dependência e devolve a lista de arquivos que gravou (relativos a
+    `workdir`). `modules` são os módulos de `src` cujo código entra na
+    chave da etapa e `options` as opções da linha de comando que mudam a saída.
+    """
+    name: str
+    deps: Tuple[str, ...]
+    modules: Tuple[str, ...]
+    options: Tuple[str, ...]
+    run: Callable[[Dict[str, List[Path]], Path, dict], List[str]]
+
+
+def _ingest(inputs: Dict[str, List[Path]], workdir: Path, options: dict) -> List[str]:
+    from .data_preprocessing import SPOTIFY_SCHEMA, load_data
+
+    save_frame(load_data(str(options['raw']), dtype=SPOTIFY_SCHEMA), workdir / 'ingested.feather')
+    return ['ingested.feather']
+
+
+def _clean(inputs: Dict[str, List[Path]], workdir: Path, options: dict) -> List[str]:
+    from .data_preprocessing import clean_spotify_data
+
+    df = read_frame(inputs['ingest'][0])
+    save_frame(clean_spotify_data(df, inplace=True), workdir / 'cleaned.feather')
+    return ['cleaned.feather']
+
+
+def _dedup(inputs: Dict[str, List[Path]], workdir: Path, options: dict) -> List[str]:
+    from .dedup import deduplicate
+
+    df = read_frame(inputs['clean'][0])
+    save_frame(deduplicate(df, max_workers=options['jobs']), workdir / 'deduplicated.feather')
+    return ['deduplicated.feather']
+
+
+def _normalize(inputs: Dict[str, List[Path]], workdir: Path, options: dict) -> List[str]:
+    from .data_preprocessing import normalize_audio_features
+
+    df = read_frame(inputs['dedup'][0])
+    save_frame(normalize_audio_features(df), workdir / 'normalized.feather')
+    return ['normalized.feather']
+
+
+def _optimize(inputs: Dict[str, List[Path]], workdir: Path, options: dict) -> List[str]:
+    from .data_preprocessing import dtype_memory_report, optimize_dtypes
+
+    df = read_frame(inputs['dedup'][0])
+    compact = optimize_dtypes(df)
+    save_frame(compact, workdir / 'compact.feather')
+    report = dtype_memory_report(df, compact)
+    path = workdir / 'memory_report.json'
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(json.dumps(_jsonable(report), indent=2))
+    os.replace(tmp_path, path)
+    return ['compact.feather', path.name]
+
+
+def _rollup(inputs: Dict[str, List[Path]], workdir: Path, options: dict) -> List[str]:
+    from .rollups import StreamsRollup
+
+    StreamsRollup.from_frame(read_frame(inputs['dedup'][0])).save(workdir / 'rollups.npz')
+    return ['rollups.npz']
+
+
+def _jsonable(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return json.loads(value.to_json(orient='split', date_format='iso'))
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _aggregate(inputs: Dict[str, List[Path]], workdir: Path, options: dict) -> List[str]:
+    from .data_analysis import summarize_dataset
+
+    summary = summarize_dataset(read_frame(inputs['optimize'][0]))
+    path = workdir / 'aggregates.json'
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(json.dumps(_jsonable(summary), indent=2, ensure_ascii=False))
+    os.replace(tmp_path, path)
+    return [path.name]
+
+
+def _render(inputs: Dict[str, List[Path]], workdir: Path, options: dict) -> List[str]:
+    from .report import render_report
+
+    output_dir = workdir / 'figures'
+    manifest = render_report(read_frame(inputs['normalize'][0]), output_dir,
+                             formats=options['formats'], max_workers=options['jobs'])
+    failed = [entry['name'] for entry in manifest['figures'] if entry['error']]
+    if failed:
+        # A partial set of figures is not a valid checkpoint
+        raise RuntimeError(f"Falha ao gerar as figuras: {', '.join(failed)}")
+    files = [f'figures/{name}' for entry in manifest['figures'] for name in entry['files']]
+    return files + ['figures/manifest.json']
+
+
+STAGES: Dict[str, Stage] = {stage.name: stage for stage in [
+    Stage('ingest', (), ('data_preprocessing',), ('raw',), _ingest),
+    Stage('clean', ('ingest',), ('data_preprocessing',), (), _clean),
+    Stage('dedup', ('clean',), ('dedup', 'artist_index'), (), _dedup),
+    Stage('normalize', ('dedup',), ('data_preprocessing',), (), _normalize),
+    Stage('optimize', ('dedup',), ('data_preprocessing',), (), _optimize),
+    Stage('rollup', ('dedup',), ('rollups',), (), _rollup),
+    Stage('aggregate', ('optimize',), ('data_analysis', 'aggregation', 'collaboration', 'artist_index',
+                                       'rollups'), (), _aggregate),
+    Stage('render', ('normalize',), ('report', 'visualization', 'scatter_density', 'correlation',
+                                     'artist_index', 'rollups'), ('formats',), _render),
+]}
+
+
+def _stage_key(stage: Stage, dep_keys: Dict[str, str], options: dict, workdir: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(stage.name.encode())
+    for module in stage.modules:
+        digest.update(_hash_file(_SOURCE_DIR / f'{module}.py').encode())
+    for dep in stage.deps:
+        digest.update(dep_keys[dep].encode())
+    for option in stage.options:
+        value = options[option]
+        if option == 'raw':
+            # The content decides, not the path; the hash memo stays in the workdir
+            value = file_fingerprint(value, cache_dir=workdir)
+        digest.update(f'{option}={value!r}'.encode())
+    return digest.hexdigest()
+
+
+def _closure(targets: Sequence[str]) -> List[str]:
+    """As etapas pedidas e todas as suas dependências, em ordem topológica."""
+    ordered: List[str] = []
+
+    def visit(name: str, path: Tuple[str, ...]):
+        if name not in STAGES:
+            raise ValueError(f"Etapa desconhecida: {name!r} (opções: {', '.join(STAGES)})")
+        if name in path:
+            raise ValueError(f"Ciclo de dependências: {' -> '.join(path + (name,))}")
+        if name in ordered:
+            return
+        for dep in STAGES[name].deps:
+            visit(dep, path + (name,))
+        ordered.append(name)
+
+    for target in targets:
+        visit(target, ())
+    return ordered
+
+
+def load_state(workdir: Union[str, Path]) -> Dict[str, dict]:
+    """Estado gravado da última execução (etapa -> chave, arquivos, tempo, erro)."""
+    try:
+        return json.loads((Path(workdir) / STATE_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_state(workdir: Path, state: Dict[str, dict]) -> None:
+    path = workdir / STATE_FILE
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(json.dumps(state, indent=2, ensure_ascii=False))
+    os.replace(tmp_path, path)
+
+
+def _is_fresh(entry: Optional[dict], key: str, workdir: Path) -> bool:
+    return (entry is not None and entry.get('status') == 'done' and entry.get('key') == key
+            and all((workdir / name).exists() for name in entry.get('outputs', [])))
+
+
+def _execute(name: str, inputs: Dict[str, List[Path]], workdir: Path,
+             options: dict) -> Tuple[List[str], float]:
+    start = time.perf_counter()
+    outputs = STAGES[name].run(inputs, workdir, options)
+    return outputs, time.perf_counter() - start
+
+
+def run_pipeline(raw_path: Union[str, Path] = RAW_FILE, workdir: Union[str, Path] = PIPELINE_DIR,
+                 targets: Optional[Sequence[str]] = None, force: Sequence[str] = (),
+                 jobs: Optional[int] = None, formats: Sequence[str] = ('png',),
+                 dry_run: bool = False, log: Callable[[str], None] = print) -> Dict[str, dict]:
+    """Executa as etapas pedidas, pulando as que já estão em dia.
+
+    Args:
+        raw_path: CSV bruto
+        workdir: Diretório dos checkpoints e do `state.json`
+        targets: Etapas a produzir (padrão: todas); as dependências entram junto
+        force: Etapas a refazer mesmo em dia ('all' refaz todas); as que
+            dependem delas também são refeitas
+        jobs: Etapas simultâneas e processos da renderização e da
+            deduplicação (padrão: número de CPUs)
+        formats: Formatos das figuras
+        dry_run: Só mostra o que seria executado
+        log: Função que recebe as mensagens de progresso
+
+    Returns:
+        Dict[str, dict]: Estado de cada etapa ('done', 'skipped', 'failed',
+            'blocked' ou 'pending' em `dry_run`), com chave e tempo
+
+    Raises:
+        FileNotFoundError: Se o CSV bruto não existir
+    """
+    # Stages run in other processes (and `render` in workers that chdir)
+    workdir = Path(workdir).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    order = _closure(list(targets) if targets else list(STAGES))
+    force = set(order if 'all' in force else force)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    options = {'raw': str(Path(raw_path).resolve()), 'formats': tuple(formats), 'jobs': jobs}
+    if not Path(raw_path).exists():
+        raise FileNotFoundError(f"Arquivo não encontrado no caminho: {raw_path}")
+
+    state = load_state(workdir)
+    keys: Dict[str, str] = {}
+    for name in order:
+        keys[name] = _stage_key(STAGES[name], keys, options, workdir)
+
+    results: Dict[str, dict] = {}
+    pending = []
+    for name in order:
+        # A stage whose dependency is redone is redone too, even with the same key
+        if (name not in force and not any(dep in pending for dep in STAGES[name].deps)
+                and _is_fresh(state.get(name), keys[name], workdir)):
+            results[name] = dict(state[name], status='skipped')
+            log(f'[skip] {name}')
+        else:
+            pending.append(name)
+    if dry_run:
+        for name in pending:
+            results[name] = {'status': 'pending', 'key': keys[name]}
+            log(f'[todo] {name}')
+        return results
+
+    failed: Set[str] = set()
+    running = {}
+    # Processes rather than threads: `render` forks its own pool, which is
+    # not safe from a process that has other threads running pandas code
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as executor:
+        while pending or running:
+            for name in list(pending):
+                deps = STAGES[name].deps
+                if any(dep in failed for dep in deps):
+                    pending.remove(name)
+                    failed.add(name)
+                    results[name] = {'status': 'blocked', 'key': keys[name]}
+                    log(f'[blocked] {name}')
+                elif all(dep in results and results[dep]['status'] in ('done', 'skipped')
+                                        for dep in deps):
+                    pending.remove(name)
+                    log(f'[run] {name}')
+                    inputs = {dep: [workdir / output for output in state[dep]['outputs']]
+                              for dep in deps}
+                    running[executor.submit(_execute, name, inputs, workdir, options)] = name
+            if not running:
+                # Pending stages are visited in dependency order, so by now any
+                # stage downstream of a failure is blocked; this is a safeguard
+                for name in pending:
+                    results[name] = {'status': 'blocked', 'key': keys[name]}
+                    log(f'[blocked] {name}')
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    outputs, seconds = future.result()
+                except Exception as e:
+                    failed.add(name)
+                    entry = {'status': 'failed', 'key': keys[name], 'error': f'{type(e).__name__}: {e}'}
+                    log(f'[fail] {name}: {entry["error"]}')
+                else:
+                    entry = {'status': 'done', 'key': keys[name], 'outputs': outputs,
+                             'seconds': round(seconds, 4), 'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+                    log(f'[done] {name} ({seconds:.2f}s)')
+                results[name] = entry
+                # Persisted after every stage, so a crash keeps the finished work
+                state[name] = entry
+                _save_state(workdir, state)
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--raw', default=str(RAW_FILE), help='CSV bruto (padrão: %(default)s)')
+    parser.add_argument('--workdir', default=str(PIPELINE_DIR),
+                        help='diretório dos checkpoints (padrão: %(default)s)')
+    parser.add_argument('--stages', default='',
+                        help=f"etapas a produzir, separadas por vírgula ({','.join(STAGES)}; padrão: todas)")
+    parser.add_argument('--force', default='', help="etapas a refazer mesmo em dia, ou 'all'")
+    parser.add_argument('--jobs', type=int, default=None, help='etapas/processos simultâneos')
+    parser.add_argument('--formats', default='png', help='formatos das figuras (padrão: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true', help='só mostra o que seria executado')
+    args = parser.parse_args(argv)
+
+    def split(value: str) -> List[str]:
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    try:
+        results = run_pipeline(args.raw, args.workdir, split(args.stages), split(args.force),
+                               args.jobs, split(args.formats), args.dry_run)
+    except (FileNotFoundError, ValueError) as e:
+        print(f'erro: {e}', file=sys.stderr)
+        return 2
+    return 1 if any(entry['status'] in ('failed', 'blocked') for entry in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Renderização em lote das figuras, sem display (ex.: relatório noturno).
+
+Cada figura é gerada em um processo separado com o backend não
+interativo Agg, gravada de forma atômica (arquivo temporário + rename) em
+cada formato pedido, e o tempo de cada uma vai para um manifesto JSON.
+"""
+import importlib
+import json
+import os
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from .data_cache import read_frame, save_frame
+
+# name -> (module inside `src`, function, extra keyword arguments)
+DEFAULT_FIGURES = {
+    'streams_distribution': ('visualization', 'plot_streams_distribution', {}),
+    'feature_correlation_matrix': ('visualization', 'plot_feature_correlation_matrix',
+                                   {'features': ['danceability_%', 'energy_%', 'valence_%', 'bpm', 'streams']}),
+    'top_artists': ('visualization', 'plot_top_artists', {}),
+    'streams_by_year': ('visualization', 'plot_streams_by_year', {}),
+    'correlation_matrix': ('visualization', 'plot_correlation_matrix', {}),
+    'danceability_vs_energy': ('visualization', 'plot_danceability_vs_energy', {}),
+    'releases_by_month': ('visualization', 'plot_releases_by_month', {}),
+    'streams_evolution': ('visualization', 'plot_streams_evolution', {}),
+    'log_streams_distribution': ('visualization', 'plot_log_streams_distribution', {}),
+}
+
+# Figures drawn by `data_visualization.create_visualizations`
+OVERVIEW_FIGURES = {
+    'streaming_distribution': ('data_visualization', 'plot_streaming_distribution', {}),
+    'feature_relationships': ('data_visualization', 'plot_feature_relationships', {}),
+    'yearly_streams': ('data_visualization', 'plot_yearly_streams', {}),
+    'danceability_vs_energy': ('data_visualization', 'plot_danceability_vs_energy', {}),
+    'top_songs_by_streams': ('data_visualization', 'plot_top_songs_by_streams', {}),
+    'correlation_matrix': ('data_visualization', 'plot_correlation_matrix', {}),
+    'releases_per_month': ('data_visualization', 'plot_releases_per_month', {}),
+}
+
+_worker_data: Optional[pd.DataFrame] = None
+
+
+def _use_headless_backend():
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    # plt.show() is a no-op on Agg; its warning is expected here
+    warnings.filterwarnings('ignore', message='.*non-interactive.*')
+
+
+def _init_worker(data_path: str, scratch_dir: str):
+    global _worker_data
+    _use_headless_backend()
+    # Plot functions that also save into the working directory write to scratch
+    os.chdir(scratch_dir)
+    _worker_data = read_frame(data_path)
+
+
+def _write_atomic(figure, path: Path, fmt: str, dpi: int):
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    figure.savefig(tmp_path, format=fmt, dpi=dpi, bbox_inches='tight')
+    os.replace(tmp_path, path)
+
+
+def _render_figure(name: str, module: str, function: str, kwargs: dict,
+                   output_dir: str, formats: Sequence[str], dpi: int) -> dict:
+    import matplotlib.pyplot as plt
+
+    plot = getattr(importlib.import_module(f'{__package__}.{module}'), function)
+    before = set(plt.get_fignums())
+    start = time.perf_counter()
+    entry = {'name': name, 'function': f'{module}.{function}', 'files': [], 'error': None}
+    try:
+        plot(_worker_data.copy(), **kwargs)
+        numbers = sorted(set(plt.get_fignums()) - before)
+        for position, number in enumerate(numbers):
+            figure = plt.figure(number)
+            stem = name if len(numbers) == 1 else f'{name}-{position + 1}'
+            for fmt in formats:
+                path = Path(output_dir) / f'{stem}.{fmt}'
+                _write_atomic(figure, path, fmt, dpi)
+                entry['files'].append(path.name)
+    except Exception as e:
+        entry['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        plt.close('all')
+    entry['seconds'] = round(time.perf_counter() - start, 4)
+    return entry
+
+
+def render_report(df: pd.DataFrame, output_dir: Union[str, Path],
+                  formats: Iterable[str] = ('png',),
+                  figures: Optional[Dict[str, tuple]] = None,
+                  max_workers: Optional[int] = None, dpi: int = 150) -> dict:
+    """Gera as figuras em paralelo, sem display, e grava um manifesto.
+
+    Args:
+        df: Dados limpos usados por todas as figuras
+        output_dir: Diretório de saída (criado se preciso)
+        formats: Formatos de arquivo, ex. ('png', 'svg', 'pdf')
+        figures: Figuras a gerar, no formato de `DEFAULT_FIGURES`
+        max_workers: Número máximo de processos (padrão: número de CPUs)
+        dpi: Resolução das imagens rasterizadas
+
+    Returns:
+        dict: Manifesto com arquivos e tempo de renderização de cada figura;
+            também gravado em `output_dir/manifest.json`. Uma figura que falha
+            é registrada com o erro, sem interromper as demais.
+    """
+    figures = DEFAULT_FIGURES if figures is None else figures
+    formats = list(formats)
+    # Workers chdir into a scratch directory, so a relative path would point there
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(figures)))
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='spotify-report-') as scratch_dir:
+        # Workers memory-map the data once instead of receiving it with every task
+        data_path = save_frame(df, Path(scratch_dir) / 'data.feather')
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(str(data_path), scratch_dir)) as executor:
+            futures = [executor.submit(_render_figure, name, module, function, kwargs,
+                                       str(output_dir), formats, dpi)
+                       for name, (module, function, kwargs) in figures.items()]
+            entries: List[dict] = [future.result() for future in futures]
+
+    manifest = {
+        'output_dir': str(output_dir),
+        'formats': formats,
+        'total_seconds': round(time.perf_counter() - start, 4),
+        'figures': entries,
+    }
+    manifest_path = output_dir / 'manifest.json'
+    tmp_path = manifest_path.with_name('.manifest.json.tmp')
+    tmp_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False))
+    os.replace(tmp_path, manifest_path)
+    return manifest
@@ -0,0 +1,338 @@
+"""Agregados temporais pré-computados de streams e contadores (dia → mês → ano).
+
+O `StreamsRollup` guarda, por dia de lançamento, o número de músicas e,
+para streams e cada contador de playlists/charts, a contagem de valores
+presentes, a soma, o mínimo e o máximo. Os níveis mês, ano e mês do ano
+('month_of_year', o `mes` de `clean_spotify_data`) saem do nível anterior,
+sobre alguns milhares de linhas em vez da tabela inteira; a média é
+soma / contagem. A mediana de streams não se compõe a partir desses
+totais: `streams_median` a calcula exata sobre as linhas (e a mantém em
+cache) ou, com `approximate=True`, a partir de um histograma esparso por
+mês com `BINS_PER_DECADE` faixas logarítmicas por década (erro relativo
+abaixo de 1%), sem ler as linhas.
+
+Músicas com ano e mês válidos mas dia inválido (ex.: 31 de fevereiro) não
+têm `released_date`; ficam num balde à parte, por mês, que só entra nos
+níveis mês, ano e mês do ano com `partial=True`. É o equivalente a
+agrupar por `released_year`/`released_month` em vez de `ano`/`mes`.
+
+Linhas novas entram com `add_rows` sem rever as antigas (os agregados só
+somam, e mínimo/máximo só se comparam), e o conjunto é gravado em `.npz`
+com `save`/`load`; `src.ingest` mantém assim um rollup gravado ao lado do
+armazenamento processado. `get_rollup(df)` mantém o rollup de um
+DataFrame em cache, como os índices de `src.artist_index`.
+"""
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .frame_cache import cached, store
+
+ROLLUP_COLUMNS = ['streams', 'in_spotify_playlists', 'in_spotify_charts', 'in_apple_playlists',
+                  'in_apple_charts', 'in_deezer_playlists', 'in_deezer_charts', 'in_shazam_charts']
+GRAINS = ('day', 'month', 'year', 'month_of_year')
+BINS_PER_DECADE = 256
+# Upper bound of the relative error of `median`: one bin (10 ** (1 / 256) - 1 ~ 0.9%)
+MEDIAN_RTOL = 0.01
+# Histogram bins cover 10**0 .. 10**12 streams
+_N_BINS = 12 * BINS_PER_DECADE
+_FORMAT_VERSION = 2
+
+_REDUCERS = {'rows': np.add, 'count': np.add, 'sum': np.add, 'min': np.fmin, 'max': np.fmax}
+_LABELS = {'day': 'released_date', 'month': 'month', 'year': 'year', 'month_of_year': 'month'}
+
+
+def _reduce(keys: np.ndarray, parts: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Agrupa as linhas de `parts` com a mesma chave (soma, mínimo ou máximo, conforme a parte)."""
+    if not len(keys):
+        return keys, parts
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], {name: _REDUCERS[name].reduceat(values[order], starts, axis=0)
+                          for name, values in parts.items()}
+
+
+def _release_days(df: pd.DataFrame) -> np.ndarray:
+    """Dia de lançamento (dias desde 1970-01-01) de cada linha; NaT vira `np.datetime64('NaT')`."""
+    if 'released_date' in df.columns:
+        dates = df['released_date'].to_numpy(dtype='datetime64[ns]')
+    else:
+        from .data_preprocessing import _dates_from_parts
+        dates = _dates_from_parts(*(df[col].to_numpy(dtype='float64', na_value=np.nan)
+                                    for col in ['released_year', 'released_month', 'released_day']))
+    return dates.astype('datetime64[D]')
+
+
+def _month_ids(days: np.ndarray) -> np.ndarray:
+    """Meses desde janeiro de 1970 (negativos antes disso)."""
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+
+
+def _release_months(df: pd.DataFrame, days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mês de lançamento pelas colunas `released_year`/`released_month` e se ele é válido.
+
+    Sem essas colunas, o mês sai de `days`.
+    """
+    if not {'released_year', 'released_month'} <= set(df.columns):
+        valid = ~np.isnat(days)
+        return np.where(valid, _month_ids(days), 0), valid
+    year = df['released_year'].to_numpy(dtype='float64', na_value=np.nan)
+    month = df['released_month'].to_numpy(dtype='float64', na_value=np.nan)
+    valid = np.isfinite(year) & (month >= 1) & (month <= 12)
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype('int64')
+    return months, valid
+
+
+def _empty_parts(width: int) -> Dict[str, np.ndarray]:
+    return {
+        'rows': np.zeros(0, dtype='int64'),
+        'count': np.zeros((0, width), dtype='int64'),
+        'sum': np.zeros((0, width)),
+        'min': np.zeros((0, width)),
+        'max': np.zeros((0, width)),
+    }
+
+
+def _row_parts(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Partes de uma linha por linha de `values` (NaN = valor ausente)."""
+    present = ~np.isnan(values)
+    return {
+        'rows': np.ones(len(values), dtype='int64'),
+        'count': present.astype('int64'),
+        'sum': np.where(present, values, 0.0),
+        'min': values,
+        'max': values,
+    }
+
+
+def _merge(keys: np.ndarray, parts: Dict[str, np.ndarray], new_keys: np.ndarray,
+           new_parts: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    return _reduce(np.concatenate([keys, new_keys]),
+                   {name: np.concatenate([parts[name], new_parts[name]]) for name in parts})
+
+
+def _median_groups(months: np.ndarray, grain: str) -> np.ndarray:
+    if grain == 'day' or grain not in GRAINS:
+        raise ValueError(f"Mediana disponível por {', '.join(GRAINS[1:])}, não {grain!r}")
+    return {'month': months, 'year': months // 12, 'month_of_year': months % 12}[grain]
+
+
+def _labels(grain: str, keys: np.ndarray) -> pd.Index:
+    if grain == 'day':
+        labels = pd.DatetimeIndex(keys.astype('datetime64[D]').astype('datetime64[ns]'))
+    elif grain == 'month':
+        labels = pd.DatetimeIndex(keys.astype('datetime64[M]').astype('datetime64[ns]'))
+    else:
+        labels = pd.Index(keys + (1970 if grain == 'year' else 1))
+    return labels.rename(_LABELS[grain])
+
+
+class StreamsRollup:
+    """Totais de streams e contadores por dia de lançamento, com níveis derivados.
+
+    Args:
+        columns: Colunas agregadas (padrão: `ROLLUP_COLUMNS`); colunas ausentes
+            de um lote contam como valores faltantes
+    """
+
+    def __init__(self, columns: Optional[Sequence[str]] = None):
+        self.columns = list(ROLLUP_COLUMNS if columns is None else columns)
+        if 'streams' not in self.columns:
+            raise ValueError("O rollup precisa da coluna 'streams'")
+        self.days = np.zeros(0, dtype='int64')
+        self.parts = _empty_parts(len(self.columns))
+        # Rows with a valid year and month but no valid day, by month id
+        self.partial_months = np.zeros(0, dtype='int64')
+        self.partial_parts = _empty_parts(len(self.columns))
+        # Sparse streams histogram: key = month id * _N_BINS + bin
+        self.hist_keys = np.zeros(0, dtype='int64')
+        self.hist_counts = np.zeros(0, dtype='int64')
+        self._levels: Dict[Tuple[str, bool], Tuple[np.ndarray, Dict[str, np.ndarray]]] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> 'StreamsRollup':
+        return cls(columns).add_rows(df)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def add_rows(self, df: pd.DataFrame) -> 'StreamsRollup':
+        """Acrescenta linhas (ex.: as recém-ingeridas).
+
+        Linhas sem data válida entram só no balde de datas parciais, se ano e
+        mês forem válidos; as demais são ignoradas.
+        """
+        all_days = _release_days(df)
+        valid = ~np.isnat(all_days)
+        months, partial = _release_months(df, all_days)
+        partial &= ~valid
+        if not (valid.any() or partial.any()):
+            return self
+        all_values = np.full((len(df), len(self.columns)), np.nan)
+        for position, column in enumerate(self.columns):
+            if column in df.columns:
+                all_values[:, position] = df[column].to_numpy(dtype='float64', na_value=np.nan)
+        self._levels.clear()
+        if partial.any():
+            self.partial_months, self.partial_parts = _merge(
+                self.partial_months, self.partial_parts, *_reduce(months[partial], _row_parts(all_values[partial])))
+        if not valid.any():
+            return self
+
+        days = all_days[valid]
+        values = all_values[valid]
+        self.days, self.parts = _merge(self.days, self.parts,
+                                       *_reduce(days.astype('int64'), _row_parts(values)))
+
+        streams = values[:, self.columns.index('streams')]
+        has_streams = ~np.isnan(streams)
+        bins = np.floor(np.log10(np.maximum(streams[has_streams], 1.0)) * BINS_PER_DECADE)
+        bins = np.clip(bins, 0, _N_BINS - 1).astype('int64')
+        keys = _month_ids(days[has_streams]) * _N_BINS + bins
+        keys, counts = _reduce(np.concatenate([self.hist_keys, keys]),
+                               {'count': np.concatenate([self.hist_counts, np.ones(len(keys), dtype='int64')])})
+        self.hist_keys, self.hist_counts = keys, counts['count']
+        return self
+
+    def _level(self, grain: str, partial: bool = False) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        if grain not in GRAINS:
+            raise ValueError(f"Granularidade desconhecida: {grain!r} (use {', '.join(GRAINS)})")
+        if grain == 'day':
+            return self.days, self.parts
+        partial = partial and len(self.partial_months) > 0
+        level = self._levels.get((grain, partial))
+        if level is None:
+            # Each level is reduced from the one below it, never from the rows
+            if grain == 'month':
+                level = _reduce(_month_ids(self.days), self.parts)
+                if partial:
+                    level = _merge(*level, self.partial_months, self.partial_parts)
+            else:
+                months, parts = self._level('month', partial)
+                level = _reduce(months // 12 if grain == 'year' else months % 12, parts)
+            self._levels[(grain, partial)] = level
+        return level
+
+    def stats(self, column: str = 'streams', grain: str = 'year', partial: bool = False) -> pd.DataFrame:
+        """Contagem, soma, média, mínimo e máximo de `column` por dia, mês, ano ou mês do ano.
+
+        Com `partial=True`, os níveis mês, ano e mês do ano incluem as músicas
+        de dia inválido (como um agrupamento por `released_year`/`released_month`).
+
+        Returns:
+            pd.DataFrame: Colunas 'count', 'sum', 'mean', 'min' e 'max', uma
+            linha por período com pelo menos uma música, em ordem cronológica
+        """
+        if column not in self.columns:
+            raise KeyError(f"Coluna fora do rollup: {column!r} (disponíveis: {', '.join(self.columns)})")
+        keys, parts = self._level(grain, partial)
+        position = self.columns.index(column)
+        count = parts['count'][:, position]
+        total = parts['sum'][:, position]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+        return pd.DataFrame({'count': count, 'sum': np.where(count > 0, total, 0.0), 'mean': mean,
+                             'min': parts['min'][:, position], 'max': parts['max'][:, position]},
+                            index=_labels(grain, keys))
+
+    def releases(self, grain: str = 'year', partial: bool = False) -> pd.Series:
+        """Número de músicas lançadas por período (`partial` como em `stats`)."""
+        keys, parts = self._level(grain, partial)
+        return pd.Series(parts['rows'], index=_labels(grain, keys), name='count')
+
+    def median(self, grain: str = 'month_of_year') -> pd.Series:
+        """Mediana aproximada de streams por mês, ano ou mês do ano (a partir do histograma).
+
+        O erro relativo fica abaixo de `MEDIAN_RTOL`; para o valor exato, ver
+        `streams_median`.
+        """
+        months, bins = np.divmod(self.hist_keys, _N_BINS)
+        groups = _median_groups(months, grain)
+        keys, counts = _reduce(groups * _N_BINS + bins, {'count': self.hist_counts})
+        counts = counts['count']
+        groups, bins = np.divmod(keys, _N_BINS)
+        if not len(groups):
+            return pd.Series([], index=_labels(grain, groups), name='streams', dtype='float64')
+
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        cumulative = np.cumsum(counts)
+        before = np.r_[0, cumulative[starts[1:] - 1]]
+        totals = np.add.reduceat(counts, starts)
+        # Middle ranks (1-based; two of them for even counts), each placed
+        # inside its bin on the log scale, as the exact median would average them
+        values = np.zeros(len(starts))
+        for rank in (np.floor((totals + 1) / 2), np.ceil((totals + 1) / 2)):
+            targets = before + rank
+            found = np.searchsorted(cumulative, targets, side='left')
+            fraction = (targets - (cumulative[found] - counts[found]) - 0.5) / counts[found]
+            values += 10 ** ((bins[found] + fraction) / BINS_PER_DECADE) / 2
+        return pd.Series(values, index=_labels(grain, groups[starts]), name='streams')
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Grava o rollup em `.npz` (comprimido, sem pickle)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp.npz')
+        np.savez_compressed(tmp_path, version=np.array(_FORMAT_VERSION), columns=np.array(self.columns),
+                            days=self.days, hist_keys=self.hist_keys, hist_counts=self.hist_counts,
+                            partial_months=self.partial_months, **self.parts,
+                            **{f'partial_{name}': values for name, values in self.partial_parts.items()})
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'StreamsRollup':
+        """Lê um rollup gravado por `save`."""
+        with np.load(path, allow_pickle=False) as archive:
+            version = int(archive['version'])
+            if version not in (1, _FORMAT_VERSION):
+                raise ValueError(f"Versão de rollup não suportada: {version}")
+            rollup = cls([str(column) for column in archive['columns']])
+            rollup.days = archive['days']
+            rollup.parts = {name: archive[name] for name in rollup.parts}
+            # Version 1 had no bucket for partial dates
+            if version > 1:
+                rollup.partial_months = archive['partial_months']
+                rollup.partial_parts = {name: archive[f'partial_{name}'] for name in rollup.partial_parts}
+            rollup.hist_keys = archive['hist_keys']
+            rollup.hist_counts = archive['hist_counts']
+        return rollup
+
+
+def get_rollup(df: pd.DataFrame) -> StreamsRollup:
+    """Rollup temporal de `df`, construído uma vez e mantido em cache."""
+    return cached(df, 'rollup', lambda: StreamsRollup.from_frame(df))
+
+
+def streams_median(df: pd.DataFrame, grain: str = 'month_of_year', approximate: bool = False) -> pd.Series:
+    """Mediana de streams de `df` por mês, ano ou mês do ano.
+
+    Args:
+        df: Dados limpos
+        grain: 'month', 'year' ou 'month_of_year'
+        approximate: Usa o histograma do rollup em cache (`StreamsRollup.median`,
+            erro relativo abaixo de `MEDIAN_RTOL`) em vez de ler as linhas
+
+    Returns:
+        pd.Series: Uma mediana por período com streams, em ordem cronológica
+    """
+    if approximate:
+        return get_rollup(df).median(grain)
+    return cached(df, ('streams_median', grain), lambda: _exact_median(df, grain))
+
+
+def _exact_median(df: pd.DataFrame, grain: str) -> pd.Series:
+    days = _release_days(df)
+    streams = df['streams'].to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~np.isnat(days) & ~np.isnan(streams)
+    groups = _median_groups(_month_ids(days[valid]), grain)
+    medians = pd.Series(streams[valid]).groupby(groups).median()
+    return pd.Series(medians.to_numpy(), index=_labels(grain, medians.index.to_numpy()), name='streams')
+
+
+def attach_rollup(df: pd.DataFrame, rollup: StreamsRollup) -> None:
+    """Associa a `df` um rollup já construído (ex.: lido com `load` e atualizado com `add_rows`)."""
+    store(df, 'rollup', rollup)
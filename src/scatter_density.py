@@ -0,0 +1,208 @@
+"""Camada de densidade para gráficos de dispersão grandes.
+
+Até `DENSITY_THRESHOLD` linhas os scatter plots desenham cada ponto. Acima
+disso, o modo 'auto' agrega os pontos em uma grade 2D (um marcador por
+célula ocupada, com tamanho proporcional aos streams somados) ou, sem
+coluna de tamanho, em hexbin. O modo 'sample' usa uma amostra
+estratificada que preserva a cauda de maiores streams.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DENSITY_THRESHOLD = 50_000
+DENSITY_MODES = ('auto', 'exact', 'binned', 'hexbin', 'sample')
+
+
+def resolve_density(n_rows: int, density: str = 'auto', threshold: int = DENSITY_THRESHOLD,
+                    has_size: bool = True) -> str:
+    """Escolhe o modo de renderização.
+
+    Args:
+        n_rows: Número de pontos
+        density: 'auto', 'exact', 'binned', 'hexbin' ou 'sample'
+        threshold: Acima deste número de pontos, 'auto' deixa de ser exato
+        has_size: Se o gráfico codifica uma grandeza no tamanho do marcador
+
+    Returns:
+        str: Modo efetivo ('exact', 'binned', 'hexbin' ou 'sample')
+    """
+    if density not in DENSITY_MODES:
+        raise ValueError(f"Modo de densidade desconhecido: {density!r} (use um de {DENSITY_MODES})")
+    if density != 'auto':
+        return density
+    if n_rows <= threshold:
+        return 'exact'
+    return 'binned' if has_size else 'hexbin'
+
+
+def stratified_sample(df: pd.DataFrame, n: int, value_col: Optional[str] = 'streams',
+                      tail_fraction: float = 0.2) -> pd.DataFrame:
+    """Amostra de `n` linhas que mantém inteira a cauda de maiores valores.
+
+    As `n * tail_fraction` linhas com maior `value_col` entram sempre; o
+    restante é uma amostra sistemática ao longo da ordem de `value_col`,
+    ou seja, estratificada por faixa de valor. Sem `value_col`, a amostra
+    é sistemática na ordem das linhas.
+
+    Args:
+        df: Dados
+        n: Tamanho da amostra
+        value_col: Coluna cuja cauda superior é preservada
+        tail_fraction: Fração da amostra reservada para a cauda
+
+    Returns:
+        pd.DataFrame: Amostra (na ordem original das linhas)
+    """
+    if len(df) <= n:
+        return df
+    if value_col is None:
+        return df.iloc[np.linspace(0, len(df) - 1, n).astype('int64')]
+
+    values = df[value_col].to_numpy(dtype='float64', na_value=-np.inf)
+    n_tail = min(int(n * tail_fraction), n)
+    order = np.argsort(-values, kind='stable')
+    tail, rest = order[:n_tail], order[n_tail:]
+    picks = rest[np.linspace(0, len(rest) - 1, n - n_tail).astype('int64')]
+    return df.iloc[np.sort(np.concatenate([tail, picks]))]
+
+
+def bin_points(df: pd.DataFrame, x: str, y: str, size: Optional[str] = None,
+               hue: Optional[str] = None, bins: int = 60) -> pd.DataFrame:
+    """Agrega pontos em uma grade 2D regular.
+
+    Args:
+        df: Dados
+        x, y: Colunas dos eixos
+        size: Coluna somada por célula (ex.: 'streams')
+        hue: Coluna cuja média por célula define a cor
+        bins: Número de células por eixo
+
+    Returns:
+        pd.DataFrame: Uma linha por célula ocupada, com o centro (`x`, `y`),
+            `count`, `size_sum` (se `size`) e `hue_mean` (se `hue`)
+    """
+    xs = df[x].to_numpy(dtype='float64', na_value=np.nan)
+    ys = df[y].to_numpy(dtype='float64', na_value=np.nan)
+    valid = np.isfinite(xs) & np.isfinite(ys)
+    xs, ys = xs[valid], ys[valid]
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins)
+    occupied = counts > 0
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    grid_x, grid_y = np.meshgrid(x_centers, y_centers, indexing='ij')
+    binned = {x: grid_x[occupied], y: grid_y[occupied], 'count': counts[occupied]}
+
+    for column, label in ((size, 'size_sum'), (hue, 'hue_sum')):
+        if column is not None:
+            weights = np.nan_to_num(df[column].to_numpy(dtype='float64', na_value=np.nan)[valid])
+            totals, _, _ = np.histogram2d(xs, ys, bins=[x_edges, y_edges], weights=weights)
+            binned[label] = totals[occupied]
+    result = pd.DataFrame(binned)
+    if hue is not None:
+        result['hue_mean'] = result.pop('hue_sum') / result['count']
+    return result
+
+
+def draw_binned_scatter(ax, binned: pd.DataFrame, x: str, y: str,
+                        sizes: Tuple[float, float] = (20, 200), cmap: str = 'viridis',
+                        color_label: Optional[str] = None, alpha: float = 0.8):
+    """Desenha o resultado de `bin_points`: um marcador por célula.
+
+    O tamanho segue `size_sum` (ou `count`, sem coluna de tamanho) e a cor
+    segue `hue_mean` (ou `count`).
+    """
+    magnitude = binned['size_sum'] if 'size_sum' in binned else binned['count']
+    span = magnitude.max() - magnitude.min()
+    scale = (magnitude - magnitude.min()) / span if span > 0 else np.zeros(len(magnitude))
+    marker_sizes = sizes[0] + scale * (sizes[1] - sizes[0])
+    colors = binned['hue_mean'] if 'hue_mean' in binned else binned['count']
+    points = ax.scatter(binned[x], binned[y], s=marker_sizes, c=colors, cmap=cmap,
+                        alpha=alpha, edgecolor='black', linewidth=0.5)
+    colorbar = ax.figure.colorbar(points, ax=ax)
+    colorbar.set_label(color_label or ('média por célula' if 'hue_mean' in binned else 'músicas por célula'))
+    return points
+
+
+def draw_hexbin(ax, x, y, gridsize: int = 50, cmap: str = 'viridis', C=None):
+    """Hexbin de densidade (ou da média de `C` por hexágono)."""
+    hexes = ax.hexbin(x, y, C=C, gridsize=gridsize, cmap=cmap, mincnt=1)
+    ax.figure.colorbar(hexes, ax=ax).set_label('contagem' if C is None else 'média')
+    return hexes
+
+
+def prepare_density(df: pd.DataFrame, x: str, y: str, size: Optional[str] = None,
+                    hue: Optional[str] = None, density: str = 'auto',
+                    max_points: int = DENSITY_THRESHOLD) -> pd.DataFrame:
+    """Dados de um scatter plot já reduzidos ao que o modo de densidade desenha.
+
+    Returns:
+        pd.DataFrame: Pontos (modos 'exact', 'sample' e 'hexbin') ou células
+            de `bin_points` (modo 'binned'); o modo fica em `attrs['density']`
+    """
+    mode = resolve_density(len(df), density, max_points, has_size=size is not None)
+    columns = list(dict.fromkeys(column for column in (x, y, size, hue) if column is not None))
+    if mode == 'binned':
+        numeric_hue = hue if hue is not None and pd.api.types.is_numeric_dtype(df[hue]) else None
+        prepared = bin_points(df, x, y, size=size, hue=numeric_hue)
+    elif mode == 'sample':
+        prepared = stratified_sample(df[columns], max_points, value_col=size)
+    else:
+        prepared = df[columns]
+    prepared.attrs['density'] = mode
+    return prepared
+
+
+def render_density(prepared: pd.DataFrame, x: str, y: str, size: Optional[str] = None,
+                   hue: Optional[str] = None, sizes: Tuple[float, float] = (20, 200),
+                   ax=None, **scatter_kwargs) -> str:
+    """Desenha o resultado de `prepare_density`.
+
+    Nos modos 'exact' e 'sample' desenha com `sns.scatterplot` (repassando
+    `scatter_kwargs`); em 'binned' e 'hexbin' desenha a agregação.
+
+    Returns:
+        str: Modo desenhado
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    ax = ax if ax is not None else plt.gca()
+    mode = prepared.attrs.get('density', 'exact')
+    if mode in ('exact', 'sample'):
+        if size is not None:
+            scatter_kwargs.update(size=size, sizes=sizes)
+        sns.scatterplot(data=prepared, x=x, y=y, hue=hue, ax=ax, **scatter_kwargs)
+    elif mode == 'binned':
+        color_label = f'{hue} (média)' if 'hue_mean' in prepared else None
+        draw_binned_scatter(ax, prepared, x, y, sizes=sizes, color_label=color_label)
+    else:
+        weights = prepared[size] if size is not None else None
+        draw_hexbin(ax, prepared[x], prepared[y], C=weights)
+    return mode
+
+
+def density_scatter(df: pd.DataFrame, x: str, y: str, size: Optional[str] = None,
+                    hue: Optional[str] = None, density: str = 'auto',
+                    max_points: int = DENSITY_THRESHOLD, sizes: Tuple[float, float] = (20, 200),
+                    ax=None, **scatter_kwargs) -> str:
+    """Scatter plot que troca pontos individuais por agregação em dados grandes.
+
+    Combina `prepare_density` e `render_density`.
+
+    Args:
+        df: Dados
+        x, y: Colunas dos eixos
+        size: Coluna codificada no tamanho do marcador (ex.: 'streams')
+        hue: Coluna codificada na cor
+        density: 'auto', 'exact', 'binned', 'hexbin' ou 'sample'
+        max_points: Limite de pontos do modo 'auto' e tamanho da amostra
+        sizes: Faixa de tamanhos dos marcadores
+        ax: Eixo de destino (padrão: eixo atual)
+
+    Returns:
+        str: Modo efetivamente usado
+    """
+    prepared = prepare_density(df, x, y, size=size, hue=hue, density=density, max_points=max_points)
+    return render_density(prepared, x, y, size=size, hue=hue, sizes=sizes, ax=ax, **scatter_kwargs)
@@ -0,0 +1,285 @@
+"""Busca de músicas parecidas (k vizinhos mais próximos) pelas features de áudio.
+
+Cada música vira um vetor float32 com `danceability_%`, `energy_%`,
+`valence_%`, `acousticness_%` e `bpm` em [0, 1] (limites ajustados por
+`FeatureMatrixBuilder`), o tom (`key`) como um ponto no círculo
+cromático (cosseno e seno, então C# fica perto de C e de D) e o modo
+(`mode`). A distância é euclidiana. Três métodos:
+
+- 'brute': exato; multiplicações de matrizes em lotes de consultas x
+  blocos do índice, com `argpartition` para manter só os k melhores;
+- 'quantized': como 'brute', mas guarda os vetores em uint8 (4x menos
+  memória e disco); as distâncias são aproximadas;
+- 'kdtree': `sklearn.neighbors.KDTree`, exato; bom para poucas consultas
+  em dimensão baixa como esta.
+
+O índice é gravado em um único `.npz` (`save`/`load`), sem pickle.
+"""
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .artist_index import ARTIST_COLUMN, top_positions
+from .data_preprocessing import KEY_CATEGORIES
+from .features import FeatureMatrixBuilder
+
+SIMILARITY_FEATURES = ['danceability_%', 'energy_%', 'valence_%', 'acousticness_%', 'bpm']
+METHODS = ('brute', 'quantized', 'kdtree')
+
+# Relative weight of the key (pitch class on the chromatic circle) and the mode
+KEY_WEIGHT = 0.5
+MODE_WEIGHT = 0.5
+
+# Bound on the (queries x index block) distance matrix of the brute-force search
+_BLOCK_ELEMENTS = 1 << 23
+
+_PITCH_CLASS = {name: position for position, name in enumerate(KEY_CATEGORIES[:12])}
+
+
+def _key_mode_columns(df: pd.DataFrame) -> np.ndarray:
+    """Tom como (cos, sin) no círculo cromático e modo (1 = maior); ausentes viram 0."""
+    n = len(df)
+    encoded = np.zeros((n, 3), dtype='float32')
+    if 'key' in df.columns:
+        pitch = df['key'].astype(object).map(_PITCH_CLASS).to_numpy(dtype='float64', na_value=np.nan)
+        known = ~np.isnan(pitch)
+        angle = 2 * np.pi * pitch[known] / 12
+        encoded[known, 0] = KEY_WEIGHT * np.cos(angle)
+        encoded[known, 1] = KEY_WEIGHT * np.sin(angle)
+    if 'mode' in df.columns:
+        encoded[:, 2] = MODE_WEIGHT * (df['mode'].astype(object) == 'Major').to_numpy(dtype='float32')
+    return encoded
+
+
+def _top_k(distances: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Os k menores de cada linha, ordenados por distância e depois por id."""
+    if distances.shape[1] > k:
+        keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        distances = np.take_along_axis(distances, keep, axis=1)
+        ids = np.take_along_axis(ids, keep, axis=1)
+    order = np.lexsort((ids, distances), axis=1)
+    return np.take_along_axis(distances, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+class SimilarityIndex:
+    """Índice de vizinhos mais próximos sobre as features de áudio.
+
+    Use `SimilarityIndex.build(df)` para criar. As posições devolvidas
+    pelas consultas são posições de linha (`iloc`) do DataFrame original.
+
+    Args:
+        vectors: Vetores das músicas indexadas (float32)
+        positions: Posição de cada vetor no DataFrame original
+        builder: Escala ajustada das features numéricas
+        method: 'brute', 'quantized' ou 'kdtree'
+    """
+
+    def __init__(self, vectors: np.ndarray, positions: np.ndarray, builder: FeatureMatrixBuilder,
+                 method: str = 'brute'):
+        if method not in METHODS:
+            raise ValueError(f"Método desconhecido: {method!r} (use {', '.join(METHODS)})")
+        self.method = method
+        self.positions = np.asarray(positions, dtype='int64')
+        self.builder = builder
+        self.dimensions = vectors.shape[1]
+        self.vectors: Optional[np.ndarray] = None
+        self.codes: Optional[np.ndarray] = None
+        self._tree = None
+        self._squared_norms: Optional[np.ndarray] = None
+        if method == 'quantized':
+            self.code_low = vectors.min(axis=0) if len(vectors) else np.zeros(self.dimensions, 'float32')
+            spread = (vectors.max(axis=0) - self.code_low) if len(vectors) else np.ones(self.dimensions)
+            self.code_step = np.where(spread > 0, spread / 255, 1.0).astype('float32')
+            self.codes = np.rint((vectors - self.code_low) / self.code_step).astype('uint8')
+        else:
+            self.vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if method == 'kdtree':
+            try:
+                from sklearn.neighbors import KDTree
+            except ImportError:
+                raise ImportError("O método 'kdtree' requer o pacote scikit-learn instalado")
+            self._tree = KDTree(self.vectors)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, method: str = 'brute', top: Optional[int] = None) -> 'SimilarityIndex':
+        """Indexa as músicas de `df`.
+
+        Args:
+            df: Dados limpos (features em %, `bpm`, `key`, `mode`)
+            method: 'brute', 'quantized' ou 'kdtree'
+            top: Indexa só as `top` músicas com mais streams
+
+        Returns:
+            SimilarityIndex: Índice pronto para `query`/`similar_to`
+        """
+        positions = top_positions(df, 'streams', top) if top is not None else np.arange(len(df))
+        subset = df.iloc[positions]
+        builder = FeatureMatrixBuilder({feature: 'minmax' for feature in SIMILARITY_FEATURES}).fit(subset)
+        return cls(cls._encode(subset, builder), positions, builder, method)
+
+    @staticmethod
+    def _encode(df: pd.DataFrame, builder: FeatureMatrixBuilder) -> np.ndarray:
+        return np.ascontiguousarray(np.hstack([builder.transform(df), _key_mode_columns(df)]))
+
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        """Vetores de `df` na escala do índice (para usar em `query`)."""
+        return self._encode(df, self.builder)
+
+    def _block_vectors(self, start: int, end: int) -> np.ndarray:
+        if self.codes is not None:
+            return self.codes[start:end] * self.code_step + self.code_low
+        return self.vectors[start:end]
+
+    def _norms(self) -> np.ndarray:
+        """|x|^2 of every indexed vector (of the dequantized vector for 'quantized')."""
+        if self._squared_norms is None:
+            norms = np.empty(len(self), dtype='float32')
+            for start in range(0, len(self), 1 << 16):
+                block = self._block_vectors(start, start + (1 << 16))
+                norms[start:start + len(block)] = np.einsum('ij,ij->i', block, block)
+            self._squared_norms = norms
+        return self._squared_norms
+
+    def _brute_force(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        norms = self._norms()
+        block_rows = max(1024, _BLOCK_ELEMENTS // max(len(queries), 1))
+        best_distances = np.empty((len(queries), 0), dtype='float32')
+        best_ids = np.empty((len(queries), 0), dtype='int64')
+        for start in range(0, len(self), block_rows):
+            block = self._block_vectors(start, start + block_rows)
+            # |q - x|^2 = |q|^2 + |x|^2 - 2 q.x; |q|^2 does not change the ranking, so it is added at the end
+            distances = queries @ block.T
+            distances *= -2
+            distances += norms[start:start + len(block)]
+            if distances.shape[1] > k:
+                keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+                distances = np.take_along_axis(distances, keep, axis=1)
+                ids = keep + start
+            else:
+                ids = np.broadcast_to(np.arange(start, start + len(block)), distances.shape)
+            best_distances, best_ids = _top_k(np.hstack([best_distances, distances]),
+                                              np.hstack([best_ids, ids]), k)
+        best_distances += np.einsum('ij,ij->i', queries, queries)[:, None]
+        # Rounding can leave tiny negatives for identical vectors
+        return np.sqrt(np.maximum(best_distances, 0)), best_ids
+
+    def query(self, queries: np.ndarray, k: int = 10,
+              batch_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        """Os k vizinhos mais próximos de cada vetor de consulta.
+
+        Args:
+            queries: Matriz (consultas x dimensões), ex. de `encode`
+            k: Número de vizinhos
+            batch_size: Consultas processadas por vez
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Distâncias e posições no
+                DataFrame original, ambas (consultas x k), da mais próxima
+                para a mais distante
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype='float32'))
+        if queries.shape[1] != self.dimensions:
+            raise ValueError(f"As consultas têm {queries.shape[1]} dimensões; o índice tem {self.dimensions}")
+        k = min(k, len(self))
+        distances = np.empty((len(queries), k), dtype='float32')
+        ids = np.empty((len(queries), k), dtype='int64')
+        for start in range(0, len(queries), batch_size):
+            batch = queries[start:start + batch_size]
+            if self._tree is not None:
+                batch_distances, batch_ids = self._tree.query(batch, k=k)
+            else:
+                batch_distances, batch_ids = self._brute_force(batch, k)
+            distances[start:start + len(batch)] = batch_distances
+            ids[start:start + len(batch)] = batch_ids
+        return distances, self.positions[ids]
+
+    def similar_to(self, df: pd.DataFrame, rows: Union[int, Sequence[int]], k: int = 10,
+                   exclude_self: bool = True) -> pd.DataFrame:
+        """Músicas mais parecidas com as linhas `rows` (posições) de `df`.
+
+        Args:
+            df: O DataFrame usado em `build`
+            rows: Posição (ou posições) das músicas de referência
+            k: Número de músicas parecidas por referência
+            exclude_self: Não devolve a própria música de referência
+
+        Returns:
+            pd.DataFrame: Uma linha por (referência, vizinho) com `query`,
+                `rank`, `position`, `distance`, `track_name`,
+                `artist(s)_name` e `streams`
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype='int64'))
+        extra = 1 if exclude_self else 0
+        distances, positions = self.query(self.encode(df.iloc[rows]), k + extra)
+        if exclude_self:
+            # Drop the reference itself, or the last neighbour when it is not among them
+            keep = positions != rows[:, None]
+            keep[keep.all(axis=1), -1] = False
+            distances = distances[keep].reshape(len(rows), -1)
+            positions = positions[keep].reshape(len(rows), -1)
+        result = pd.DataFrame({
+            'query': np.repeat(rows, positions.shape[1]),
+            'rank': np.tile(np.arange(1, positions.shape[1] + 1), len(rows)),
+            'position': positions.ravel(),
+            'distance': distances.ravel(),
+        })
+        details = df.iloc[result['position']][['track_name', ARTIST_COLUMN, 'streams']].reset_index(drop=True)
+        return pd.concat([result, details], axis=1)
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Grava o índice em `.npz` (a árvore do 'kdtree' é refeita no `load`)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {'method': self.method, 'features': self.builder.to_dict()}
+        arrays: Dict[str, np.ndarray] = {'positions': self.positions, 'meta': np.array(json.dumps(meta))}
+        if self.codes is not None:
+            arrays.update(codes=self.codes, code_low=self.code_low, code_step=self.code_step)
+        else:
+            arrays['vectors'] = self.vectors
+        tmp_path = path.with_name(f'.{path.name}.tmp.npz')
+        np.savez(tmp_path, **arrays)
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'SimilarityIndex':
+        """Lê um índice gravado por `save`."""
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(str(archive['meta']))
+            builder = FeatureMatrixBuilder.from_dict(meta['features'])
+            if 'codes' in archive:
+                index = cls.__new__(cls)
+                index.method = meta['method']
+                index.positions = archive['positions']
+                index.builder = builder
+                index.codes = archive['codes']
+                index.code_low = archive['code_low']
+                index.code_step = archive['code_step']
+                index.dimensions = index.codes.shape[1]
+                index.vectors = None
+                index._tree = None
+                index._squared_norms = None
+                return index
+            return cls(archive['vectors'], archive['positions'], builder, meta['method'])
+
+
+def recall_at_k(expected: np.ndarray, found: np.ndarray) -> float:
+    """Fração dos vizinhos exatos (`expected`) presentes em `found`, por linha."""
+    hits = [len(np.intersect1d(truth, answer)) for truth, answer in zip(expected, found)]
+    return float(np.sum(hits) / expected.size) if expected.size else 1.0
+
+
+def similar_tracks(df: pd.DataFrame, rows: Union[int, List[int]], k: int = 10,
+                   top: Optional[int] = None, method: str = 'brute') -> pd.DataFrame:
+    """Atalho para `SimilarityIndex.build(df, method, top).similar_to(df, rows, k)`.
+
+    Ex.: as 10 músicas entre as 500 mais tocadas que mais se parecem com a
+    primeira linha: `similar_tracks(df, 0, top=500)`.
+    """
+    return SimilarityIndex.build(df, method, top).similar_to(df, rows, k)
@@ -0,0 +1,217 @@
+"""Acumuladores de estatísticas que podem ser combinados entre blocos e processos.
+
+- `RunningMoments`: contagem, média, variância, mínimo e máximo exatos
+  (Welford/Chan), para várias colunas ao mesmo tempo.
+- `KLLSketch`: quantis aproximados em memória O(k log(n/k)).
+
+Limite de erro do `KLLSketch`: o erro de rank normalizado é O(1/k). Para o
+k padrão (200), o Apache DataSketches documenta cerca de 1,65% com 99% de
+confiança para o KLL; esta implementação (compactação aleatória, sem a
+compactação preguiçosa da versão de referência) fica na mesma ordem. Ou
+seja, a mediana estimada está entre os quantis ~48,35% e ~51,65% reais.
+Enquanto n <= k nenhum item é descartado e os quantis são exatos.
+"""
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class RunningMoments:
+    """Contagem, média, variância, mínimo e máximo de várias colunas.
+
+    Cada bloco é resumido com NumPy e combinado pelas fórmulas de Chan,
+    estáveis mesmo com médias grandes como as de `streams`.
+    """
+
+    def __init__(self, n_columns: int):
+        self.count = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        total = self.count + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean - self.mean
+            weight = np.where(total > 0, count / total, 0.0)
+            self.mean = self.mean + delta * weight
+            self.m2 = self.m2 + m2 + delta ** 2 * self.count * weight
+        self.count = total
+        self.min = np.minimum(self.min, minimum)
+        self.max = np.maximum(self.max, maximum)
+
+    def update(self, values: np.ndarray) -> 'RunningMoments':
+        """Acrescenta um bloco (linhas x colunas); NaN é ignorado."""
+        values = np.asarray(values, dtype='float64').reshape(len(values), -1)
+        present = ~np.isnan(values)
+        count = present.sum(axis=0).astype('float64')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, np.where(present, values, 0.0).sum(axis=0) / count, 0.0)
+        m2 = (np.where(present, values - mean, 0.0) ** 2).sum(axis=0)
+        minimum = np.where(present, values, np.inf).min(axis=0, initial=np.inf)
+        maximum = np.where(present, values, -np.inf).max(axis=0, initial=-np.inf)
+        self._combine(count, mean, m2, minimum, maximum)
+        return self
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        """Incorpora outro acumulador (ex.: de outro processo)."""
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Variância amostral (ddof=1), como no pandas."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+
+class KLLSketch:
+    """Sketch KLL de quantis para um fluxo de números.
+
+    Args:
+        k: Parâmetro de precisão (maior = mais preciso e mais memória)
+        seed: Semente da escolha aleatória nas compactações
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            # With an odd count, one item stays behind at this level
+            keep = items[:1] if len(items) % 2 else items[:0]
+            pairs = items[len(keep):]
+            promoted = pairs[self._rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # Capacities shrink as levels are added; re-check from the bottom
+            level = 0
+
+    def update(self, values) -> 'KLLSketch':
+        """Acrescenta valores; NaN é ignorado."""
+        values = np.asarray(values, dtype='float64').ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Incorpora outro sketch com o mesmo k."""
+        if other.k != self.k:
+            raise ValueError(f"Sketches com k diferentes não podem ser combinados ({self.k} != {other.k})")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Quantis aproximados (`q` entre 0 e 1, escalar ou lista).
+
+        Usa interpolação linear entre itens vizinhos, como `np.quantile`.
+        """
+        scalar = np.ndim(q) == 0
+        q = np.atleast_1d(np.asarray(q, dtype='float64'))
+        if self.n == 0:
+            result = np.full(len(q), np.nan)
+        else:
+            items, cumulative = self._weighted_items()
+            # Position of each item in the (weighted) sorted stream, from 0 to total-1
+            positions = cumulative - (cumulative - np.concatenate([[0.0], cumulative[:-1]]) + 1) / 2
+            target = q * (cumulative[-1] - 1)
+            result = np.interp(target, positions, items)
+        return result[0] if scalar else result
+
+    def rank(self, values) -> np.ndarray:
+        """Fração estimada de itens menores ou iguais a cada valor (CDF)."""
+        values = np.asarray(values, dtype='float64')
+        if self.n == 0:
+            return np.full(values.shape, np.nan)
+        items, cumulative = self._weighted_items()
+        index = np.searchsorted(items, values, side='right')
+        ranks = np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0.0) / cumulative[-1]
+        return np.where(np.isnan(values), np.nan, ranks)
+
+
+class StreamingStats:
+    """Estatísticas de `describe()` calculadas bloco a bloco.
+
+    Média, desvio padrão, mínimo, máximo e contagem são exatos; os quartis
+    e a mediana vêm de um `KLLSketch` por coluna (ver limite de erro no
+    início do módulo).
+
+    Args:
+        columns: Colunas acompanhadas
+        k: Parâmetro de precisão dos sketches de quantis
+    """
+
+    def __init__(self, columns: Iterable[str], k: int = 200):
+        self.columns = list(columns)
+        self.moments = RunningMoments(len(self.columns))
+        self.sketches = [KLLSketch(k) for _ in self.columns]
+
+    def update(self, chunk: pd.DataFrame) -> 'StreamingStats':
+        """Acrescenta um bloco de dados."""
+        values = chunk[self.columns].to_numpy(dtype='float64', na_value=np.nan)
+        self.moments.update(values)
+        for position, sketch in enumerate(self.sketches):
+            sketch.update(values[:, position])
+        return self
+
+    def merge(self, other: 'StreamingStats') -> 'StreamingStats':
+        """Incorpora o acumulador de outro bloco ou processo."""
+        if other.columns != self.columns:
+            raise ValueError("Acumuladores com colunas diferentes não podem ser combinados")
+        self.moments.merge(other.moments)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        return self
+
+    def describe(self) -> pd.DataFrame:
+        """Resumo no mesmo formato de `DataFrame.describe()`."""
+        quartiles = np.array([sketch.quantile([0.25, 0.5, 0.75]) for sketch in self.sketches]).T
+        moments = self.moments
+        empty = moments.count == 0
+        rows = {
+            'count': moments.count,
+            'mean': np.where(empty, np.nan, moments.mean),
+            'std': moments.std,
+            'min': np.where(empty, np.nan, moments.min),
+            '25%': quartiles[0],
+            '50%': quartiles[1],
+            '75%': quartiles[2],
+            'max': np.where(empty, np.nan, moments.max),
+        }
+        return pd.DataFrame(rows, index=self.columns).T
@@ -5,6 +5,19 @@ import pandas as pd
 from typing import Optional, List, Union
 from matplotlib import ticker
 
+from .artist_index import get_artist_index, top_rows
+from .correlation import correlation_matrix
+from .instrumentation import instrumented
+from .rollups import get_rollup
+from .scatter_density import (DENSITY_THRESHOLD, density_scatter, draw_hexbin, prepare_density,
+                              render_density, resolve_density)
+
+MONTH_NAMES = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+# Plots are split into a pure `prepare_*` step, which reduces the data to a
+# small tidy frame without touching the input, and a `render_*` step that only
+# draws it. `plot_*` chains both.
+
 def plot_data(data, figsize=(18, 6), title="Visualização dos Dados"):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=figsize)
@@ -27,14 +40,15 @@ def create_histogram(data, bins=20, title='Histograma'):
     plt.tight_layout()
     plt.show()
 
-def create_scatterplot(df, x, y, hue=None, title='Scatter Plot'):
+def create_scatterplot(df, x, y, hue=None, title='Scatter Plot', density='auto', max_points=DENSITY_THRESHOLD):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(12, 6))
-    sns.scatterplot(data=df, x=x, y=y, hue=hue, palette='viridis', s=100, alpha=0.7, edgecolor='black')
+    mode = density_scatter(df, x, y, hue=hue, density=density, max_points=max_points, palette='viridis', s=100, alpha=0.7, edgecolor='black')
     plt.title(title, fontsize=18, pad=20, fontweight='bold')
     plt.xlabel(x, fontsize=14)
     plt.ylabel(y, fontsize=14)
-    plt.legend(title=hue, fontsize=12)
+    if mode in ('exact', 'sample'):
+        plt.legend(title=hue, fontsize=12)
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.show()
@@ -51,10 +65,18 @@ def create_barplot(df, x, y, title='Bar Plot'):
     plt.tight_layout()
     plt.show()
 
-def generate_scatter_plot(x, y):
+def generate_scatter_plot(x, y, density='auto', max_points=DENSITY_THRESHOLD):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(10, 6))
-    plt.scatter(x, y, alpha=0.7, color='#1f77b4', edgecolor='black')
+    x, y = np.asarray(x), np.asarray(y)
+    mode = resolve_density(len(x), density, max_points, has_size=False)
+    if mode in ('binned', 'hexbin'):
+        draw_hexbin(plt.gca(), x, y)
+    else:
+        if mode == 'sample' and len(x) > max_points:
+            picks = np.linspace(0, len(x) - 1, max_points).astype('int64')
+            x, y = x[picks], y[picks]
+        plt.scatter(x, y, alpha=0.7, color='#1f77b4', edgecolor='black')
     plt.title('Scatter Plot', fontsize=18, pad=20, fontweight='bold')
     plt.xlabel('X-axis', fontsize=14)
     plt.ylabel('Y-axis', fontsize=14)
@@ -62,50 +84,111 @@ def generate_scatter_plot(x, y):
     plt.tight_layout()
     plt.show()
 
-def plot_streams_distribution(df):
+def _log_histogram(values, bins: int = 50) -> pd.DataFrame:
+    values = np.asarray(values, dtype='float64')
+    values = values[np.isfinite(values) & (values > 0)]
+    if len(values) == 0:
+        return pd.DataFrame({'bin_left': [], 'bin_right': [], 'count': []})
+    edges = np.logspace(np.log10(values.min()), np.log10(values.max()), bins + 1)
+    # logspace round-off can leave the extremes just outside the outer edges
+    edges[0], edges[-1] = values.min(), values.max()
+    counts, edges = np.histogram(values, bins=edges)
+    return pd.DataFrame({'bin_left': edges[:-1], 'bin_right': edges[1:], 'count': counts})
+
+def _log_kde(values, centers, bin_widths_log, gridsize: int = 1024) -> np.ndarray:
+    """KDE gaussiana em log10 (largura de Scott, como o seaborn), em contagem por bin.
+
+    Calculada sobre um histograma fino com convolução, então o custo é linear
+    no número de linhas.
+    """
+    logs = np.log10(np.asarray(values, dtype='float64'))
+    logs = logs[np.isfinite(logs)]
+    if len(logs) < 2 or logs.std() == 0:
+        return np.full(len(centers), np.nan)
+    bandwidth = logs.std(ddof=1) * len(logs) ** (-1 / 5)
+    low, high = logs.min() - 3 * bandwidth, logs.max() + 3 * bandwidth
+    grid_counts, grid_edges = np.histogram(logs, bins=gridsize, range=(low, high))
+    step = grid_edges[1] - grid_edges[0]
+    offsets = np.arange(-int(np.ceil(4 * bandwidth / step)), int(np.ceil(4 * bandwidth / step)) + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(grid_counts, kernel / (kernel.sum() * step), mode='same') / len(logs)
+    grid_centers = (grid_edges[:-1] + grid_edges[1:]) / 2
+    return np.interp(np.log10(centers), grid_centers, density) * len(logs) * bin_widths_log
+
+@instrumented()
+def prepare_streams_distribution(df, bins=50):
+    return _log_histogram(df['streams'].to_numpy(dtype='float64', na_value=np.nan), bins)
+
+@instrumented()
+def render_streams_distribution(hist):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(16, 9))
-    sns.histplot(data=df, x='streams', bins=50, log_scale=True, color='#1f77b4', edgecolor='black')
+    plt.stairs(hist['count'], np.append(hist['bin_left'].to_numpy(), hist['bin_right'].iloc[-1:]), fill=True, color='#1f77b4', edgecolor='black')
+    plt.xscale('log')
     plt.title('Distribuição de Streams: 99% dos dados abaixo de 1 Bilhão\n(Escala Logarítmica)', fontsize=22, pad=25, fontweight='bold')
     plt.xlabel('Streams', fontsize=18, labelpad=15)
     plt.ylabel('Contagem de Músicas', fontsize=18, labelpad=15)
     plt.xticks([10**4, 10**6, 10**8, 10**9], ['10 mil', '1 milhão', '100 milhões', '1 bilhão'], fontsize=14)
-    max_count = df['streams'].value_counts().max()
+    max_count = int(hist['count'].max())
     plt.annotate(f'Pico: {max_count//1000}K músicas\nentre 10-100 milhões', xy=(10**7, max_count), xytext=(10**8, max_count*0.8), arrowprops=dict(facecolor='#e74c3c', shrink=0.05), fontsize=14, color='#e74c3c')
     plt.grid(True, linestyle=':', alpha=0.7)
     plt.tight_layout()
     plt.savefig('streams_distribution.png', dpi=300, bbox_inches='tight')
     plt.show()
 
-def plot_feature_correlation_matrix(data, features: Optional[List[str]] = None):
+def plot_streams_distribution(df):
+    render_streams_distribution(prepare_streams_distribution(df))
+
+@instrumented()
+def prepare_feature_correlation_matrix(data, features: Optional[List[str]] = None):
     if features is None:
-        features = ['danceability', 'energy', 'valence', 'bpm', 'streams']
+        features = ['danceability_%', 'energy_%', 'valence_%', 'bpm', 'streams']
+    return correlation_matrix(data, features)
+
+@instrumented()
+def render_feature_correlation_matrix(corr):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(10, 8))
-    sns.heatmap(data[features].corr(), annot=True, cmap='coolwarm', center=0, linewidths=0.5, linecolor='black')
+    sns.heatmap(corr, annot=True, cmap='coolwarm', center=0, linewidths=0.5, linecolor='black')
     plt.title('Feature Correlation Matrix', fontsize=18, pad=20, fontweight='bold')
     plt.tight_layout()
     plt.show()
 
-def plot_top_artists(df: pd.DataFrame, n: int = 10):
+def plot_feature_correlation_matrix(data, features: Optional[List[str]] = None):
+    render_feature_correlation_matrix(prepare_feature_correlation_matrix(data, features))
+
+@instrumented()
+def prepare_top_artists(df: pd.DataFrame, n: int = 10, split_collaborations: bool = False):
+    top_artists = get_artist_index(df, split_collaborations).top(n)
+    return pd.DataFrame({'artist': top_artists.index, 'count': top_artists.to_numpy()})
+
+@instrumented()
+def render_top_artists(top_artists):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(15, 8))
-    top_artists = df['artist(s)_name'].value_counts().head(n)
-    sns.barplot(x=top_artists.values, y=top_artists.index, palette='viridis', edgecolor='black')
+    sns.barplot(data=top_artists, x='count', y='artist', hue='artist', palette='viridis', edgecolor='black', legend=False)
     plt.title('Top Artistas por Número de Músicas', fontsize=18, pad=20, fontweight='bold')
     plt.xlabel('Número de Músicas', fontsize=14)
     plt.ylabel('Artista', fontsize=14)
     plt.tight_layout()
     plt.show()
 
-def plot_streams_by_year(df: pd.DataFrame):
+def plot_top_artists(df: pd.DataFrame, n: int = 10, split_collaborations: bool = False):
+    render_top_artists(prepare_top_artists(df, n, split_collaborations))
+
+@instrumented()
+def prepare_streams_by_year(df: pd.DataFrame):
+    # Yearly totals come from the cached temporal rollup, not from the rows
+    return get_rollup(df).stats('streams', 'year')[['sum', 'mean']].reset_index()
+
+@instrumented()
+def render_streams_by_year(yearly_data):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(18, 9))
-    yearly_data = df.groupby(df['released_date'].dt.year)['streams'].agg(['sum', 'mean'])
-    years = yearly_data.index.astype(int)
+    years = yearly_data['year']
     plt.fill_between(years, yearly_data['sum']/1e9, alpha=0.3, color='#1f77b4')
     sns.lineplot(x=years, y=yearly_data['sum']/1e9, color='#1f77b4', linewidth=4, label='Streams Totais (Bilhões)')
-    last_year = years[-1]
+    last_year = years.iloc[-1]
     plt.scatter(last_year, yearly_data['sum'].iloc[-1]/1e9, s=300, color='#e74c3c', zorder=5, edgecolor='black')
     plt.annotate(f'+{((yearly_data["sum"].iloc[-1]/yearly_data["sum"].iloc[-2])-1)*100:.0f}% vs anterior', (last_year, yearly_data['sum'].iloc[-1]/1e9), textcoords="offset points", xytext=(0,15), ha='center', fontsize=14, color='#e74c3c')
     plt.title('Crescimento Explosivo de Streams: 2019-2023', fontsize=24, pad=30, fontweight='bold')
@@ -118,10 +201,17 @@ def plot_streams_by_year(df: pd.DataFrame):
     plt.savefig('streams_growth.png', dpi=300)
     plt.show()
 
-def plot_correlation_matrix(df, columns=None):
+def plot_streams_by_year(df: pd.DataFrame):
+    render_streams_by_year(prepare_streams_by_year(df))
+
+@instrumented()
+def prepare_correlation_matrix(df, columns=None):
     if columns is None:
-        columns = df.select_dtypes(include=['float64', 'int64']).columns
-    corr_matrix = df[columns].corr()
+        columns = df.select_dtypes(include='number').columns
+    return correlation_matrix(df, list(columns))
+
+@instrumented()
+def render_correlation_matrix(corr_matrix):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(10, 8))
     sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0, linewidths=0.5, linecolor='black')
@@ -129,12 +219,19 @@ def plot_correlation_matrix(df, columns=None):
     plt.tight_layout()
     plt.show()
 
-def plot_top_items(df, value_col, label_col, n=10, title=None):
+def plot_correlation_matrix(df, columns=None):
+    render_correlation_matrix(prepare_correlation_matrix(df, columns))
+
+@instrumented()
+def prepare_top_items(df, value_col, label_col, n=10):
+    return top_rows(df, value_col, n)[[label_col, value_col]].reset_index(drop=True)
+
+@instrumented()
+def render_top_items(top_items, value_col, label_col, title=None):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(12, 6))
-    top_items = df.nlargest(n, value_col)
-    sns.barplot(x=value_col, y=label_col, data=top_items, palette='viridis', edgecolor='black')
-    plt.title(title or f'Top {n} {label_col} by {value_col}', fontsize=18, pad=20, fontweight='bold')
+    sns.barplot(x=value_col, y=label_col, data=top_items, hue=label_col, palette='viridis', edgecolor='black', legend=False)
+    plt.title(title or f'Top {len(top_items)} {label_col} by {value_col}', fontsize=18, pad=20, fontweight='bold')
     plt.xlabel(value_col, fontsize=14)
     plt.ylabel(label_col, fontsize=14)
     plt.xticks(rotation=45)
@@ -142,10 +239,18 @@ def plot_top_items(df, value_col, label_col, n=10, title=None):
     plt.tight_layout()
     plt.show()
 
-def plot_danceability_vs_energy(df):
+def plot_top_items(df, value_col, label_col, n=10, title=None):
+    render_top_items(prepare_top_items(df, value_col, label_col, n), value_col, label_col, title)
+
+@instrumented()
+def prepare_danceability_vs_energy(df, density='auto', max_points=DENSITY_THRESHOLD):
+    return prepare_density(df, 'danceability_%', 'energy_%', size='streams', hue='in_spotify_charts', density=density, max_points=max_points)
+
+@instrumented()
+def render_danceability_vs_energy(points):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(18, 10))
-    scatter = sns.scatterplot(data=df, x='danceability_%', y='energy_%', size='streams', hue='in_spotify_charts', sizes=(50, 800), palette='viridis', alpha=0.9, edgecolor='black', linewidth=0.5)
+    mode = render_density(points, 'danceability_%', 'energy_%', size='streams', hue='in_spotify_charts', sizes=(50, 800), palette='viridis', alpha=0.9, edgecolor='black', linewidth=0.5)
     plt.title('Músicas Mais Populares: Alta Energia + Alta Dançabilidade', fontsize=24, pad=30, fontweight='bold')
     plt.xlabel('Dançabilidade (%)', fontsize=18)
     plt.ylabel('Energia (%)', fontsize=18)
@@ -155,21 +260,32 @@ def plot_danceability_vs_energy(df):
     ax = plt.gca()
     ax.xaxis.grid(False)
     ax.yaxis.grid(False)
-    plt.legend(title='Posição nos Charts\n(e Tamanho = Streams)', title_fontsize=14, fontsize=12, frameon=True, framealpha=0.9, loc='lower left')
+    if mode in ('exact', 'sample'):
+        plt.legend(title='Posição nos Charts\n(e Tamanho = Streams)', title_fontsize=14, fontsize=12, frameon=True, framealpha=0.9, loc='lower left')
     plt.tight_layout()
     plt.savefig('dance_energy.png', dpi=300, transparent=True)
     plt.show()
 
-def plot_releases_by_month(df):
+def plot_danceability_vs_energy(df, density='auto', max_points=DENSITY_THRESHOLD):
+    render_danceability_vs_energy(prepare_danceability_vs_energy(df, density, max_points))
+
+@instrumented()
+def prepare_releases_by_month(df):
+    releases = get_rollup(df).releases('month_of_year')
+    counts = np.zeros(12, dtype='int64')
+    counts[releases.index.to_numpy() - 1] = releases.to_numpy()
+    present = counts > 0
+    df_month = pd.DataFrame({
+        'month_name': pd.Categorical(np.array(MONTH_NAMES)[present], categories=MONTH_NAMES, ordered=True),
+        'count': counts[present],
+    })
+    df_month['percentage'] = (df_month['count'] / df_month['count'].sum()) * 100
+    return df_month
+
+@instrumented()
+def render_releases_by_month(df_month):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(14, 7))
-    month_order = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
-    df['month_name'] = df['mes'].map(lambda x: month_order[x-1])
-    df_month = df.groupby('month_name').size().reset_index(name='count')
-    total = df_month['count'].sum()
-    df_month['percentage'] = (df_month['count'] / total) * 100
-    df_month['month_name'] = pd.Categorical(df_month['month_name'], categories=month_order, ordered=True)
-    df_month = df_month.sort_values('month_name')
     bar = sns.barplot(x='month_name', y='count', data=df_month, hue='month_name', palette='plasma', edgecolor='black', legend=False)
     plt.title('Distribuição Mensal de Lançamentos Musicais', fontsize=18, pad=20, fontweight='bold')
     plt.xlabel('Mês', fontsize=14)
@@ -183,32 +299,64 @@ def plot_releases_by_month(df):
     plt.savefig('releases_by_month.png', dpi=300, bbox_inches='tight')
     plt.show()
 
-def plot_streams_evolution(df):
+def plot_releases_by_month(df):
+    render_releases_by_month(prepare_releases_by_month(df))
+
+@instrumented()
+def prepare_streams_evolution(df):
+    # By `released_year`: songs with an invalid release day still count
+    yearly = get_rollup(df).stats('streams', 'year', partial=True)
+    return pd.DataFrame({
+        'year': yearly.index.astype(int),
+        'total_billions': yearly['sum'].to_numpy() / 1e9,
+        'avg_millions': yearly['mean'].to_numpy() / 1e6,
+    })
+
+@instrumented()
+def render_streams_evolution(yearly):
     plt.style.use('seaborn-v0_8-whitegrid')
     plt.figure(figsize=(18, 9))
-    years = df['released_year'].unique()
-    total_streams = df.groupby('released_year')['streams'].sum() / 1e9
-    avg_streams = df.groupby('released_year')['streams'].mean() / 1e6
-    ax = sns.barplot(x=years, y=total_streams, color='#1f77b4', alpha=0.9, edgecolor='black')
+    # Bars sit at categorical positions 0..n-1; the line and the annotation use the same positions
+    positions = np.arange(len(yearly))
+    ax = sns.barplot(x=positions, y=yearly['total_billions'].to_numpy(), color='#1f77b4', alpha=0.9, edgecolor='black')
+    ax.set_xticks(positions, yearly['year'].astype(str))
     plt.title('Crescimento de Streams: 2017-2023\n(Total vs Média por Música)', fontsize=22, pad=25, fontweight='bold')
     ax2 = ax.twinx()
-    sns.lineplot(x=years, y=avg_streams, color='#e74c3c', marker='o', markersize=10, linewidth=3, ax=ax2)
+    sns.lineplot(x=positions, y=yearly['avg_millions'].to_numpy(), color='#e74c3c', marker='o', markersize=10, linewidth=3, ax=ax2)
     ax.set_ylabel('Streams Totais (Bilhões)', fontsize=16, color='#1f77b4')
     ax2.set_ylabel('Média por Música (Milhões)', fontsize=16, color='#e74c3c')
     ax.tick_params(axis='y', colors='#1f77b4')
     ax2.tick_params(axis='y', colors='#e74c3c')
-    max_year = total_streams.idxmax()
-    plt.annotate(f'+{((total_streams[max_year]/total_streams[max_year-1])-1)*100:.0f}% vs {max_year-1}', xy=(max_year, total_streams[max_year]), xytext=(max_year-0.5, total_streams[max_year]*0.8), arrowprops=dict(arrowstyle='->', color='#2c3e50', lw=2), fontsize=14)
+    peak = int(yearly['total_billions'].to_numpy().argmax())
+    if peak > 0:
+        total, previous = yearly['total_billions'].iloc[peak], yearly['total_billions'].iloc[peak - 1]
+        ax.annotate(f'+{((total/previous)-1)*100:.0f}% vs {yearly["year"].iloc[peak - 1]}', xy=(peak, total), xytext=(peak-0.5, total*0.8), arrowprops=dict(arrowstyle='->', color='#2c3e50', lw=2), fontsize=14)
     plt.xticks(fontsize=14)
     plt.grid(axis='x', visible=False)
     plt.tight_layout()
     plt.savefig('streams_evolution.png', dpi=300, bbox_inches='tight')
     plt.show()
 
-def plot_log_streams_distribution(df):
+def plot_streams_evolution(df):
+    render_streams_evolution(prepare_streams_evolution(df))
+
+@instrumented()
+def prepare_log_streams_distribution(df, bins=50):
+    streams = df['streams'].to_numpy(dtype='float64', na_value=np.nan)
+    hist = _log_histogram(streams, bins)
+    centers = np.sqrt(hist['bin_left'] * hist['bin_right']).to_numpy()
+    widths_log = np.log10(hist['bin_right'] / hist['bin_left']).to_numpy()
+    hist['kde'] = _log_kde(streams[np.isfinite(streams) & (streams > 0)], centers, widths_log)
+    return hist
+
+@instrumented()
+def render_log_streams_distribution(hist):
     plt.style.use('seaborn-v0_8-dark')
     plt.figure(figsize=(16, 8))
-    hist = sns.histplot(df['streams'], bins=50, log_scale=True, color='#1f77b4', edgecolor='black', kde=True, kde_kws={'color': '#e74c3c', 'lw': 3})
+    edges = np.append(hist['bin_left'].to_numpy(), hist['bin_right'].iloc[-1:])
+    plt.stairs(hist['count'], edges, fill=True, color='#1f77b4', edgecolor='black')
+    plt.plot(np.sqrt(hist['bin_left'] * hist['bin_right']), hist['kde'], color='#e74c3c', lw=3)
+    plt.xscale('log')
     plt.title('Distribuição de Popularidade: 95% das Músicas têm menos de 100M Streams', fontsize=20, pad=25, fontweight='bold', color='white')
     plt.xlabel('Streams (Escala Logarítmica)', fontsize=16, color='white')
     plt.ylabel('Número de Músicas', fontsize=16, color='white')
@@ -221,4 +369,30 @@ def plot_log_streams_distribution(df):
     plt.gca().set_facecolor('#34495e')
     plt.tight_layout()
     plt.savefig('log_distribution.png', dpi=300, transparent=True)
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+def plot_log_streams_distribution(df):
+    render_log_streams_distribution(prepare_log_streams_distribution(df))
+
+# name -> (prepare, render) for the plots that take only the DataFrame
+PLOT_STEPS = {
+    'streams_distribution': (prepare_streams_distribution, render_streams_distribution),
+    'feature_correlation_matrix': (prepare_feature_correlation_matrix, render_feature_correlation_matrix),
+    'top_artists': (prepare_top_artists, render_top_artists),
+    'streams_by_year': (prepare_streams_by_year, render_streams_by_year),
+    'correlation_matrix': (prepare_correlation_matrix, render_correlation_matrix),
+    'danceability_vs_energy': (prepare_danceability_vs_energy, render_danceability_vs_energy),
+    'releases_by_month': (prepare_releases_by_month, render_releases_by_month),
+    'streams_evolution': (prepare_streams_evolution, render_streams_evolution),
+    'log_streams_distribution': (prepare_log_streams_distribution, render_log_streams_distribution),
+}
+
+@instrumented()
+def prepare_all(df, names: Optional[List[str]] = None):
+    """Calcula de uma vez os dados de vários gráficos (padrão: todos de `PLOT_STEPS`).
+
+    Os resultados são DataFrames pequenos, que podem ser enviados a outro
+    processo e desenhados com `PLOT_STEPS[nome][1]`.
+    """
+    names = list(PLOT_STEPS) if names is None else names
+    return {name: PLOT_STEPS[name][0](df) for name in names}
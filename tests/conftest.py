@@ -0,0 +1,17 @@
+"""Dados compartilhados pelos testes."""
+import pytest
+
+from src.data_cache import RAW_FILE
+from src.data_preprocessing import clean_spotify_data, load_data
+
+
+@pytest.fixture(scope='session')
+def raw_data():
+    """Arquivo bruto do Spotify, como lido por `load_data`."""
+    return load_data(str(RAW_FILE))
+
+
+@pytest.fixture
+def cleaned(raw_data):
+    """Cópia limpa de `raw_data` (cada teste pode alterá-la)."""
+    return clean_spotify_data(raw_data)
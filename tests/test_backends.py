@@ -0,0 +1,32 @@
+"""Paridade dos backends DuckDB e Polars com o pandas (`src.backends.check_parity`)."""
+import pytest
+
+from src.backends import QUERIES, check_parity
+from src.data_cache import RAW_FILE
+from src.data_preprocessing import clean_spotify_data, load_data
+
+FORMATS = ('parquet', 'feather', 'csv')
+
+
+@pytest.fixture(scope='module')
+def sources(tmp_path_factory):
+    pytest.importorskip('pyarrow')
+    df = clean_spotify_data(load_data(str(RAW_FILE)))
+    directory = tmp_path_factory.mktemp('backends')
+    paths = {'parquet': directory / 'cleaned.parquet', 'feather': directory / 'cleaned.feather',
+             'csv': directory / 'cleaned.csv'}
+    df.to_parquet(paths['parquet'])
+    df.to_feather(paths['feather'])
+    df.to_csv(paths['csv'], index=False)
+    return paths
+
+
+@pytest.mark.parametrize('backend', ['duckdb', 'polars'])
+@pytest.mark.parametrize('file_format', FORMATS)
+def test_backend_matches_pandas(sources, backend, file_format):
+    pytest.importorskip(backend)
+    report = check_parity(sources[file_format], backends=[backend],
+                          params={'viral_potential': {'energy_threshold': 60, 'dance_threshold': 65}})
+    assert report['query'].tolist() == list(QUERIES)
+    failures = report[report['status'] != 'ok']
+    assert failures.empty, failures.to_dict('records')
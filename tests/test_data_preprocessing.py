@@ -0,0 +1,95 @@
+"""Leitura e limpeza (`src.data_preprocessing`)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_cache import RAW_FILE
+from src.data_preprocessing import (SPOTIFY_SCHEMA, _dates_from_parts, _parse_thousands,
+                                    clean_spotify_data, load_data, load_data_streaming)
+
+
+def _reference_clean(raw: pd.DataFrame) -> pd.DataFrame:
+    """A limpeza escrita da forma direta, com operações de texto do pandas."""
+    df = raw.dropna(subset=['artist(s)_name', 'track_name']).copy()
+    df['streams'] = pd.to_numeric(df['streams'], errors='coerce')
+    df = df.sort_values('streams', ascending=False, kind='stable', ignore_index=True)
+    for column in ['track_name', 'artist(s)_name']:
+        df[column] = df[column].str.strip()
+    for column in ['in_deezer_playlists', 'in_shazam_charts']:
+        text = df[column].astype(str).str.replace(',', '', regex=False)
+        df[column] = pd.to_numeric(text, errors='coerce').fillna(0).astype(int)
+    df['key'] = df['key'].fillna('Unknown')
+    return df
+
+
+def test_parse_thousands():
+    values = pd.Series(['3,421', '12', ' 2,000', '2,000 ', '1,234,567', '0', 'ñ12', '１２',
+                        'BPM110KeyAModeMajor', None, ''], index=np.arange(11) * 2)
+    parsed = _parse_thousands(values)
+    expected = [3421, 12, 2000, 2000, 1234567, 0, np.nan, np.nan, np.nan, np.nan, np.nan]
+    np.testing.assert_array_equal(parsed.to_numpy(dtype='float64'), expected)
+    pd.testing.assert_index_equal(parsed.index, values.index)
+
+
+def test_parse_thousands_keeps_integers():
+    parsed = _parse_thousands(pd.Series(['1', '22,000', '333'], name='streams'))
+    assert parsed.dtype == 'int64' and parsed.name == 'streams'
+    assert parsed.tolist() == [1, 22000, 333]
+    numeric = pd.Series([1.5, np.nan])
+    assert _parse_thousands(numeric) is numeric
+
+
+def test_dates_from_parts_match_to_datetime():
+    rng = np.random.default_rng(0)
+    year = rng.integers(1899, 2031, 5000).astype('float64')
+    month = rng.integers(0, 14, 5000).astype('float64')
+    day = rng.integers(0, 33, 5000).astype('float64')
+    year[::97] = np.nan
+    day[::89] = np.nan
+    # Leap days on leap and common years, and the century rules
+    year[:4], month[:4], day[:4] = [2020, 2023, 2000, 1900], 2, 29
+    expected = pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': day}), errors='coerce')
+    actual = _dates_from_parts(year, month, day)
+    np.testing.assert_array_equal(actual, expected.to_numpy(dtype='datetime64[ns]'))
+    assert np.isnat(actual[[1, 3]]).all() and not np.isnat(actual[[0, 2]]).any()
+
+
+def test_clean_matches_reference(raw_data):
+    expected = _reference_clean(raw_data)
+    cleaned = clean_spotify_data(raw_data)
+    columns = list(expected.columns)
+    pd.testing.assert_frame_equal(cleaned[columns], expected, check_dtype=False)
+    assert cleaned['ano'].equals(cleaned['released_date'].dt.year.astype(cleaned['ano'].dtype))
+
+
+def test_clean_inplace_with_duplicate_labels(raw_data):
+    raw = raw_data.copy()
+    raw.loc[[3, 10], 'track_name'] = np.nan
+    raw.index = np.arange(len(raw)) // 2
+    expected = clean_spotify_data(raw.reset_index(drop=True))
+    cleaned = clean_spotify_data(raw, inplace=True)
+    assert cleaned is raw
+    assert len(cleaned) == len(raw_data) - 2
+    pd.testing.assert_frame_equal(cleaned, expected)
+
+
+def test_clean_non_ascii_counters(raw_data):
+    raw = raw_data.head(20).copy()
+    raw['in_shazam_charts'] = raw['in_shazam_charts'].astype(object)
+    raw.loc[[0, 1, 2], 'in_shazam_charts'] = ['ñ', ' 1,250', '3,000 ']
+    raw.loc[[3], 'streams'] = 'não informado'
+    cleaned = clean_spotify_data(raw).set_index('track_name')
+    by_name = raw.set_index(raw['track_name'].str.strip())
+    assert cleaned.at[by_name['track_name'].index[0], 'in_shazam_charts'] == 0
+    assert cleaned.at[by_name.index[1], 'in_shazam_charts'] == 1250
+    assert cleaned.at[by_name.index[2], 'in_shazam_charts'] == 3000
+    assert np.isnan(cleaned.at[by_name.index[3], 'streams'])
+
+
+@pytest.mark.parametrize('engine', ['c', 'pyarrow'])
+def test_streaming_load_matches_full_load(engine):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    full = clean_spotify_data(load_data(str(RAW_FILE), dtype=SPOTIFY_SCHEMA))
+    streamed = load_data_streaming(str(RAW_FILE), chunksize=100, engine=engine)
+    pd.testing.assert_frame_equal(streamed, full, check_dtype=False, check_categorical=False)
@@ -0,0 +1,73 @@
+"""Deduplicação de músicas (`src.dedup`)."""
+import numpy as np
+import pandas as pd
+
+from src.dedup import deduplicate, normalize_titles, resolve_duplicates
+
+
+def _tracks(rows):
+    """Quadro mínimo com título, artistas, streams e contagens."""
+    return pd.DataFrame(rows, columns=['track_name', 'artist(s)_name', 'streams',
+                                       'in_spotify_playlists', 'in_deezer_playlists',
+                                       'in_spotify_charts'])
+
+
+def _same_group(df):
+    groups = resolve_duplicates(df, max_workers=1)
+    return groups[0] == groups[1]
+
+
+def test_normalize_titles_drops_credits_and_editions():
+    titles = pd.Series(['Song (feat. A)', 'SONG - ft. B', 'Song (Explicit Ver.)', 'Sóng!'])
+    assert normalize_titles(titles).tolist() == ['song'] * 4
+
+
+def test_variants_merge():
+    pairs = [
+        (('Song (feat. B)', 'A'), ('Song', 'A, B')),
+        (('Song (Explicit Ver.)', 'A'), ('Song', 'A')),
+        (('Song', 'B, A'), ('Song', 'A, B')),
+        (('Moonlight Sonatta', 'A'), ('Moonlight Sonata', 'A')),
+    ]
+    for first, second in pairs:
+        df = _tracks([(*first, 1.0, 1, 1, 1), (*second, 2.0, 1, 1, 1)])
+        assert _same_group(df), (first, second)
+
+
+def test_numbers_and_versions_stay_apart():
+    pairs = [
+        ('Song Part 1', 'Song Part 2'),
+        ('Track 7299', 'Track 7999'),
+        ('Song', 'Song - Remastered'),
+    ]
+    for first, second in pairs:
+        df = _tracks([(first, 'A', 1.0, 1, 1, 1), (second, 'A', 2.0, 1, 1, 1)])
+        assert not _same_group(df), (first, second)
+
+
+def test_deduplicate_merges_counts():
+    df = _tracks([
+        ('Song', 'A, B', 100.0, 10, 1, 5),
+        ('Song', 'B, A', 100.0, 7, 3, 2),    # same listing again
+        ('Song (feat. B)', 'A', 50.0, 4, 2, 9),
+        ('Other', 'C', 80.0, 1, 1, 0),
+    ])
+    merged = deduplicate(df, max_workers=1)
+    assert merged['track_name'].tolist() == ['Song', 'Other']
+    song = merged.iloc[0]
+    assert song['streams'] == 150
+    assert song['in_spotify_playlists'] == 14
+    assert song['in_deezer_playlists'] == 5
+    assert song['in_spotify_charts'] == 9
+    assert song['duplicates'] == 3
+
+
+def test_deduplicate_cleaned_data(cleaned):
+    merged = deduplicate(cleaned, max_workers=1)
+    assert merged['duplicates'].sum() == len(cleaned)
+    np.testing.assert_allclose(merged['streams'].sum(), cleaned['streams'].sum(), rtol=0.05)
+    assert merged['streams'].dropna().is_monotonic_decreasing
+    lizzo = merged[merged['track_name'] == 'About Damn Time']
+    assert len(lizzo) == 1
+    # Listed twice with the same streams: the larger count wins, not the sum
+    assert lizzo['in_spotify_playlists'].item() == 9021
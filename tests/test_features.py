@@ -0,0 +1,44 @@
+"""Matriz de features (`src.features`)."""
+import numpy as np
+import pytest
+
+from src.features import FeatureMatrixBuilder, build_feature_matrix
+
+
+def test_save_load_round_trip(cleaned, tmp_path):
+    train, batch = cleaned.iloc[:600], cleaned.iloc[600:]
+    builder = FeatureMatrixBuilder().fit(train)
+    path = builder.save(tmp_path / 'params' / 'features.json')
+    loaded = FeatureMatrixBuilder.load(path)
+
+    assert loaded.get_feature_names_out() == builder.get_feature_names_out()
+    assert loaded.strategies == {column: builder.strategies[column] for column in builder.columns}
+    assert loaded.fill_missing == builder.fill_missing
+    np.testing.assert_array_equal(loaded.transform(batch), builder.transform(batch))
+    assert not list(tmp_path.glob('params/.*.tmp'))
+
+
+def test_transform_scales_columns(cleaned):
+    matrix, builder = build_feature_matrix(cleaned)
+    assert matrix.dtype == np.float32 and matrix.flags.c_contiguous
+    assert not np.isnan(matrix).any()
+    names = builder.get_feature_names_out()
+    minmax = [names.index(column) for column in names if builder.strategies[column] == 'minmax']
+    assert matrix[:, minmax].min() >= 0 and matrix[:, minmax].max() <= 1 + 1e-6
+    year = matrix[:, names.index('released_year')]
+    assert abs(year.mean()) < 1e-3 and abs(year.std() - 1) < 1e-3
+
+
+def test_fill_missing_disabled_keeps_nan(cleaned):
+    builder = FeatureMatrixBuilder(fill_missing=False).fit(cleaned)
+    assert np.isnan(builder.transform(cleaned)[:, builder.columns.index('streams')]).any()
+
+
+def test_rejects_unknown_version_and_unfitted(cleaned):
+    builder = FeatureMatrixBuilder()
+    with pytest.raises(RuntimeError):
+        builder.transform(cleaned)
+    payload = builder.fit(cleaned).to_dict()
+    payload['version'] = 0
+    with pytest.raises(ValueError):
+        FeatureMatrixBuilder.from_dict(payload)
@@ -0,0 +1,72 @@
+"""Cache de estruturas por DataFrame (`src.frame_cache`)."""
+import gc
+
+import numpy as np
+import pandas as pd
+
+from src import frame_cache
+from src.data_analysis import get_top_artists, identify_viral_potential
+from src.data_preprocessing import normalize_audio_features
+from src.frame_cache import cached, invalidate, peek
+
+
+def _counting_builder(calls):
+    def build():
+        calls.append(1)
+        return len(calls)
+    return build
+
+
+def test_reused_until_columns_change(cleaned):
+    calls = []
+    build = _counting_builder(calls)
+    assert cached(cleaned, 'probe', build) == cached(cleaned, 'probe', build) == 1
+
+    cleaned['streams'] = cleaned['streams'] * 2
+    assert cached(cleaned, 'probe', build) == 2
+    cleaned['track_name'] = cleaned['track_name'].str.upper()
+    assert cached(cleaned, 'probe', build) == 3
+    cleaned.sort_values('bpm', inplace=True, ignore_index=True)
+    assert cached(cleaned, 'probe', build) == 4
+    assert peek(cleaned, 'probe') == 4
+
+    invalidate(cleaned)
+    assert peek(cleaned, 'probe') is None
+
+
+def test_columns_without_public_buffers_disable_the_cache(cleaned):
+    cleaned['in_shazam_charts'] = cleaned['in_shazam_charts'].astype('Int64')
+    calls = []
+    build = _counting_builder(calls)
+    cached(cleaned, 'probe', build)
+    cached(cleaned, 'probe', build)
+    assert len(calls) == 2
+
+
+def test_entries_released_with_the_frame(cleaned):
+    frame = cleaned.copy()
+    cached(frame, 'probe', lambda: 1)
+    key = id(frame)
+    assert key in frame_cache._ENTRIES
+    del frame
+    gc.collect()
+    assert key not in frame_cache._ENTRIES
+
+
+def test_derived_results_follow_rewritten_values(cleaned):
+    viral = identify_viral_potential(cleaned, energy_threshold=60, dance_threshold=65)
+    top = get_top_artists(cleaned, 3)
+
+    # normalize_audio_features rewrites the percentage columns in place
+    normalize_audio_features(cleaned)
+    renormalized = identify_viral_potential(cleaned, energy_threshold=0.6, dance_threshold=0.65)
+    assert len(viral) > 0
+    pd.testing.assert_index_equal(renormalized.index, viral.index)
+    # On the old scale no normalized value passes, so a stale index would still return rows
+    assert identify_viral_potential(cleaned, energy_threshold=60, dance_threshold=65).empty
+
+    cleaned['artist(s)_name'] = np.where(cleaned.index < 50, 'X', cleaned['artist(s)_name'])
+    assert top.index[0] != 'X'
+    assert get_top_artists(cleaned, 3).index[0] == 'X'
+    pd.testing.assert_series_equal(get_top_artists(cleaned, 3),
+                                   cleaned['artist(s)_name'].value_counts().head(3), check_names=False)
@@ -0,0 +1,83 @@
+"""Ingestão incremental (`src.ingest.ingest_new_rows`)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.artist_index import ArtistIndex, get_artist_index
+from src.data_analysis import _collab_count
+from src.frame_cache import peek
+from src.ingest import ingest_new_rows, raw_keys, sidecar_paths, store_keys
+from src.rollups import StreamsRollup, get_rollup
+
+
+@pytest.fixture
+def batches(raw_data, tmp_path):
+    pytest.importorskip('pyarrow')
+    first = tmp_path / 'first.csv'
+    full = tmp_path / 'full.csv'
+    raw_data.iloc[:800].to_csv(first, index=False)
+    raw_data.to_csv(full, index=False)
+    return first, full, tmp_path / 'store.feather'
+
+
+def test_only_new_keys_are_added(raw_data, batches):
+    first, full, store_path = batches
+    store, added = ingest_new_rows(first, store_path)
+    assert added == 800
+
+    merged, added = ingest_new_rows(full, store_path)
+    keys = raw_keys(raw_data)
+    # Rows of the second batch whose key is already stored (e.g. "SNAP") are skipped
+    expected_new = ~np.isin(keys[800:], keys[:800])
+    assert added == expected_new.sum() > 0
+    assert len(merged) == 800 + added
+    assert set(store_keys(merged)) == set(keys)
+
+    streams = merged['streams'].to_numpy(dtype='float64', na_value=np.nan)
+    present = streams[~np.isnan(streams)]
+    assert np.all(present[:-1] >= present[1:])
+    assert np.isnan(streams[len(present):]).all()
+
+    again, added = ingest_new_rows(full, store_path)
+    assert added == 0
+    assert len(again) == len(merged)
+
+
+def test_derived_columns_match_full_recompute(batches):
+    first, full, store_path = batches
+    ingest_new_rows(first, store_path)
+    merged, _ = ingest_new_rows(full, store_path)
+    np.testing.assert_array_equal(merged['collab_count'], _collab_count(merged))
+    dates = merged['released_date']
+    np.testing.assert_array_equal(merged['ano'], dates.dt.year)
+    np.testing.assert_array_equal(merged['mes'], dates.dt.month)
+
+
+def test_persisted_structures_are_updated(batches):
+    first, full, store_path = batches
+    ingest_new_rows(first, store_path)
+    merged, _ = ingest_new_rows(full, store_path)
+    paths = sidecar_paths(store_path)
+    assert all(path.exists() for path in paths.values())
+
+    # The returned frame comes with the updated structures already cached
+    rollup = peek(merged, 'rollup')
+    assert rollup is not None and get_rollup(merged) is rollup
+    fresh = StreamsRollup.from_frame(merged)
+    for grain in ('day', 'year'):
+        pd.testing.assert_frame_equal(StreamsRollup.load(paths['rollup']).stats('streams', grain),
+                                      fresh.stats('streams', grain))
+    for split, name in ((True, 'artists'), (False, 'credits')):
+        expected = ArtistIndex.from_frame(merged, split).top(20, by='streams')
+        pd.testing.assert_series_equal(ArtistIndex.load(paths[name]).top(20, by='streams'), expected)
+        pd.testing.assert_series_equal(get_artist_index(merged, split).top(20, by='streams'), expected)
+
+
+def test_stale_sidecar_is_rebuilt(batches):
+    first, full, store_path = batches
+    ingest_new_rows(first, store_path)
+    paths = sidecar_paths(store_path)
+    paths['rollup'].unlink()
+    merged, _ = ingest_new_rows(full, store_path)
+    pd.testing.assert_frame_equal(StreamsRollup.load(paths['rollup']).stats('streams', 'month'),
+                                  StreamsRollup.from_frame(merged).stats('streams', 'month'))
@@ -0,0 +1,35 @@
+"""Instrumentação por etapa (`src.instrumentation`)."""
+import pytest
+
+from src import instrumentation
+from src.data_preprocessing import clean_spotify_data
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_clean_stages_record_rows(raw_data, enabled):
+    cleaned = clean_spotify_data(raw_data)
+    events = {event['name']: event for event in instrumentation.events()}
+    for name in ('clean.strip_text', 'clean.counters'):
+        assert events[name]['rows_in'] == events[name]['rows_out'] == len(cleaned)
+        assert events[name]['bytes_in'] > 0
+
+
+def test_lazy_inputs_skipped_when_disabled():
+    calls = []
+
+    def data():
+        calls.append(1)
+        return None
+
+    assert not instrumentation.is_enabled()
+    with instrumentation.stage('lazy', data) as record:
+        record.output(data)
+    assert calls == []
@@ -0,0 +1,48 @@
+"""Processamento em shards (`src.parallel`)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_cache import RAW_FILE
+from src.data_preprocessing import SPOTIFY_SCHEMA, clean_spotify_data, load_data
+from src.parallel import clean_file_parallel, merge_sorted_shards, split_byte_ranges
+
+
+def _sorted_shard(rng, size, shard):
+    streams = rng.integers(0, 20, size).astype('float64')
+    streams[rng.random(size) < 0.1] = np.nan
+    frame = pd.DataFrame({'streams': streams, 'shard': shard, 'row': np.arange(size)})
+    return frame.sort_values('streams', ascending=False, kind='stable', ignore_index=True)
+
+
+@pytest.mark.parametrize('n_shards', [1, 2, 3, 8])
+def test_merge_matches_stable_sort(n_shards):
+    rng = np.random.default_rng(n_shards)
+    shards = [_sorted_shard(rng, size, shard) for shard, size in enumerate(rng.integers(0, 200, n_shards))]
+    if not sum(len(shard) for shard in shards):
+        shards[0] = _sorted_shard(rng, 10, 0)
+    merged = merge_sorted_shards(shards)
+    # Ties keep shard order, NaN streams go last
+    expected = pd.concat(shards, ignore_index=True).sort_values(
+        'streams', ascending=False, kind='stable', na_position='last', ignore_index=True)
+    pd.testing.assert_frame_equal(merged, expected)
+
+
+def test_merge_without_rows():
+    with pytest.raises(ValueError):
+        merge_sorted_shards([pd.DataFrame({'streams': []})])
+
+
+def test_byte_ranges_cover_whole_lines():
+    ranges = split_byte_ranges(RAW_FILE, 4)
+    data = RAW_FILE.read_bytes()
+    assert ranges[0][0] == data.index(b'\n') + 1 and ranges[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    assert all(data[end - 1:end] == b'\n' for _, end in ranges[:-1])
+
+
+def test_parallel_file_matches_serial():
+    pytest.importorskip('pyarrow')
+    serial = clean_spotify_data(load_data(str(RAW_FILE), dtype=SPOTIFY_SCHEMA))
+    parallel = clean_file_parallel(RAW_FILE, n_parts=3, max_workers=2, normalize=False)
+    pd.testing.assert_frame_equal(parallel, serial, check_categorical=False)
@@ -0,0 +1,56 @@
+"""Agendamento e checkpoints do pipeline (`src.pipeline.run_pipeline`)."""
+from pathlib import Path
+
+import pytest
+
+from src import pipeline
+from src.pipeline import Stage, load_state, run_pipeline
+
+
+def _touch(workdir, name):
+    assert workdir.is_absolute()
+    (workdir / f'{name}.txt').write_text(name)
+    return [f'{name}.txt']
+
+
+def _broken(inputs, workdir, options):
+    raise RuntimeError('falhou')
+
+
+def _first(inputs, workdir, options):
+    return _touch(workdir, 'first')
+
+
+def _second(inputs, workdir, options):
+    return _touch(workdir, 'second')
+
+
+@pytest.fixture
+def toy_stages(monkeypatch, tmp_path):
+    stages = {stage.name: stage for stage in [
+        Stage('broken', (), (), ('raw',), _broken),
+        Stage('downstream', ('broken',), (), (), _first),
+        Stage('independent', (), (), ('raw',), _second),
+    ]}
+    monkeypatch.setattr(pipeline, 'STAGES', stages)
+    raw = tmp_path / 'raw.csv'
+    raw.write_text('a,b\n1,2\n')
+    return raw
+
+
+def test_failure_blocks_only_downstream_stages(toy_stages, tmp_path):
+    results = run_pipeline(toy_stages, tmp_path / 'work', jobs=1, log=lambda message: None)
+    assert {name: entry['status'] for name, entry in results.items()} == {
+        'broken': 'failed', 'downstream': 'blocked', 'independent': 'done'}
+    assert (tmp_path / 'work' / 'second.txt').exists()
+
+
+def test_relative_workdir_keeps_its_files(toy_stages, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    run_pipeline(toy_stages, 'work', targets=['independent'], jobs=1, log=lambda message: None)
+    workdir = tmp_path / 'work'
+    assert sorted(path.name for path in workdir.iterdir()) == ['.fingerprints.json', 'second.txt', 'state.json']
+    assert load_state(workdir)['independent']['status'] == 'done'
+
+    again = run_pipeline(toy_stages, Path('work'), targets=['independent'], jobs=1, log=lambda message: None)
+    assert again['independent']['status'] == 'skipped'
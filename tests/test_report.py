@@ -0,0 +1,26 @@
+"""Renderização em lote (`src.report.render_report`)."""
+import json
+
+import pytest
+
+from src.report import DEFAULT_FIGURES, render_report
+
+FIGURES = {name: DEFAULT_FIGURES[name] for name in ('streams_distribution', 'top_artists')}
+
+
+@pytest.mark.parametrize('relative', [False, True])
+def test_figures_written_to_output_dir(cleaned, tmp_path, monkeypatch, relative):
+    pytest.importorskip('pyarrow')
+    monkeypatch.chdir(tmp_path)
+    output_dir = 'figures' if relative else tmp_path / 'figures'
+    manifest = render_report(cleaned, output_dir, formats=('png', 'svg'), figures=FIGURES, max_workers=1)
+
+    figures_dir = tmp_path / 'figures'
+    assert manifest['output_dir'] == str(figures_dir)
+    assert [entry['error'] for entry in manifest['figures']] == [None, None]
+    written = sorted(path.name for path in figures_dir.iterdir())
+    assert written == ['manifest.json', 'streams_distribution.png', 'streams_distribution.svg',
+                       'top_artists.png', 'top_artists.svg']
+    assert json.loads((figures_dir / 'manifest.json').read_text()) == manifest
+    # Files the plot functions save on their own stay in the scratch directory
+    assert not any(tmp_path.glob('*.png'))
@@ -0,0 +1,66 @@
+"""Rollup temporal (`src.rollups`) contra o agrupamento das linhas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_analysis import analyze_temporal_patterns, get_monthly_performance_stats
+from src.rollups import MEDIAN_RTOL, StreamsRollup, get_rollup, streams_median
+from src.visualization import prepare_streams_evolution
+
+
+@pytest.fixture
+def with_invalid_days(cleaned):
+    """Dados limpos com 10 músicas lançadas em 31 de fevereiro."""
+    from src.data_preprocessing import clean_spotify_data
+
+    raw = cleaned.drop(columns=['released_date', 'ano', 'mes'])
+    raw.loc[raw.index[:10], ['released_month', 'released_day']] = [2, 31]
+    return clean_spotify_data(raw)
+
+
+@pytest.mark.parametrize('date_column', ['released_date', 'ano', 'mes', 'released_year', 'released_month'])
+@pytest.mark.parametrize('value_column', ['streams', 'in_spotify_playlists', 'in_deezer_charts'])
+def test_temporal_patterns_match_groupby(with_invalid_days, date_column, value_column):
+    df = with_invalid_days
+    assert df['released_date'].isna().sum() == 10
+    expected = df.groupby(date_column)[value_column].agg(['mean', 'count', 'sum'])
+    actual = analyze_temporal_patterns(df, date_column, value_column)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_index_type=False,
+                                  check_freq=False)
+
+
+def test_streams_evolution_counts_invalid_days(with_invalid_days):
+    df = with_invalid_days
+    yearly = df.groupby('released_year')['streams'].agg(['sum', 'mean'])
+    evolution = prepare_streams_evolution(df)
+    np.testing.assert_array_equal(evolution['year'], yearly.index)
+    np.testing.assert_allclose(evolution['total_billions'], yearly['sum'] / 1e9)
+    np.testing.assert_allclose(evolution['avg_millions'], yearly['mean'] / 1e6)
+
+
+def test_incremental_rows_and_save_load(with_invalid_days, tmp_path):
+    df = with_invalid_days
+    full = StreamsRollup.from_frame(df)
+    halves = StreamsRollup.from_frame(df.iloc[::2]).add_rows(df.iloc[1::2])
+    path = halves.save(tmp_path / 'rollups.npz')
+    loaded = StreamsRollup.load(path)
+    for grain in ('day', 'month', 'year', 'month_of_year'):
+        for partial in (False, True):
+            pd.testing.assert_frame_equal(loaded.stats('in_spotify_playlists', grain, partial),
+                                          full.stats('in_spotify_playlists', grain, partial))
+    pd.testing.assert_series_equal(loaded.median('year'), full.median('year'))
+
+
+def test_median_exact_unless_approximate(cleaned):
+    expected = cleaned.groupby('mes')['streams'].median()
+    exact = get_monthly_performance_stats(cleaned)['median_streams']
+    np.testing.assert_allclose(exact, expected.round(2), rtol=0)
+    approximate = streams_median(cleaned, approximate=True)
+    np.testing.assert_allclose(approximate, expected, rtol=MEDIAN_RTOL)
+
+
+def test_rollup_follows_column_changes(cleaned):
+    before = get_rollup(cleaned).stats('streams', 'year')['sum']
+    cleaned['streams'] = cleaned['streams'] * 2
+    after = get_rollup(cleaned).stats('streams', 'year')['sum']
+    np.testing.assert_allclose(after, before * 2)